@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
 import instructor
@@ -7,8 +8,11 @@ import openai
 import orjson
 
 from config.settings import settings
-from core.interpret import interpret
+from core.interpret import Interpreter, LocalInterpreter
+from core.run_cache import RunResultCache
+from core.warm_pool import WarmRunnerPool
 from infra.observer import UnifiedObserver
+from infra.timing import StageTimer
 from infra.vector_store import VectorStore
 from memory.ingest import MemoryIngestPipeline
 from memory.reranker import MemoryReranker
@@ -35,22 +39,41 @@ class DevAgent:
         observer: UnifiedObserver,
         memory_store: MemoryStore,
         vector_store: VectorStore | None = None,
+        interpreter: Interpreter | None = None,
     ) -> None:
         self.mode = mode
         self.observer = observer
         self.memory_store = memory_store
         self.vector_store = vector_store
+        self.interpreter = interpreter or LocalInterpreter()
         self.ingest_pipeline = MemoryIngestPipeline(memory_store)
         self.selector = MemorySelector(store=memory_store, vector_store=vector_store)
         self.reranker = MemoryReranker(observer=observer)
         self.focus_builder = FocusViewBuilder(selector=self.selector, reranker=self.reranker)
         self.baseline_focus_inferer = BaselineFocusInferer()
+        self.run_cache = (
+            RunResultCache(max_bytes=settings.run_cache_max_bytes) if settings.run_cache_enabled else None
+        )
+        self.warm_pool = (
+            WarmRunnerPool(
+                prefixes=settings.warm_pool_prefixes,
+                preload=settings.warm_pool_preload,
+                size=settings.warm_pool_size,
+            )
+            if settings.warm_pool_enabled
+            else None
+        )
         self.model_name = settings.llm_model_main
-        self.llm = instructor.from_openai(
-            openai.OpenAI(
-                api_key=settings.llm_api_key,
-                base_url=settings.llm_base_url,
-            ),
+        # Offline mode: without an API key no client is built, so the agent runs fully locally.
+        self.llm = (
+            instructor.from_openai(
+                openai.OpenAI(
+                    api_key=settings.llm_api_key,
+                    base_url=settings.llm_base_url,
+                ),
+            )
+            if settings.llm_api_key
+            else None
         )
 
     def run_step(
@@ -66,23 +89,94 @@ class DevAgent:
         selector_profile: SelectorProfile | None = None,
         extra_filters: dict[str, Any] | None = None,
         rerank_hints: RerankHints | None = None,
+        timer: StageTimer | None = None,
     ) -> tuple[State, list[Event], DecisionInputView]:
-        """Run one DevAgent S/F/T cycle and return the new state, emitted events, and decision context."""
+        """Run one DevAgent S/F/T cycle and return the new state, emitted events, and decision context.
+
+        When ``timer`` is given, each pipeline stage (interpret, persist, ingest, focus, select, rerank,
+        stats) is timed into it.
+        """
         new_state, events = self.execute_program(
             state=state,
             program=program,
             job_id=job_id,
             start_step_id=start_step_id,
+            timer=timer,
+        )
+        decision_input = self._build_decision_input(
+            new_state,
+            events,
+            goal_view,
+            hints=hints,
+            focus_spec=focus_spec,
+            selector_profile=selector_profile,
+            extra_filters=extra_filters,
+            rerank_hints=rerank_hints,
+            timer=timer,
+        )
+        return new_state, events, decision_input
+
+    async def run_step_async(
+        self,
+        job_id: str,
+        state: State,
+        program: Program,
+        goal_view: GoalView,
+        *,
+        start_step_id: int = 1,
+        hints: AgentHints | None = None,
+        focus_spec: FocusSpec | None = None,
+        selector_profile: SelectorProfile | None = None,
+        extra_filters: dict[str, Any] | None = None,
+        rerank_hints: RerankHints | None = None,
+        timer: StageTimer | None = None,
+    ) -> tuple[State, list[Event], DecisionInputView]:
+        """Async counterpart of :meth:`run_step`.
+
+        Program execution is awaited; the blocking store, ingest and memory stages run in worker threads
+        so concurrent steps do not wait on each other's persistence.
+        """
+        new_state, events = await self.execute_program_async(
+            state=state,
+            program=program,
+            job_id=job_id,
+            start_step_id=start_step_id,
+            timer=timer,
         )
+        decision_input = await asyncio.to_thread(
+            self._build_decision_input,
+            new_state,
+            events,
+            goal_view,
+            hints=hints,
+            focus_spec=focus_spec,
+            selector_profile=selector_profile,
+            extra_filters=extra_filters,
+            rerank_hints=rerank_hints,
+            timer=timer,
+        )
+        return new_state, events, decision_input
 
+    def _build_decision_input(
+        self,
+        new_state: State,
+        events: list[Event],
+        goal_view: GoalView,
+        *,
+        hints: AgentHints | None,
+        focus_spec: FocusSpec | None,
+        selector_profile: SelectorProfile | None,
+        extra_filters: dict[str, Any] | None,
+        rerank_hints: RerankHints | None,
+        timer: StageTimer | None = None,
+    ) -> DecisionInputView:
+        timer = timer or StageTimer()
         state_view = StateView(
             git_head=new_state.git_head,
             failing_tests=[],
             repo_stats={},
         )
 
-        baseline_focus = self.baseline_focus_inferer.infer(events)
-
         if focus_spec is None:
             focus_spec = FocusSpec(
                 task_type=goal_view.task_type,
@@ -93,12 +187,14 @@ class DevAgent:
         if selector_profile is None:
             selector_profile = SelectorProfile(weights={}, per_kind_limit={}, recency_window=None)
 
-        memory_focus = self.focus_builder.build(
-            spec=focus_spec,
-            profile=selector_profile,
-            filters=extra_filters,
-            hints=rerank_hints,
-        )
+        with timer.stage("focus"):
+            baseline_focus = self.baseline_focus_inferer.infer(events)
+            memory_focus = self.focus_builder.build(
+                spec=focus_spec,
+                profile=selector_profile,
+                filters=extra_filters,
+                hints=rerank_hints,
+            )
 
         combined_focus = FocusView(
             files=list(dict.fromkeys(baseline_focus.files + memory_focus.files)),
@@ -106,16 +202,19 @@ class DevAgent:
             tests=list(dict.fromkeys(baseline_focus.tests + memory_focus.tests)),
         )
 
-        memory_candidates = self.selector.select(
-            profile=selector_profile,
-            filters=extra_filters,
-            limit=50,
-        )
-        memory_items = self.reranker.rerank(memory_candidates, hints=rerank_hints)
-        stats = self.memory_store.stats()
+        with timer.stage("select"):
+            memory_candidates = self.selector.select(
+                profile=selector_profile,
+                filters=extra_filters,
+                limit=50,
+            )
+        with timer.stage("rerank"):
+            memory_items = self.reranker.rerank(memory_candidates, hints=rerank_hints)
+        with timer.stage("stats"):
+            stats = self.memory_store.stats()
         memory_view = MemoryView(items=memory_items, stats=stats)
 
-        decision_input = DecisionInputView(
+        return DecisionInputView(
             state_view=state_view,
             focus_view=combined_focus,
             memory_view=memory_view,
@@ -125,8 +224,6 @@ class DevAgent:
             token_budget_hint=None,
         )
 
-        return new_state, events, decision_input
-
     def devagent_step(self, decision_input: DecisionInputView, prompt: str) -> Program:
         """Generate a Program from DecisionInputView and a text-only prompt."""
         _ = decision_input
@@ -140,8 +237,52 @@ class DevAgent:
         program: Program,
         job_id: str,
         start_step_id: int,
+        timer: StageTimer | None = None,
+    ) -> tuple[State, list[Event]]:
+        timer = timer or StageTimer()
+        with timer.stage("interpret"):
+            new_state, events = self.interpreter.interpret(
+                state,
+                program,
+                job_id=job_id,
+                step_id=start_step_id,
+                max_workers=settings.run_max_workers,
+                capture_max_bytes=settings.run_capture_max_bytes,
+                run_cache=self.run_cache,
+                warm_pool=self.warm_pool,
+                duration_store=self.memory_store,
+            )
+        with timer.stage("persist"):
+            self.observer.record_events(events)
+        with timer.stage("ingest"):
+            self.ingest_pipeline.ingest(events)
+        return new_state, events
+
+    async def execute_program_async(
+        self,
+        *,
+        state: State,
+        program: Program,
+        job_id: str,
+        start_step_id: int,
+        timer: StageTimer | None = None,
     ) -> tuple[State, list[Event]]:
-        new_state, events = interpret(state, program, job_id=job_id, step_id=start_step_id)
-        self.observer.record_events(events)
-        self.ingest_pipeline.ingest(events)
+        timer = timer or StageTimer()
+        with timer.stage("interpret"):
+            new_state, events = await self.interpreter.interpret_async(
+                state,
+                program,
+                job_id=job_id,
+                step_id=start_step_id,
+                max_workers=settings.run_max_workers,
+                capture_max_bytes=settings.run_capture_max_bytes,
+                run_cache=self.run_cache,
+                warm_pool=self.warm_pool,
+                duration_store=self.memory_store,
+            )
+        # record_events can block on write-behind backpressure, so neither stage runs on the event loop.
+        with timer.stage("persist"):
+            await asyncio.to_thread(self.observer.record_events, events)
+        with timer.stage("ingest"):
+            await asyncio.to_thread(self.ingest_pipeline.ingest, events)
         return new_state, events
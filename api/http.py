@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 
 from agent.devagent import DevAgent
@@ -14,13 +15,18 @@ from meta.controller import MetaController
 from meta.llm_meta_planner import LLMMetaPlanner
 from schemas.core import Event, Program, State
 from schemas.views import AgentHints, DecisionInputView, DevAgentMode, GoalView
-from store.event_store import EventStore
+from store.event_store import EventStore, create_event_store
+from store.retention import RetentionCompactor
+from store.paging import Cursor, format_cursor, parse_cursor
 from store.trace_ledger import TraceLedger
 from task.runner import TaskRunner
 
 
 # Fixed detail string for missing jobs to keep HTTP responses deterministic.
 JOB_NOT_FOUND_DETAIL = "job not found"
+INVALID_CURSOR_DETAIL = "invalid cursor"
+INVALID_FIELDS_DETAIL = "invalid fields"
+MAX_PAGE_SIZE = 1000
 
 
 class CreateJobRequest(BaseModel):
@@ -52,16 +58,66 @@ class RunStepResponse(BaseModel):
     decision: DecisionInputView
 
 
+class EventPageResponse(BaseModel):
+    """A page of a job's stored events; pass ``next_after`` as ``after`` to fetch the next one."""
+
+    job_id: str
+    events: list[Event]
+    next_after: str | None
+
+
+class TracePageResponse(BaseModel):
+    """A page of a job's trace entries; pass ``next_after`` as ``after`` to fetch the next one.
+
+    Entries are passed through as stored (or reduced to the requested ``fields``) without being
+    re-validated as ``TraceEntry`` models.
+    """
+
+    job_id: str
+    traces: list[dict[str, Any]]
+    next_after: str | None
+
+
+def _cursor_param(after: str | None) -> Cursor | None:
+    if after is None:
+        return None
+    try:
+        return parse_cursor(after)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=INVALID_CURSOR_DETAIL) from exc
+
+
 def create_app(settings: Settings | None = None) -> FastAPI:
     """Create a FastAPI app wired to the DevAgent v7.3 stack (stores, planner, controller, task runner)."""
     app_settings = settings or global_settings
 
-    app = FastAPI()
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+        if retention.enabled:
+            retention.start(app_settings.retention_interval_s)
+        yield
+        retention.stop()
+        if devagent.warm_pool is not None:
+            devagent.warm_pool.close()
+        observer.close()
+
+    app = FastAPI(lifespan=lifespan)
 
-    event_store = EventStore(db_path=app_settings.event_db_path)
+    event_store = create_event_store(app_settings)
     trace_ledger = TraceLedger(db_path=app_settings.trace_db_path)
     memory_store = MemoryStore(db_path=app_settings.memory_db_path)
-    observer = UnifiedObserver(event_store=event_store, trace_ledger=trace_ledger)
+    observer = UnifiedObserver(
+        event_store=event_store,
+        trace_ledger=trace_ledger,
+        write_behind=app_settings.observer_write_behind,
+        write_behind_max_pending=app_settings.observer_write_behind_max_pending,
+        write_behind_max_batch=app_settings.observer_write_behind_max_batch,
+    )
+    retention = RetentionCompactor.from_settings(
+        event_store if isinstance(event_store, EventStore) else None,
+        trace_ledger,
+        app_settings,
+    )
     vector_store = VectorStore(dim=app_settings.vector_dim, use_faiss=False)
     devagent = DevAgent(
         mode=DevAgentMode.OPTIMIZED_STRUCTURED,
@@ -82,6 +138,8 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     app.state.event_store = event_store
     app.state.trace_ledger = trace_ledger
     app.state.memory_store = memory_store
+    app.state.observer = observer
+    app.state.retention = retention
     app.state.vector_store = vector_store
     app.state.devagent = devagent
     app.state.meta_controller = meta_controller
@@ -97,9 +155,9 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         return CreateJobResponse(job_id=job_id)
 
     @app.post("/jobs/{job_id}/steps", response_model=RunStepResponse)
-    def run_step(job_id: str, request: RunStepRequest) -> RunStepResponse:
+    async def run_step(job_id: str, request: RunStepRequest) -> RunStepResponse:
         try:
-            state, events, decision = task_runner.run_step(
+            state, events, decision = await task_runner.run_step_async(
                 job_id=job_id,
                 program=request.program,
                 hints=request.hints,
@@ -108,6 +166,31 @@ def create_app(settings: Settings | None = None) -> FastAPI:
             raise HTTPException(status_code=404, detail=JOB_NOT_FOUND_DETAIL) from exc
         return RunStepResponse(job_id=job_id, state=state, events=events, decision=decision)
 
+    @app.get("/jobs/{job_id}/events", response_model=EventPageResponse)
+    def list_events(
+        job_id: str,
+        after: str | None = None,
+        limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    ) -> EventPageResponse:
+        observer.flush()
+        events, cursor = event_store.page_job_events(job_id, _cursor_param(after), limit)
+        return EventPageResponse(job_id=job_id, events=events, next_after=format_cursor(cursor))
+
+    @app.get("/jobs/{job_id}/traces", response_model=TracePageResponse)
+    def list_traces(
+        job_id: str,
+        after: str | None = None,
+        limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+        fields: str | None = Query(default=None, description="Comma-separated entry fields to return"),
+    ) -> TracePageResponse:
+        observer.flush()
+        selected = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+        try:
+            traces, cursor = trace_ledger.page_job_records(job_id, _cursor_param(after), limit, selected)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=INVALID_FIELDS_DETAIL) from exc
+        return TracePageResponse(job_id=job_id, traces=traces, next_after=format_cursor(cursor))
+
     return app
 
 
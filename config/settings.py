@@ -14,6 +14,37 @@ class Settings(BaseSettings):
     vector_dim: int = Field(default=768)
     coarse_k: int = Field(default=50)
     rerank_k: int = Field(default=20)
+    run_max_workers: int = Field(default=4)
+    run_capture_max_bytes: int = Field(default=256 * 1024)
+    run_cache_enabled: bool = Field(default=False)
+    run_cache_max_bytes: int = Field(default=64 * 1024 * 1024)
+    warm_pool_enabled: bool = Field(default=False)
+    warm_pool_prefixes: list[str] = Field(default_factory=lambda: ["python -m pytest"])
+    warm_pool_preload: list[str] = Field(default_factory=lambda: ["pytest"])
+    warm_pool_size: int = Field(default=2)
+    sqlite_synchronous: str = Field(default="NORMAL")
+    sqlite_cache_size_kb: int = Field(default=64 * 1024)
+    sqlite_mmap_size_bytes: int = Field(default=256 * 1024 * 1024)
+    sqlite_busy_timeout_ms: int = Field(default=5000)
+    sqlite_pool_size: int = Field(default=5)
+    event_blob_min_bytes: int = Field(default=4096)
+    event_blob_compression: str = Field(default="zlib")
+    event_store_backend: str = Field(default="sqlite")
+    event_segment_dir: str = Field(default="./.devagent_data/event_segments")
+    event_segment_max_bytes: int = Field(default=64 * 1024 * 1024)
+    event_segment_fsync: bool = Field(default=False)
+    observer_write_behind: bool = Field(default=False)
+    observer_write_behind_max_pending: int = Field(default=10_000)
+    observer_write_behind_max_batch: int = Field(default=1_000)
+    event_retention_max_age_s: float | None = Field(default=None)
+    event_retention_max_per_job: int | None = Field(default=None)
+    trace_retention_max_age_s: float | None = Field(default=None)
+    trace_retention_max_per_job: int | None = Field(default=None)
+    retention_archive_idle_after_s: float | None = Field(default=None)
+    retention_archive_dir: str | None = Field(default="./.devagent_data/archive")
+    retention_interval_s: float = Field(default=300.0)
+    retention_batch_size: int = Field(default=1_000)
+    retention_vacuum_pages: int = Field(default=2_048)
 
     class Config:
         env_file = ".env"
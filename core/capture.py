@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import IO
+
+# Default per-stream byte budget for RUN stdout/stderr capture.
+RUN_CAPTURE_MAX_BYTES = 256 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class BoundedCapture:
+    """Head+tail byte buffer with a fixed budget.
+
+    The first half of ``max_bytes`` is kept verbatim as the head; after that only the most recent
+    bytes are retained as the tail. Bytes dropped in between are counted in ``truncated_bytes`` so
+    memory stays bounded no matter how much the producer writes.
+    """
+
+    def __init__(self, max_bytes: int = RUN_CAPTURE_MAX_BYTES) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.head_limit = self.max_bytes // 2
+        self.tail_limit = self.max_bytes - self.head_limit
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.total_bytes = 0
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.total_bytes += len(chunk)
+        room = self.head_limit - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk or self.tail_limit == 0:
+            return
+        self._tail += chunk[-self.tail_limit :]
+        # Trim lazily so steady streaming does not shift the buffer on every chunk.
+        if len(self._tail) > 2 * self.tail_limit:
+            del self._tail[: len(self._tail) - self.tail_limit]
+
+    @property
+    def truncated_bytes(self) -> int:
+        kept = len(self._head) + min(len(self._tail), self.tail_limit)
+        return self.total_bytes - kept
+
+    def drain(self, stream: IO[bytes], chunk_size: int = CHUNK_SIZE) -> None:
+        """Read ``stream`` to EOF, feeding every chunk through the buffer."""
+
+        read = getattr(stream, "read1", stream.read)
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def text(self) -> str:
+        tail = bytes(self._tail[-self.tail_limit :]) if self.tail_limit else b""
+        truncated = self.truncated_bytes
+        head_text = bytes(self._head).decode("utf-8", errors="replace")
+        tail_text = tail.decode("utf-8", errors="replace")
+        if truncated:
+            return f"{head_text}\n[... {truncated} bytes truncated ...]\n{tail_text}"
+        return head_text + tail_text
+
+
+__all__ = ["BoundedCapture", "CHUNK_SIZE", "RUN_CAPTURE_MAX_BYTES"]
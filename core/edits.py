@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+
+def _strip_eol(line: str) -> str:
+    return line.rstrip("\r\n")
+
+
+def _locate_hunk(source: list[str], expected: list[str], start: int, floor: int) -> int:
+    """Return where ``expected`` matches ``source``, preferring ``start`` and then the nearest offset."""
+
+    wanted = [_strip_eol(line) for line in expected]
+
+    def matches(at: int) -> bool:
+        if at < floor or at + len(wanted) > len(source):
+            return False
+        return [_strip_eol(line) for line in source[at : at + len(wanted)]] == wanted
+
+    if matches(start):
+        return start
+    for offset in range(1, len(source) + 1):
+        for candidate in (start - offset, start + offset):
+            if matches(candidate):
+                return candidate
+    raise ValueError(f"patch hunk at line {start + 1} does not apply")
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """Apply a single-file unified diff to ``original`` and return the patched text.
+
+    ``---``/``+++`` headers are optional. Hunks are matched on their context and removed lines; when
+    a hunk does not match at its recorded position the nearest matching offset is used, like
+    ``patch`` does without fuzz.
+    """
+
+    source = original.splitlines(keepends=True)
+    diff_lines = diff.splitlines(keepends=True)
+    output: list[str] = []
+    position = 0
+    index = 0
+    hunk_count = 0
+    while index < len(diff_lines):
+        header = HUNK_HEADER.match(diff_lines[index])
+        index += 1
+        if header is None:
+            continue
+        hunk_count += 1
+        old_start = int(header.group(1))
+        old_len = int(header.group(2)) if header.group(2) is not None else 1
+        new_len = int(header.group(4)) if header.group(4) is not None else 1
+
+        expected: list[str] = []
+        replacement: list[str] = []
+        old_seen = new_seen = 0
+        last_target: list[str] | None = None
+        while index < len(diff_lines) and (old_seen < old_len or new_seen < new_len):
+            raw = diff_lines[index]
+            index += 1
+            if raw.startswith("\\"):
+                if last_target:
+                    last_target[-1] = _strip_eol(last_target[-1])
+                continue
+            tag, body = (raw[0], raw[1:]) if raw.strip("\r\n") else (" ", raw)
+            if tag == " ":
+                expected.append(body)
+                replacement.append(body)
+                old_seen += 1
+                new_seen += 1
+                last_target = replacement
+            elif tag == "-":
+                expected.append(body)
+                old_seen += 1
+                last_target = None
+            elif tag == "+":
+                replacement.append(body)
+                new_seen += 1
+                last_target = replacement
+            else:
+                raise ValueError(f"malformed patch line: {raw!r}")
+        if old_seen != old_len or new_seen != new_len:
+            raise ValueError("patch hunk is truncated")
+        if index < len(diff_lines) and diff_lines[index].startswith(NO_NEWLINE_MARKER) and last_target:
+            last_target[-1] = _strip_eol(last_target[-1])
+            index += 1
+
+        start = old_start - 1 if old_len > 0 else old_start
+        at = _locate_hunk(source, expected, start, position)
+        output.extend(source[position:at])
+        output.extend(replacement)
+        position = at + len(expected)
+
+    if hunk_count == 0:
+        raise ValueError("patch contains no hunks")
+    output.extend(source[position:])
+    return "".join(output)
+
+
+def apply_line_ranges(original: str, ranges: list[dict[str, Any]]) -> str:
+    """Replace 1-based inclusive line ranges of ``original``.
+
+    Each range is ``{"start": int, "end": int, "content": str}``; ``end == start - 1`` inserts
+    ``content`` before line ``start`` without removing anything. Ranges must not overlap.
+    """
+
+    lines = original.splitlines(keepends=True)
+    parsed: list[tuple[int, int, str]] = []
+    for spec in ranges:
+        if not isinstance(spec, dict):
+            raise ValueError("EDIT range must be an object with start/end/content")
+        start, end, content = spec.get("start"), spec.get("end"), spec.get("content", "")
+        if not isinstance(start, int) or not isinstance(end, int) or not isinstance(content, str):
+            raise ValueError("EDIT range requires integer 'start'/'end' and string 'content'")
+        if start < 1 or start > len(lines) + 1 or end < start - 1 or end > len(lines):
+            raise ValueError(f"EDIT range {start}-{end} is outside the file ({len(lines)} lines)")
+        parsed.append((start, end, content))
+
+    parsed.sort(key=lambda item: (item[0], item[1]))
+    for (_, prev_end, _), (start, _, _) in zip(parsed, parsed[1:]):
+        if start <= prev_end:
+            raise ValueError("EDIT ranges overlap")
+
+    for start, end, content in reversed(parsed):
+        replacement = content.splitlines(keepends=True)
+        if replacement and not replacement[-1].endswith(("\n", "\r")) and end < len(lines):
+            replacement[-1] += "\n"
+        lines[start - 1 : end] = replacement
+    return "".join(lines)
+
+
+def resolve_edit_target(repo_root: str, file_path: object) -> Path:
+    if not isinstance(file_path, str):
+        raise ValueError("EDIT instruction requires 'file_path' string in payload")
+    repo_root_path = Path(repo_root).resolve()
+    target_path = (repo_root_path / file_path).resolve()
+    try:
+        target_path.relative_to(repo_root_path)
+    except ValueError as exc:
+        raise ValueError("EDIT path escapes repo_root") from exc
+    return target_path
+
+
+def render_edit(payload: dict[str, Any], current: str | None) -> str:
+    """Compute the new file content for an EDIT payload given the current content (``None`` if absent).
+
+    Exactly one of ``content`` (full rewrite, the default), ``patch`` (unified diff) or ``ranges``
+    (line-range replacements) may be supplied.
+    """
+
+    modes = [key for key in ("content", "patch", "ranges") if key in payload]
+    if len(modes) > 1:
+        raise ValueError("EDIT payload accepts only one of 'content', 'patch' or 'ranges'")
+    if "patch" in payload:
+        patch = payload["patch"]
+        if not isinstance(patch, str):
+            raise ValueError("EDIT 'patch' must be a unified diff string")
+        return apply_unified_diff(current or "", patch)
+    if "ranges" in payload:
+        ranges = payload["ranges"]
+        if not isinstance(ranges, list):
+            raise ValueError("EDIT 'ranges' must be a list")
+        if current is None:
+            raise ValueError("EDIT 'ranges' requires an existing file")
+        return apply_line_ranges(current, ranges)
+    return str(payload.get("content", ""))
+
+
+def _write_temp(target: Path, content: str) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            handle.write(content)
+        if target.exists():
+            os.chmod(tmp_name, target.stat().st_mode & 0o7777)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return Path(tmp_name)
+
+
+def apply_edits(payloads: list[dict[str, Any]], repo_root: str) -> list[dict[str, Any]]:
+    """Apply one or more EDIT payloads as a single transaction.
+
+    Every new file body is computed and written to a temp file next to its target before anything is
+    renamed into place, so a payload that fails to render or write leaves the tree untouched. If a
+    rename fails part-way, files already replaced are restored from their previous contents.
+    """
+
+    targets: list[Path] = []
+    pending: dict[Path, str] = {}
+    for payload in payloads:
+        target = resolve_edit_target(repo_root, payload.get("file_path"))
+        if target in pending:
+            current: str | None = pending[target]
+        elif ("patch" in payload or "ranges" in payload) and target.is_file():
+            # Only incremental edits need the old text; a full ``content`` rewrite must not
+            # require the file it replaces to be valid UTF-8.
+            with open(target, encoding="utf-8", newline="") as handle:
+                current = handle.read()
+        else:
+            current = None
+        pending[target] = render_edit(payload, current)
+        targets.append(target)
+
+    temps: dict[Path, Path] = {}
+    try:
+        for target, content in pending.items():
+            temps[target] = _write_temp(target, content)
+        originals = {target: target.read_bytes() if target.is_file() else None for target in pending}
+        replaced: list[Path] = []
+        try:
+            for target, tmp_path in temps.items():
+                os.replace(tmp_path, target)
+                replaced.append(target)
+        except OSError:
+            for target in replaced:
+                original = originals[target]
+                if original is None:
+                    target.unlink(missing_ok=True)
+                else:
+                    target.write_bytes(original)
+            raise
+    finally:
+        for tmp_path in temps.values():
+            tmp_path.unlink(missing_ok=True)
+
+    return [
+        {"file_path": payload.get("file_path"), "bytes_written": len(pending[target])}
+        for payload, target in zip(payloads, targets)
+    ]
+
+
+__all__ = [
+    "apply_edits",
+    "apply_line_ranges",
+    "apply_unified_diff",
+    "render_edit",
+    "resolve_edit_target",
+]
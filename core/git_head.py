@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+# Bounds symbolic-ref chains (HEAD -> refs/heads/x -> ...) to avoid loops in corrupt repos.
+MAX_SYMREF_DEPTH = 5
+
+_Signature = tuple[tuple[int, int, int] | None, ...]
+
+
+def _stat_signature(paths: tuple[Path, ...]) -> _Signature:
+    signature: list[tuple[int, int, int] | None] = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(signature)
+
+
+def _find_git_dir(repo_root: str) -> Path | None:
+    current = Path(repo_root).resolve()
+    for candidate in (current, *current.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # Worktrees and submodules point at their real git dir with a "gitdir: <path>" file.
+            try:
+                content = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir:"):
+                return None
+            target = Path(content[len("gitdir:") :].strip())
+            return target if target.is_absolute() else (candidate / target).resolve()
+    return None
+
+
+def _common_dir(git_dir: Path) -> Path:
+    commondir_file = git_dir / "commondir"
+    try:
+        content = commondir_file.read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    target = Path(content)
+    return target if target.is_absolute() else (git_dir / target).resolve()
+
+
+def _read_packed_ref(common_dir: Path, ref_name: str) -> str | None:
+    try:
+        lines = (common_dir / "packed-refs").read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        if not line or line.startswith(("#", "^")):
+            continue
+        sha, _, name = line.partition(" ")
+        if name.strip() == ref_name:
+            return sha.strip()
+    return None
+
+
+class GitHeadResolver:
+    """Resolve a repository's HEAD commit by reading ``.git`` files instead of spawning git.
+
+    Results are cached per ``repo_root`` together with a stat signature (mtime, size, inode) of every
+    file consulted: HEAD, the loose ref files, and ``packed-refs``. A cached value is returned as long
+    as that signature is unchanged, so a steady-state lookup costs a handful of ``stat`` calls.
+    Repositories using the reftable backend fall back to ``git rev-parse HEAD``.
+    """
+
+    def __init__(self) -> None:
+        self._cache: dict[str, tuple[tuple[Path, ...], _Signature, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, repo_root: str) -> str | None:
+        with self._lock:
+            cached = self._cache.get(repo_root)
+        if cached is not None:
+            paths, signature, head = cached
+            if _stat_signature(paths) == signature:
+                return head
+
+        git_dir = _find_git_dir(repo_root)
+        if git_dir is None:
+            return None
+        common_dir = _common_dir(git_dir)
+        if (common_dir / "reftable").is_dir():
+            return self._rev_parse(repo_root)
+
+        paths: list[Path] = [git_dir / "HEAD", common_dir / "packed-refs"]
+        signature_before = _stat_signature(tuple(paths))
+        head = self._resolve_from_files(git_dir, common_dir, paths)
+        tracked = tuple(paths)
+        signature = _stat_signature(tracked)
+        if signature[:2] != signature_before:
+            # A ref moved while we were reading; do not cache a possibly torn result.
+            return head
+        with self._lock:
+            self._cache[repo_root] = (tracked, signature, head)
+        return head
+
+    def invalidate(self, repo_root: str | None = None) -> None:
+        with self._lock:
+            if repo_root is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(repo_root, None)
+
+    def _resolve_from_files(self, git_dir: Path, common_dir: Path, paths: list[Path]) -> str | None:
+        try:
+            value = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        for _ in range(MAX_SYMREF_DEPTH):
+            if not value.startswith("ref:"):
+                return value or None
+            ref_name = value[len("ref:") :].strip()
+            next_value: str | None = None
+            for base in dict.fromkeys((git_dir, common_dir)):
+                loose = base / ref_name
+                paths.append(loose)
+                try:
+                    next_value = loose.read_text(encoding="utf-8").strip()
+                    break
+                except OSError:
+                    continue
+            if next_value is None:
+                next_value = _read_packed_ref(common_dir, ref_name)
+            if next_value is None:
+                return None
+            value = next_value
+        return None
+
+    def _rev_parse(self, repo_root: str) -> str | None:
+        try:
+            out = subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=repo_root,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError:
+            return None
+        if out.returncode != 0:
+            return None
+        return out.stdout.strip() or None
+
+
+_default_resolver = GitHeadResolver()
+
+
+def resolve_git_head(repo_root: str) -> str | None:
+    """Resolve HEAD for ``repo_root`` using the process-wide cached resolver."""
+
+    return _default_resolver.resolve(os.fspath(repo_root))
+
+
+__all__ = ["GitHeadResolver", "resolve_git_head"]
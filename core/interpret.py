@@ -1,158 +1,743 @@
 from __future__ import annotations
 
+import asyncio
+import os
 import shlex
 import subprocess
+import threading
 import time
 import uuid
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol
 
-from schemas.core import Event, Instruction, Program, State
+from core.capture import CHUNK_SIZE, RUN_CAPTURE_MAX_BYTES, BoundedCapture
+from core.edits import apply_edits
+from core.git_head import resolve_git_head
+from core.resources import kill_session, wait_for_exit
+from core.run_cache import RunResultCache
+from core.sharding import DurationStore, resolve_shard_count, run_sharded
+from core.warm_pool import WarmRunnerPool
+from schemas.core import Event, ExecutionPolicy, Instruction, Program, State
 
 RUN_TIMEOUT_SECONDS = 30
+# Upper bound on concurrently running commands within a single parallel group.
+RUN_MAX_WORKERS = 4
+# StreamReader buffer limit for async RUN pipes (asyncio's own default).
+ASYNC_STREAM_LIMIT = 2**16
 
 
-def _run_command_safe(command: str, cwd: str, timeout: float = RUN_TIMEOUT_SECONDS) -> dict[str, object]:
-    """
-    Execute a RUN command safely by splitting into argv, disabling shell execution,
-    and enforcing a timeout. Returns stdout/stderr/exit_code with timing metadata.
-    """
-
+def _split_command(command: str) -> list[str]:
     if not isinstance(command, str) or not command.strip():
         raise ValueError("RUN instruction requires non-empty command")
 
     cmd_parts = shlex.split(command)
     if not cmd_parts:
         raise ValueError("RUN instruction requires non-empty command")
+    return cmd_parts
+
+
+def _run_command_safe(
+    command: str,
+    cwd: str,
+    timeout: float = RUN_TIMEOUT_SECONDS,
+    max_output_bytes: int = RUN_CAPTURE_MAX_BYTES,
+    env: dict[str, str] | None = None,
+    cancel: threading.Event | None = None,
+) -> dict[str, object]:
+    """
+    Execute a RUN command safely by splitting into argv, disabling shell execution,
+    and enforcing a timeout. stdout/stderr are streamed through pipes into bounded
+    head+tail buffers of ``max_output_bytes`` each, so memory use does not grow with
+    the amount of output. Returns stdout/stderr/exit_code, the number of bytes dropped
+    from each stream, the child's resource usage (where the platform reports it), and
+    timing metadata. ``env`` entries are layered over the inherited environment. The
+    command runs in its own session so a timeout, or setting ``cancel``, kills every
+    process it started; once the command itself exits, whatever it left running in
+    that session is killed too, so background processes holding the pipes cannot
+    stretch the call past ``timeout``.
+    """
 
+    cmd_parts = _split_command(command)
+    stdout_capture = BoundedCapture(max_output_bytes)
+    stderr_capture = BoundedCapture(max_output_bytes)
     started_at = time.time()
+    deadline = time.monotonic() + timeout
+    proc = subprocess.Popen(
+        cmd_parts,
+        shell=False,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, **env} if env else None,
+        start_new_session=True,
+    )
+    readers = [
+        threading.Thread(target=stdout_capture.drain, args=(proc.stdout,), daemon=True),
+        threading.Thread(target=stderr_capture.drain, args=(proc.stderr,), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    exit_code, rusage, timed_out, cancelled = wait_for_exit(proc, timeout, cancel)
+    kill_session(proc.pid)
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+    if any(reader.is_alive() for reader in readers):
+        # A process that left the session (setsid) still holds a pipe; abandon its reader
+        # rather than closing the stream underneath it.
+        exit_code, timed_out = -1, not cancelled
+    else:
+        for stream in (proc.stdout, proc.stderr):
+            if stream is not None:
+                stream.close()
+    ended_at = time.time()
+
+    stderr = stderr_capture.text()
+    if timed_out:
+        stderr += "\n[timeout expired]"
+    if cancelled:
+        stderr += "\n[cancelled]"
+    return {
+        "stdout": stdout_capture.text(),
+        "stderr": stderr,
+        "exit_code": exit_code,
+        "stdout_truncated_bytes": stdout_capture.truncated_bytes,
+        "stderr_truncated_bytes": stderr_capture.truncated_bytes,
+        "timed_out": timed_out,
+        "cancelled": cancelled,
+        "rusage": rusage,
+        "started_at": started_at,
+        "ended_at": ended_at,
+    }
+
+
+class _ExitSignalProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    """Stream protocol that also reports the moment the child exits.
+
+    ``asyncio.subprocess.Process.wait()`` only resolves once the pipes are closed too, so a
+    background grandchild holding them would otherwise hide the exit.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__(limit=ASYNC_STREAM_LIMIT, loop=loop)
+        self.exited = asyncio.Event()
+
+    def process_exited(self) -> None:
+        super().process_exited()
+        self.exited.set()
+
+
+async def _run_command_async(
+    command: str,
+    cwd: str,
+    timeout: float = RUN_TIMEOUT_SECONDS,
+    max_output_bytes: int = RUN_CAPTURE_MAX_BYTES,
+    cancel: asyncio.Event | None = None,
+) -> dict[str, object]:
+    """Asyncio counterpart of :func:`_run_command_safe` with identical result fields.
+
+    The event loop's child watcher reaps the process, so per-child resource usage is not available
+    here and ``rusage`` is always ``None``.
+    """
+
+    cmd_parts = _split_command(command)
+    stdout_capture = BoundedCapture(max_output_bytes)
+    stderr_capture = BoundedCapture(max_output_bytes)
+    started_at = time.time()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    transport, protocol = await loop.subprocess_exec(
+        lambda: _ExitSignalProtocol(loop),
+        *cmd_parts,
+        cwd=cwd,
+        stdin=None,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    proc = asyncio.subprocess.Process(transport, protocol, loop)
+
+    async def drain(stream: asyncio.StreamReader | None, capture: BoundedCapture) -> None:
+        if stream is None:
+            return
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            capture.write(chunk)
+
+    readers = asyncio.ensure_future(
+        asyncio.gather(drain(proc.stdout, stdout_capture), drain(proc.stderr, stderr_capture))
+    )
+    exit_task = asyncio.ensure_future(protocol.exited.wait())
+    cancel_task = asyncio.ensure_future(cancel.wait()) if cancel is not None else None
+    waiters = {exit_task} if cancel_task is None else {exit_task, cancel_task}
+    await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    timed_out = cancelled = False
+    if not exit_task.done():
+        cancelled = cancel_task is not None and cancel_task.done()
+        timed_out = not cancelled
+    if cancel_task is not None:
+        cancel_task.cancel()
+    # The child runs in its own session (pgid == pid): kill whatever is left in it, including
+    # background processes still holding the pipes after the leader exited.
+    kill_session(proc.pid)
+    await exit_task
+    exit_code = -1 if timed_out or cancelled else int(proc.returncode)  # type: ignore[arg-type]
     try:
-        proc = subprocess.run(
-            cmd_parts,
-            shell=False,
-            cwd=cwd,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=timeout,
-        )
-        ended_at = time.time()
-        return {
-            "stdout": proc.stdout,
-            "stderr": proc.stderr,
-            "exit_code": proc.returncode,
-            "started_at": started_at,
-            "ended_at": ended_at,
-        }
-    except subprocess.TimeoutExpired as exc:  # pragma: no cover - covered via behavior check
-        ended_at = time.time()
-        return {
-            "stdout": exc.stdout or "",
-            "stderr": (exc.stderr or "") + "\n[timeout expired]",
-            "exit_code": -1,
-            "started_at": started_at,
-            "ended_at": ended_at,
-        }
+        await asyncio.wait_for(asyncio.shield(readers), max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        # A process that left the session (setsid) still holds a pipe.
+        readers.cancel()
+        transport.close()
+        exit_code, timed_out = -1, not cancelled
+    ended_at = time.time()
+
+    stderr = stderr_capture.text()
+    if timed_out:
+        stderr += "\n[timeout expired]"
+    if cancelled:
+        stderr += "\n[cancelled]"
+    return {
+        "stdout": stdout_capture.text(),
+        "stderr": stderr,
+        "exit_code": exit_code,
+        "stdout_truncated_bytes": stdout_capture.truncated_bytes,
+        "stderr_truncated_bytes": stderr_capture.truncated_bytes,
+        "timed_out": timed_out,
+        "cancelled": cancelled,
+        "rusage": None,
+        "started_at": started_at,
+        "ended_at": ended_at,
+    }
 
 
 def _apply_edit(payload: dict[str, object], repo_root: str) -> dict[str, object]:
-    file_path = payload.get("file_path")
-    if not isinstance(file_path, str):
-        raise ValueError("EDIT instruction requires 'file_path' string in payload")
-    content = payload.get("content", "")
+    return apply_edits([payload], repo_root)[0]
+
+
+def _run_cmd(instruction: Instruction) -> str:
+    cmd = instruction.payload.get("cmd")
+    if not isinstance(cmd, str):
+        raise ValueError("RUN instruction requires 'cmd' string in payload")
+    return cmd
+
+
+def _batch_group(instruction: Instruction) -> tuple[str, str] | None:
+    key = {"RUN": "parallel_group", "EDIT": "edit_group"}.get(instruction.kind)
+    if key is None:
+        return None
+    group = instruction.payload.get(key)
+    if isinstance(group, str) and group:
+        return instruction.kind, group
+    return None
 
-    repo_root_path = Path(repo_root).resolve()
-    target_path = (repo_root_path / file_path).resolve()
+
+def _plan_batches(instructions: list[Instruction]) -> list[list[Instruction]]:
+    """Split instructions into execution batches in program order.
+
+    Consecutive RUN instructions sharing the same ``payload['parallel_group']`` form one batch and
+    may run concurrently; consecutive EDIT instructions sharing ``payload['edit_group']`` form one
+    batch that is applied atomically. Every other instruction is a batch of its own.
+    """
+
+    batches: list[list[Instruction]] = []
+    for instruction in instructions:
+        group = _batch_group(instruction)
+        if group is not None and batches and _batch_group(batches[-1][0]) == group:
+            batches[-1].append(instruction)
+        else:
+            batches.append([instruction])
+    return batches
+
+
+def _run_event(state: State, cmd: str, result: dict[str, object], job_id: str, step_id: int) -> Event:
+    event = Event(
+        event_id=str(uuid.uuid4()),
+        job_id=job_id,
+        step_id=step_id,
+        type="RUN",
+        payload={
+            "cmd": cmd,
+            "stdout": result["stdout"],
+            "stderr": result["stderr"],
+            "exit_code": result["exit_code"],
+            "stdout_truncated_bytes": result.get("stdout_truncated_bytes", 0),
+            "stderr_truncated_bytes": result.get("stderr_truncated_bytes", 0),
+        },
+        started_at=result["started_at"],
+        ended_at=result["ended_at"],
+    )
+    if result.get("rusage"):
+        event.payload["rusage"] = result["rusage"]
+    if result.get("cached"):
+        event.payload["cached"] = True
+    if result.get("warm"):
+        event.payload["warm"] = True
+    if result.get("shards"):
+        event.payload["shards"] = result["shards"]
+    if result.get("cancelled"):
+        # A cancelled command is collateral of an earlier failure, which keeps last_error.
+        event.payload["cancelled"] = True
+    elif result["exit_code"] != 0:
+        state.diagnostics.last_error = f"RUN failed (exit_code={result['exit_code']}): {cmd}"
+    return event
+
+
+@dataclass
+class _RunOptions:
+    """Per-call RUN/EDIT execution settings shared by the sync and async interpreters."""
+
+    repo_root: str
+    capture_max_bytes: int = RUN_CAPTURE_MAX_BYTES
+    run_cache: RunResultCache | None = None
+    warm_pool: WarmRunnerPool | None = None
+    duration_store: DurationStore | None = None
+
+    def note_edit(self, file_path: str) -> None:
+        if self.run_cache is not None:
+            self.run_cache.note_edit(self.repo_root, file_path)
+        if self.warm_pool is not None:
+            self.warm_pool.notify_edit(self.repo_root, file_path)
+
+    def cache_key(self, instruction: Instruction, cmd: str) -> str | None:
+        if self.run_cache is None or instruction.payload.get("cache") is False:
+            return None
+        return self.run_cache.key(cmd, self.repo_root)
+
+    def cached_result(self, key: str | None) -> dict[str, object] | None:
+        if self.run_cache is None or key is None:
+            return None
+        cached = self.run_cache.get(key)
+        if cached is None:
+            return None
+        now = time.time()
+        return {**cached, "cached": True, "started_at": now, "ended_at": now}
+
+    def store_result(self, key: str | None, result: dict[str, object]) -> None:
+        if self.run_cache is not None and key is not None:
+            self.run_cache.put(key, result)
+
+    def warm_run(self, cmd: str, cancel: threading.Event | None = None) -> dict[str, object] | None:
+        if self.warm_pool is None or not self.warm_pool.matches(cmd):
+            return None
+        return self.warm_pool.run(cmd, self.repo_root, RUN_TIMEOUT_SECONDS, self.capture_max_bytes, cancel)
+
+    def sharded_run(
+        self, instruction: Instruction, cmd: str, cancel: threading.Event | None = None
+    ) -> dict[str, object] | None:
+        shards = instruction.payload.get("shards")
+        if shards is None:
+            return None
+        return run_sharded(
+            cmd,
+            self.repo_root,
+            resolve_shard_count(shards),
+            self._run_with_env,
+            duration_store=self.duration_store,
+            max_output_bytes=self.capture_max_bytes,
+            cancel=cancel,
+        )
+
+    def _run_with_env(
+        self, command: str, env: dict[str, str], cancel: threading.Event | None = None
+    ) -> dict[str, object]:
+        return _run_command_safe(
+            command, self.repo_root, max_output_bytes=self.capture_max_bytes, env=env, cancel=cancel
+        )
+
+
+def _cancelled_result() -> dict[str, object]:
+    now = time.time()
+    return {
+        "stdout": "",
+        "stderr": "[cancelled]",
+        "exit_code": -1,
+        "timed_out": False,
+        "cancelled": True,
+        "started_at": now,
+        "ended_at": now,
+    }
+
+
+def _execute_run(
+    instruction: Instruction,
+    cmd: str,
+    options: _RunOptions,
+    cancel: threading.Event | None = None,
+) -> dict[str, object]:
+    if cancel is not None and cancel.is_set():
+        return _cancelled_result()
+    key = options.cache_key(instruction, cmd)
+    cached = options.cached_result(key)
+    if cached is not None:
+        return cached
+    result = options.sharded_run(instruction, cmd, cancel)
+    if result is None:
+        result = options.warm_run(cmd, cancel)
+    if result is None and cancel is not None and cancel.is_set():
+        result = _cancelled_result()
+    if result is None:
+        result = _run_command_safe(
+            cmd, options.repo_root, max_output_bytes=options.capture_max_bytes, cancel=cancel
+        )
+    options.store_result(key, result)
+    return result
+
+
+async def _to_thread_with_cancel(
+    func: Callable[..., dict[str, object] | None], cancel: asyncio.Event | None, *args: Any
+) -> dict[str, object] | None:
+    """Run blocking ``func(*args, cancel)`` in a worker thread, mirroring ``cancel`` into a ``threading.Event``."""
+
+    if cancel is None:
+        return await asyncio.to_thread(func, *args, None)
+    forwarded = threading.Event()
+    watcher = asyncio.ensure_future(cancel.wait())
+    watcher.add_done_callback(lambda _: forwarded.set())
     try:
-        target_path.relative_to(repo_root_path)
-    except ValueError as exc:  # pragma: no cover - exercised in security test
-        raise ValueError("EDIT path escapes repo_root") from exc
+        return await asyncio.to_thread(func, *args, forwarded)
+    finally:
+        watcher.cancel()
 
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-    content_str = str(content)
-    target_path.write_text(content_str, encoding="utf-8")
-    return {"file_path": file_path, "bytes_written": len(content_str)}
 
+async def _execute_run_async(
+    instruction: Instruction,
+    cmd: str,
+    options: _RunOptions,
+    cancel: asyncio.Event | None = None,
+) -> dict[str, object]:
+    if cancel is not None and cancel.is_set():
+        return _cancelled_result()
+    # The cache key resolves git HEAD and hashes edited files.
+    key = await asyncio.to_thread(options.cache_key, instruction, cmd)
+    cached = options.cached_result(key)
+    if cached is not None:
+        return cached
+    result = None
+    if instruction.payload.get("shards") is not None:
+        # Shards are driven by blocking subprocess waits, so keep them off the event loop.
+        result = await _to_thread_with_cancel(options.sharded_run, cancel, instruction, cmd)
+    if result is None and options.warm_pool is not None and options.warm_pool.matches(cmd):
+        # Dispatching to a worker blocks on its pipe, so keep it off the event loop.
+        result = await _to_thread_with_cancel(options.warm_run, cancel, cmd)
+    if result is None and cancel is not None and cancel.is_set():
+        result = _cancelled_result()
+    if result is None:
+        result = await _run_command_async(
+            cmd, options.repo_root, max_output_bytes=options.capture_max_bytes, cancel=cancel
+        )
+    options.store_result(key, result)
+    return result
+
+
+def _edit_events(
+    state: State,
+    batch: list[Instruction],
+    job_id: str,
+    step_id: int,
+    options: _RunOptions | None = None,
+) -> list[Event]:
+    """Apply a batch of EDIT instructions as one transaction and emit one event per instruction.
+
+    If any edit in the batch fails, none are written and every event carries the error.
+    """
+
+    payloads = [instruction.payload for instruction in batch]
+    started_at = time.time()
+    try:
+        event_payloads = apply_edits(payloads, state.repo_root)
+        if options is not None:
+            for edit_result in event_payloads:
+                options.note_edit(str(edit_result["file_path"]))
+    except Exception as exc:  # noqa: BLE001 - broad for error payload capture
+        state.diagnostics.last_error = str(exc)
+        event_payloads = [
+            {
+                "file_path": payload.get("file_path"),
+                "error": str(exc),
+            }
+            for payload in payloads
+        ]
+    ended_at = time.time()
 
-def interpret(state: State, program: Program, job_id: str, step_id: int) -> tuple[State, list[Event]]:
     events: list[Event] = []
-    current_step = step_id
-    for instruction in program.instructions:
-        if instruction.kind == "RUN":
-            cmd = instruction.payload.get("cmd")
-            if not isinstance(cmd, str):
-                raise ValueError("RUN instruction requires 'cmd' string in payload")
-            result = _run_command_safe(cmd, state.repo_root)
-            event = Event(
+    for offset, (payload, event_payload) in enumerate(zip(payloads, event_payloads)):
+        group = payload.get("edit_group")
+        if isinstance(group, str) and group:
+            event_payload["edit_group"] = group
+        events.append(
+            Event(
                 event_id=str(uuid.uuid4()),
                 job_id=job_id,
-                step_id=current_step,
-                type="RUN",
-                payload={
-                    "cmd": cmd,
-                    "stdout": result["stdout"],
-                    "stderr": result["stderr"],
-                    "exit_code": result["exit_code"],
-                },
-                started_at=result["started_at"],
-                ended_at=result["ended_at"],
-            )
-            if result["exit_code"] != 0:
-                state.diagnostics.last_error = (
-                    f"RUN failed (exit_code={result['exit_code']}): {cmd}"
-                )
-            events.append(event)
-        elif instruction.kind == "EDIT":
-            try:
-                edit_result = _apply_edit(instruction.payload, state.repo_root)
-                event_payload = edit_result
-            except Exception as exc:  # noqa: BLE001 - broad for error payload capture
-                state.diagnostics.last_error = str(exc)
-                event_payload = {
-                    "file_path": instruction.payload.get("file_path"),
-                    "error": str(exc),
-                }
-            event = Event(
-                event_id=str(uuid.uuid4()),
-                job_id=job_id,
-                step_id=current_step,
+                step_id=step_id + offset,
                 type="EDIT",
                 payload=event_payload,
-                started_at=time.time(),
-                ended_at=time.time(),
-            )
-            events.append(event)
-        elif instruction.kind == "META":
-            payload = instruction.payload
-            allowed_modes = {"OK", "DEGRADED_PARTIAL", "DOWN"}
-            memory_mode = payload.get("memory_mode")
-            if isinstance(memory_mode, str) and memory_mode in allowed_modes:
-                state.diagnostics.memory_mode = memory_mode
-            last_error = payload.get("last_error")
-            if isinstance(last_error, str):
-                state.diagnostics.last_error = last_error
-            event = Event(
-                event_id=str(uuid.uuid4()),
-                job_id=job_id,
-                step_id=current_step,
-                type="META",
-                payload=payload,
-                started_at=time.time(),
-                ended_at=time.time(),
+                started_at=started_at,
+                ended_at=ended_at,
             )
-            events.append(event)
-        current_step += 1
+        )
+    return events
+
+
+def _meta_event(state: State, instruction: Instruction, job_id: str, step_id: int) -> Event:
+    payload = instruction.payload
+    allowed_modes = {"OK", "DEGRADED_PARTIAL", "DOWN"}
+    memory_mode = payload.get("memory_mode")
+    if isinstance(memory_mode, str) and memory_mode in allowed_modes:
+        state.diagnostics.memory_mode = memory_mode
+    last_error = payload.get("last_error")
+    if isinstance(last_error, str):
+        state.diagnostics.last_error = last_error
+    return Event(
+        event_id=str(uuid.uuid4()),
+        job_id=job_id,
+        step_id=step_id,
+        type="META",
+        payload=payload,
+        started_at=time.time(),
+        ended_at=time.time(),
+    )
+
+
+def _may_move_head(program: Program) -> bool:
+    return any(instruction.kind in ("RUN", "EDIT") for instruction in program.instructions)
+
 
+def _refresh_git_head(state: State, program: Program) -> None:
+    """Update ``state.git_head`` when the program could have moved HEAD or it is still unknown."""
+
+    if state.git_head and not _may_move_head(program):
+        return
+    head = resolve_git_head(state.repo_root)
+    if head:
+        state.git_head = head
+
+
+def _stops_on_exit(policy: ExecutionPolicy, exit_code: object) -> bool:
+    if policy.mode == "fail_fast":
+        return exit_code != 0
+    if policy.mode == "stop_on_exit_codes":
+        return exit_code in policy.stop_on_exit_codes
+    return False
+
+
+def _signal_stop(
+    policy: ExecutionPolicy,
+    cancel: threading.Event | asyncio.Event | None,
+    result: dict[str, object],
+) -> None:
+    """Set ``cancel`` when a parallel-group member's result stops the program under ``policy``."""
+
+    if cancel is not None and not result.get("cancelled") and _stops_on_exit(policy, result["exit_code"]):
+        cancel.set()
+
+
+def _stop_reason(policy: ExecutionPolicy, events: list[Event]) -> str | None:
+    """Return why ``policy`` stops the program after ``events``, or ``None`` to keep going."""
+
+    for event in events:
+        if event.payload.get("cancelled"):
+            continue
+        if event.type == "RUN" and _stops_on_exit(policy, event.payload.get("exit_code")):
+            return f"{policy.mode}: RUN at step {event.step_id} exited with {event.payload['exit_code']}"
+        if event.type == "EDIT" and policy.mode == "fail_fast" and "error" in event.payload:
+            return f"fail_fast: EDIT at step {event.step_id} failed"
+    return None
+
+
+def _skipped_event(instruction: Instruction, reason: str, job_id: str, step_id: int) -> Event:
+    payload: dict[str, object] = {"status": "skipped", "kind": instruction.kind, "reason": reason}
+    for key in ("cmd", "file_path"):
+        if key in instruction.payload:
+            payload[key] = instruction.payload[key]
+    now = time.time()
+    return Event(
+        event_id=str(uuid.uuid4()),
+        job_id=job_id,
+        step_id=step_id,
+        type="SYSTEM",
+        payload=payload,
+        started_at=now,
+        ended_at=now,
+    )
+
+
+def interpret(
+    state: State,
+    program: Program,
+    job_id: str,
+    step_id: int,
+    *,
+    max_workers: int = RUN_MAX_WORKERS,
+    capture_max_bytes: int = RUN_CAPTURE_MAX_BYTES,
+    run_cache: RunResultCache | None = None,
+    warm_pool: WarmRunnerPool | None = None,
+    duration_store: DurationStore | None = None,
+) -> tuple[State, list[Event]]:
+    """Execute a Program against ``state`` and return the updated state plus emitted events.
+
+    RUN instructions that are adjacent in the program and carry the same ``parallel_group`` payload
+    key run concurrently on a pool of at most ``max_workers`` threads. Step ids are assigned in program
+    order and events are emitted in program order regardless of completion order. ``capture_max_bytes``
+    bounds the retained stdout/stderr of each command; RUN payloads report how many bytes were dropped.
+    When ``run_cache`` is given, RUN results are served from it where possible and flagged ``cached``.
+    When ``warm_pool`` is given, matching ``python -m`` commands run on its pre-warmed workers and are
+    flagged ``warm``; EDITs to modules those workers imported recycle them. A pytest RUN with a
+    ``shards`` payload is split into that many parallel subprocesses balanced by the per-test history
+    in ``duration_store``; its single event carries a ``shards`` summary.
+    EDIT payloads may carry full ``content``, a unified diff ``patch`` or line ``ranges``; adjacent
+    EDITs sharing an ``edit_group`` are applied all-or-nothing.
+    ``program.policy`` decides whether a failure stops the program: once it does, commands still
+    running in the same parallel group are killed (flagged ``cancelled``) and every remaining
+    instruction gets a SYSTEM event with ``status: skipped`` instead of running.
+    """
+
+    options = _RunOptions(state.repo_root, capture_max_bytes, run_cache, warm_pool, duration_store)
+    policy = program.policy
+    events: list[Event] = []
+    current_step = step_id
+    stop_reason: str | None = None
+    executor: ThreadPoolExecutor | None = None
     try:
-        out = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            cwd=state.repo_root,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if out.returncode == 0:
-            state.git_head = out.stdout.strip()
-    except Exception:
-        pass
+        for batch in _plan_batches(program.instructions):
+            if stop_reason is not None:
+                for instruction in batch:
+                    events.append(_skipped_event(instruction, stop_reason, job_id, current_step))
+                    current_step += 1
+                continue
+
+            batch_events: list[Event] = []
+            if batch[0].kind == "EDIT":
+                batch_events = _edit_events(state, batch, job_id, current_step, options)
+            elif len(batch) > 1:
+                cmds = [_run_cmd(instruction) for instruction in batch]
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+                cancel = threading.Event() if policy.mode != "continue" else None
+
+                def run_member(
+                    instruction: Instruction, cmd: str, cancel: threading.Event | None = cancel
+                ) -> dict[str, object]:
+                    result = _execute_run(instruction, cmd, options, cancel)
+                    _signal_stop(policy, cancel, result)
+                    return result
+
+                futures = [
+                    executor.submit(run_member, instruction, cmd) for instruction, cmd in zip(batch, cmds)
+                ]
+                for offset, (cmd, future) in enumerate(zip(cmds, futures)):
+                    result = future.result()
+                    batch_events.append(_run_event(state, cmd, result, job_id, current_step + offset))
+            elif batch[0].kind == "RUN":
+                cmd = _run_cmd(batch[0])
+                result = _execute_run(batch[0], cmd, options)
+                batch_events.append(_run_event(state, cmd, result, job_id, current_step))
+            elif batch[0].kind == "META":
+                batch_events.append(_meta_event(state, batch[0], job_id, current_step))
+            events.extend(batch_events)
+            current_step += len(batch)
+            stop_reason = _stop_reason(policy, batch_events)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    _refresh_git_head(state, program)
+    return state, events
+
+
+async def interpret_async(
+    state: State,
+    program: Program,
+    job_id: str,
+    step_id: int,
+    *,
+    max_workers: int = RUN_MAX_WORKERS,
+    capture_max_bytes: int = RUN_CAPTURE_MAX_BYTES,
+    run_cache: RunResultCache | None = None,
+    warm_pool: WarmRunnerPool | None = None,
+    duration_store: DurationStore | None = None,
+) -> tuple[State, list[Event]]:
+    """Asyncio variant of :func:`interpret` with the same event and state semantics.
+
+    RUN commands are spawned on the event loop (``loop.subprocess_exec``) so no thread is held per running
+    command; parallel groups are bounded by an ``asyncio.Semaphore`` of ``max_workers``. EDIT file
+    I/O, cache fingerprinting and the git HEAD refresh run in worker threads.
+    """
+
+    options = _RunOptions(state.repo_root, capture_max_bytes, run_cache, warm_pool, duration_store)
+    policy = program.policy
+    events: list[Event] = []
+    current_step = step_id
+    stop_reason: str | None = None
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def run_bounded(
+        instruction: Instruction, cmd: str, cancel: asyncio.Event | None
+    ) -> dict[str, object]:
+        async with semaphore:
+            result = await _execute_run_async(instruction, cmd, options, cancel)
+        _signal_stop(policy, cancel, result)
+        return result
+
+    for batch in _plan_batches(program.instructions):
+        if stop_reason is not None:
+            for instruction in batch:
+                events.append(_skipped_event(instruction, stop_reason, job_id, current_step))
+                current_step += 1
+            continue
+
+        batch_events: list[Event] = []
+        if batch[0].kind == "EDIT":
+            batch_events = await asyncio.to_thread(_edit_events, state, batch, job_id, current_step, options)
+        elif len(batch) > 1:
+            cmds = [_run_cmd(instruction) for instruction in batch]
+            cancel = asyncio.Event() if policy.mode != "continue" else None
+            results = await asyncio.gather(
+                *(run_bounded(instruction, cmd, cancel) for instruction, cmd in zip(batch, cmds))
+            )
+            for offset, (cmd, result) in enumerate(zip(cmds, results)):
+                batch_events.append(_run_event(state, cmd, result, job_id, current_step + offset))
+        elif batch[0].kind == "RUN":
+            cmd = _run_cmd(batch[0])
+            result = await _execute_run_async(batch[0], cmd, options)
+            batch_events.append(_run_event(state, cmd, result, job_id, current_step))
+        elif batch[0].kind == "META":
+            batch_events.append(_meta_event(state, batch[0], job_id, current_step))
+        events.extend(batch_events)
+        current_step += len(batch)
+        stop_reason = _stop_reason(policy, batch_events)
 
+    await asyncio.to_thread(_refresh_git_head, state, program)
     return state, events
+
+
+class Interpreter(Protocol):
+    """Executes Programs for DevAgent; :class:`LocalInterpreter` is the subprocess-backed default.
+
+    Implementations accept the keyword options of :func:`interpret` (``max_workers``, ``run_cache``,
+    ...) and may ignore those that do not apply to them.
+    """
+
+    def interpret(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]: ...
+
+    async def interpret_async(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]: ...
+
+
+class LocalInterpreter:
+    """Runs Programs against the local repository via :func:`interpret` / :func:`interpret_async`."""
+
+    def interpret(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]:
+        return interpret(state, program, job_id, step_id, **options)
+
+    async def interpret_async(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]:
+        return await interpret_async(state, program, job_id, step_id, **options)
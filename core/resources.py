@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+
+# How often a wait re-checks its cancellation token.
+CANCEL_POLL_SECONDS = 0.05
+
+
+def rusage_to_dict(usage: Any) -> dict[str, float | int]:
+    """Flatten a ``resource.struct_rusage`` into the RUN event ``rusage`` payload."""
+
+    max_rss = int(usage.ru_maxrss)
+    if sys.platform == "darwin":
+        # macOS reports bytes; Linux and the BSDs report kilobytes.
+        max_rss //= 1024
+    return {
+        "user_cpu_s": round(float(usage.ru_utime), 6),
+        "sys_cpu_s": round(float(usage.ru_stime), 6),
+        "max_rss_kb": max_rss,
+        "block_in": int(usage.ru_inblock),
+        "block_out": int(usage.ru_oublock),
+        "voluntary_ctx_switches": int(usage.ru_nvcsw),
+        "involuntary_ctx_switches": int(usage.ru_nivcsw),
+    }
+
+
+def kill_process_tree(proc: subprocess.Popen[bytes] | asyncio.subprocess.Process) -> None:
+    """SIGKILL ``proc`` and, if it leads its own process group, everything it spawned."""
+
+    try:
+        if hasattr(os, "killpg") and os.getpgid(proc.pid) == proc.pid:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_session(pid: int) -> None:
+    """SIGKILL every process left in the session led by ``pid`` (a child started with ``start_new_session``).
+
+    Unlike :func:`kill_process_tree` this needs no liveness check on the leader: its pid keeps naming
+    the process group after it has been reaped, for as long as any member is still running.
+    """
+
+    if not hasattr(os, "killpg"):
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _wait_plain(
+    proc: subprocess.Popen[bytes],
+    timeout: float,
+    cancel: threading.Event | None,
+) -> tuple[int, dict[str, float | int] | None, bool, bool]:
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        step = remaining if cancel is None else min(remaining, CANCEL_POLL_SECONDS)
+        try:
+            return proc.wait(timeout=max(0.0, step)), None, False, False
+        except subprocess.TimeoutExpired:
+            pass
+        timed_out = time.monotonic() >= deadline
+        cancelled = cancel is not None and cancel.is_set()
+        if timed_out or cancelled:
+            kill_process_tree(proc)
+            proc.wait()
+            return -1, None, timed_out and not cancelled, cancelled
+
+
+def wait_for_exit(
+    proc: subprocess.Popen[bytes],
+    timeout: float,
+    cancel: threading.Event | None = None,
+) -> tuple[int, dict[str, float | int] | None, bool, bool]:
+    """Wait for ``proc`` to exit, killing its process tree on timeout or once ``cancel`` is set.
+
+    Returns ``(exit_code, rusage, timed_out, cancelled)``. Where ``os.wait4`` is available the child
+    is reaped with it so its resource usage can be reported; elsewhere ``rusage`` is ``None``. A
+    timed-out or cancelled command reports exit code -1.
+    """
+
+    if not hasattr(os, "wait4"):
+        return _wait_plain(proc, timeout, cancel)
+
+    reaped: dict[str, Any] = {}
+
+    def reap() -> None:
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            return
+        reaped["exit_code"] = os.waitstatus_to_exitcode(status)
+        reaped["rusage"] = rusage_to_dict(usage)
+
+    waiter = threading.Thread(target=reap, daemon=True)
+    waiter.start()
+    deadline = time.monotonic() + timeout
+    timed_out = cancelled = False
+    while waiter.is_alive():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        if cancel is None:
+            waiter.join(remaining)
+            continue
+        waiter.join(min(remaining, CANCEL_POLL_SECONDS))
+        if waiter.is_alive() and cancel.is_set():
+            cancelled = True
+            break
+    if timed_out or cancelled:
+        kill_process_tree(proc)
+        waiter.join()
+    exit_code = int(reaped.get("exit_code", -1))
+    # Tell Popen the child is gone so it never tries to reap the pid again.
+    proc.returncode = exit_code
+    return (-1 if timed_out or cancelled else exit_code), reaped.get("rusage"), timed_out, cancelled
+
+
+__all__ = ["kill_process_tree", "kill_session", "rusage_to_dict", "wait_for_exit"]
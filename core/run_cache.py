@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from core.git_head import resolve_git_head
+
+# Default total budget for cached stdout/stderr text.
+RUN_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Result fields replayed on a cache hit.
+CACHED_FIELDS = ("stdout", "stderr", "exit_code", "stdout_truncated_bytes", "stderr_truncated_bytes")
+
+
+class RunResultCache:
+    """In-process, content-addressed cache of RUN results.
+
+    Entries are keyed on ``(cmd, cwd, fingerprint)`` where the worktree fingerprint combines the
+    current git HEAD with content hashes of every file EDIT instructions have touched under that
+    repo root (see :meth:`note_edit`). Changes made outside EDIT instructions, e.g. by a RUN that
+    rewrites files, are not observed, which is why the cache is opt-in and each RUN can opt out with
+    ``payload['cache'] = False``. Least recently used entries are evicted once the cached
+    stdout/stderr exceed ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = RUN_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[dict[str, Any], int]] = OrderedDict()
+        self._size = 0
+        self._edited: dict[str, set[str]] = {}
+        self._file_hashes: dict[Path, tuple[tuple[int, int], str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def note_edit(self, repo_root: str, file_path: str) -> None:
+        with self._lock:
+            self._edited.setdefault(repo_root, set()).add(file_path)
+
+    def fingerprint(self, repo_root: str) -> str:
+        digest = hashlib.sha256((resolve_git_head(repo_root) or "").encode())
+        with self._lock:
+            edited = sorted(self._edited.get(repo_root, ()))
+        root = Path(repo_root)
+        for file_path in edited:
+            digest.update(b"\0" + file_path.encode() + b"\0" + self._hash_file(root / file_path).encode())
+        return digest.hexdigest()
+
+    def key(self, cmd: str, cwd: str) -> str:
+        material = json.dumps([cmd, cwd, self.fingerprint(cwd)])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        if result.get("timed_out") or result.get("cancelled"):
+            return
+        stored = {field: result.get(field) for field in CACHED_FIELDS}
+        size = len(str(stored["stdout"] or "")) + len(str(stored["stderr"] or ""))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (stored, size)
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def _hash_file(self, path: Path) -> str:
+        try:
+            st = path.stat()
+        except OSError:
+            return "missing"
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._file_hashes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return "unreadable"
+        with self._lock:
+            self._file_hashes[path] = (signature, digest)
+        return digest
+
+
+__all__ = ["RunResultCache", "RUN_CACHE_MAX_BYTES"]
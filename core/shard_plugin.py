@@ -0,0 +1,56 @@
+"""pytest plugin injected into sharded RUN commands by :mod:`core.sharding`.
+
+It is copied into a temporary directory that is put on ``PYTHONPATH`` and loaded with ``-p``, so
+it must not import anything from this repository. Behaviour is driven by environment variables
+naming JSON files:
+
+- ``DEVAGENT_SHARD_COLLECT``: after collection, write the collected node ids to this file.
+- ``DEVAGENT_SHARD_SELECT``: keep only the node ids listed in this file (others are deselected).
+- ``DEVAGENT_SHARD_REPORT``: at session end, write ``{node_id: seconds}`` covering setup, call and
+  teardown of every test that ran.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+COLLECT_ENV = "DEVAGENT_SHARD_COLLECT"
+SELECT_ENV = "DEVAGENT_SHARD_SELECT"
+REPORT_ENV = "DEVAGENT_SHARD_REPORT"
+
+_durations: dict[str, float] = {}
+
+
+def pytest_collection_modifyitems(session, config, items):  # type: ignore[no-untyped-def]
+    select_path = os.environ.get(SELECT_ENV)
+    if not select_path:
+        return
+    with open(select_path, encoding="utf-8") as handle:
+        wanted = set(json.load(handle))
+    selected = [item for item in items if item.nodeid in wanted]
+    deselected = [item for item in items if item.nodeid not in wanted]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+
+
+def pytest_collection_finish(session):  # type: ignore[no-untyped-def]
+    collect_path = os.environ.get(COLLECT_ENV)
+    if not collect_path:
+        return
+    with open(collect_path, "w", encoding="utf-8") as handle:
+        json.dump([item.nodeid for item in session.items], handle)
+
+
+def pytest_runtest_logreport(report):  # type: ignore[no-untyped-def]
+    if os.environ.get(REPORT_ENV):
+        _durations[report.nodeid] = _durations.get(report.nodeid, 0.0) + float(report.duration)
+
+
+def pytest_sessionfinish(session, exitstatus):  # type: ignore[no-untyped-def]
+    report_path = os.environ.get(REPORT_ENV)
+    if not report_path:
+        return
+    with open(report_path, "w", encoding="utf-8") as handle:
+        json.dump(_durations, handle)
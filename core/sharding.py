@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import shlex
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Protocol, Sequence
+
+from core.capture import RUN_CAPTURE_MAX_BYTES, BoundedCapture
+
+PLUGIN_SOURCE = Path(__file__).with_name("shard_plugin.py")
+PLUGIN_MODULE = "_devagent_shard_plugin"
+# Weight given to tests without recorded history when no other test has any either.
+DEFAULT_TEST_SECONDS = 1.0
+
+# Runs ``command`` in the RUN cwd with ``env`` layered over the inherited environment, killing it
+# once the event (if any) is set.
+RunCommand = Callable[[str, dict[str, str], threading.Event | None], dict[str, Any]]
+
+
+class DurationStore(Protocol):
+    """Persists per-test durations used to balance shards (implemented by ``MemoryStore``)."""
+
+    def node_durations(self, repo_root: str, node_ids: Sequence[str]) -> dict[str, float]: ...
+
+    def record_node_durations(self, repo_root: str, durations: dict[str, float]) -> None: ...
+
+
+def is_pytest_command(command: str) -> bool:
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return False
+    if not argv:
+        return False
+    if Path(argv[0]).name in ("pytest", "py.test"):
+        return True
+    return argv[1:3] == ["-m", "pytest"]
+
+
+def resolve_shard_count(value: object) -> int:
+    """Validate a RUN ``shards`` payload value; ``"auto"`` means one shard per CPU."""
+
+    if value == "auto":
+        return max(1, os.cpu_count() or 1)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("RUN 'shards' must be a positive integer or 'auto'")
+    return value
+
+
+def balance_shards(
+    node_ids: Sequence[str],
+    durations: dict[str, float],
+    count: int,
+) -> list[tuple[list[str], float]]:
+    """Split ``node_ids`` into at most ``count`` shards with similar expected run time.
+
+    Longest-processing-time-first: tests are placed, slowest first, on the currently lightest shard.
+    Tests without history are weighted with the median recorded duration. Each shard keeps the
+    collection order of its tests and is returned with its expected duration; empty shards are
+    dropped.
+    """
+
+    known = [value for value in durations.values() if value > 0]
+    fallback = statistics.median(known) if known else DEFAULT_TEST_SECONDS
+    weights = [durations.get(node_id) or fallback for node_id in node_ids]
+    order = sorted(range(len(node_ids)), key=lambda index: (-weights[index], index))
+
+    heap = [(0.0, shard) for shard in range(max(1, count))]
+    assigned: list[list[int]] = [[] for _ in heap]
+    loads = [0.0 for _ in heap]
+    for index in order:
+        load, shard = heapq.heappop(heap)
+        assigned[shard].append(index)
+        loads[shard] = load + weights[index]
+        heapq.heappush(heap, (loads[shard], shard))
+    return [
+        ([node_ids[index] for index in sorted(indexes)], loads[shard])
+        for shard, indexes in enumerate(assigned)
+        if indexes
+    ]
+
+
+def _merge_rusage(usages: list[dict[str, Any]]) -> dict[str, Any] | None:
+    if not usages:
+        return None
+    merged: dict[str, Any] = {}
+    for usage in usages:
+        for key, value in usage.items():
+            if key == "max_rss_kb":
+                merged[key] = max(merged.get(key, 0), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    for key in ("user_cpu_s", "sys_cpu_s"):
+        if key in merged:
+            merged[key] = round(merged[key], 6)
+    return merged
+
+
+def _merge_stream(
+    shards: list[tuple[list[str], float]],
+    results: list[dict[str, Any]],
+    stream: str,
+    max_output_bytes: int,
+) -> tuple[str, int]:
+    capture = BoundedCapture(max_output_bytes)
+    dropped = 0
+    total = len(shards)
+    for number, ((node_ids, _), result) in enumerate(zip(shards, results), start=1):
+        text = str(result.get(stream) or "")
+        if stream == "stdout" or text:
+            capture.write(f"===== shard {number}/{total}: {len(node_ids)} tests =====\n".encode())
+        capture.write(text.encode("utf-8", errors="replace"))
+        if text and not text.endswith("\n"):
+            capture.write(b"\n")
+        dropped += int(result.get(f"{stream}_truncated_bytes") or 0)
+    return capture.text(), dropped + capture.truncated_bytes
+
+
+def merge_shard_results(
+    shards: list[tuple[list[str], float]],
+    results: list[dict[str, Any]],
+    max_output_bytes: int = RUN_CAPTURE_MAX_BYTES,
+) -> dict[str, Any]:
+    """Combine per-shard RUN results into one result with the usual RUN fields plus ``shards``.
+
+    Output is concatenated in shard order under a header per shard and re-bounded to
+    ``max_output_bytes``; the exit code is 0 only if every shard passed, otherwise the first
+    non-zero shard exit code.
+    """
+
+    stdout, stdout_dropped = _merge_stream(shards, results, "stdout", max_output_bytes)
+    stderr, stderr_dropped = _merge_stream(shards, results, "stderr", max_output_bytes)
+    exit_code = next((int(result["exit_code"]) for result in results if result["exit_code"] != 0), 0)
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "exit_code": exit_code,
+        "stdout_truncated_bytes": stdout_dropped,
+        "stderr_truncated_bytes": stderr_dropped,
+        "timed_out": any(result.get("timed_out") for result in results),
+        "cancelled": any(result.get("cancelled") for result in results),
+        "rusage": _merge_rusage([result["rusage"] for result in results if result.get("rusage")]),
+        "started_at": min(float(result["started_at"]) for result in results),
+        "ended_at": max(float(result["ended_at"]) for result in results),
+        "shards": [
+            {
+                "tests": len(node_ids),
+                "exit_code": result["exit_code"],
+                "wall_s": round(float(result["ended_at"]) - float(result["started_at"]), 3),
+                "expected_s": round(expected, 3),
+            }
+            for (node_ids, expected), result in zip(shards, results)
+        ],
+    }
+
+
+def _read_json(path: Path) -> Any:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def run_sharded(
+    command: str,
+    cwd: str,
+    shards: int,
+    run: RunCommand,
+    *,
+    duration_store: DurationStore | None = None,
+    max_output_bytes: int = RUN_CAPTURE_MAX_BYTES,
+    cancel: threading.Event | None = None,
+) -> dict[str, Any] | None:
+    """Run a pytest ``command`` as up to ``shards`` parallel subprocesses and merge the results.
+
+    Node ids are collected once with ``--collect-only``, balanced using ``duration_store`` history,
+    and each shard re-runs the unchanged command with a plugin that deselects every test outside
+    the shard. Measured durations are written back to ``duration_store`` afterwards. Returns
+    ``None`` when sharding does not apply (not pytest, collection failed, or fewer than two tests)
+    so the caller can run the command as-is. ``cancel`` is handed to every ``run`` call, so setting
+    it kills the collection or shard subprocesses; no shards start once it is set.
+    """
+
+    if shards < 2 or not is_pytest_command(command):
+        return None
+    started_at = time.time()
+    with tempfile.TemporaryDirectory(prefix="devagent-shards-") as tmpdir:
+        workdir = Path(tmpdir)
+        shutil.copyfile(PLUGIN_SOURCE, workdir / f"{PLUGIN_MODULE}.py")
+        pythonpath = os.pathsep.join(filter(None, [tmpdir, os.environ.get("PYTHONPATH")]))
+        base_env = {"PYTHONPATH": pythonpath}
+        plugin_command = shlex.join([*shlex.split(command), "-p", PLUGIN_MODULE])
+
+        collect_path = workdir / "collected.json"
+        collected = run(
+            f"{plugin_command} --collect-only",
+            {**base_env, "DEVAGENT_SHARD_COLLECT": str(collect_path)},
+            cancel,
+        )
+        node_ids = _read_json(collect_path) if collected["exit_code"] == 0 else None
+        if not isinstance(node_ids, list) or len(node_ids) < 2 or (cancel is not None and cancel.is_set()):
+            return None
+
+        history = duration_store.node_durations(cwd, node_ids) if duration_store is not None else {}
+        plan = balance_shards(node_ids, history, shards)
+
+        def run_shard(index: int) -> dict[str, Any]:
+            select_path = workdir / f"shard-{index}.json"
+            with open(select_path, "w", encoding="utf-8") as handle:
+                json.dump(plan[index][0], handle)
+            env = {
+                **base_env,
+                "DEVAGENT_SHARD_SELECT": str(select_path),
+                "DEVAGENT_SHARD_REPORT": str(workdir / f"report-{index}.json"),
+            }
+            return run(plugin_command, env, cancel)
+
+        with ThreadPoolExecutor(max_workers=len(plan)) as executor:
+            results = list(executor.map(run_shard, range(len(plan))))
+
+        measured: dict[str, float] = {}
+        for index in range(len(plan)):
+            report = _read_json(workdir / f"report-{index}.json")
+            if isinstance(report, dict):
+                measured.update({str(key): float(value) for key, value in report.items()})
+
+    if duration_store is not None and measured:
+        try:
+            duration_store.record_node_durations(cwd, measured)
+        except Exception:  # noqa: BLE001 - duration history is best-effort
+            pass
+    merged = merge_shard_results(plan, results, max_output_bytes)
+    merged["started_at"] = started_at
+    return merged
+
+
+__all__ = [
+    "DurationStore",
+    "balance_shards",
+    "is_pytest_command",
+    "merge_shard_results",
+    "resolve_shard_count",
+    "run_sharded",
+]
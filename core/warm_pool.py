@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import json
+import os
+import select
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Sequence
+
+from core.capture import RUN_CAPTURE_MAX_BYTES, BoundedCapture
+from core.resources import CANCEL_POLL_SECONDS
+
+WORKER_SCRIPT = Path(__file__).with_name("warm_worker.py")
+# Seconds allowed for a worker to import its preload modules and report ready.
+WORKER_STARTUP_TIMEOUT_SECONDS = 60.0
+# Extra seconds granted beyond a command's timeout before a worker is presumed wedged.
+WORKER_RESPONSE_GRACE_SECONDS = 5.0
+
+
+class _LineReader:
+    """Newline-delimited reads from a raw pipe fd.
+
+    Lines are split from our own byte buffer, so ``select`` is only consulted when no complete line
+    is buffered and can never miss data a buffered stream had already pulled in.
+    """
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.eof = False
+        self._buffer = b""
+
+    def readline(self, timeout: float) -> bytes | None:
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if self.eof or remaining <= 0:
+                return None
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(self.fd, 65536)
+            if not chunk:
+                self.eof = True
+                return None
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line
+
+
+def _kill_group(pid: int) -> None:
+    """Kill a forked child's session; fall back to the pid if it has not called ``setsid`` yet."""
+
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class _WarmWorker:
+    """One fork-server process (see ``core/warm_worker.py``) bound to a repo root."""
+
+    def __init__(self, repo_root: str, preload: Sequence[str], python: str) -> None:
+        self.proc = subprocess.Popen(
+            [python, str(WORKER_SCRIPT), json.dumps(list(preload))],
+            cwd=repo_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self._reader = _LineReader(self.proc.stdout.fileno())  # type: ignore[union-attr]
+        line = self._reader.readline(WORKER_STARTUP_TIMEOUT_SECONDS)
+        hello = json.loads(line) if line else {}
+        if not hello.get("ready"):
+            self.close()
+            raise RuntimeError("warm worker failed to start")
+        self.module_files: set[str] = set(hello.get("modules", []))
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def request(
+        self, payload: dict[str, object], timeout: float, cancel: threading.Event | None = None
+    ) -> dict[str, object] | None:
+        """Send one run request and wait up to ``timeout`` for its result.
+
+        Returns ``None`` if the worker does not answer in time or dies; the forked child's process
+        group is killed first so it cannot outlive the request. Once ``cancel`` is set the group is
+        killed and the worker's report is returned with ``cancelled`` set.
+        """
+
+        assert self.proc.stdin is not None
+        pending = memoryview(json.dumps(payload).encode() + b"\n")
+        try:
+            while pending:
+                pending = pending[self.proc.stdin.write(pending) :]
+        except OSError:
+            return None
+        started = self._reader.readline(WORKER_RESPONSE_GRACE_SECONDS)
+        if started is None:
+            return None
+        pid = int(json.loads(started)["pid"])
+        deadline = time.monotonic() + timeout
+        while not self._reader.eof:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            line = self._reader.readline(remaining if cancel is None else min(remaining, CANCEL_POLL_SECONDS))
+            if line is not None:
+                return json.loads(line)
+            if cancel is not None and cancel.is_set():
+                _kill_group(pid)
+                line = self._reader.readline(WORKER_RESPONSE_GRACE_SECONDS)
+                return {**json.loads(line), "cancelled": True} if line is not None else None
+        _kill_group(pid)
+        return None
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            if stream is not None:
+                stream.close()
+
+
+class WarmRunnerPool:
+    """Pool of pre-warmed Python fork servers per repo root for ``python -m <module>`` RUN commands.
+
+    Commands whose argv starts with one of ``prefixes`` (e.g. ``python -m pytest``) are executed by
+    forking a worker that already imported ``preload``, instead of starting a fresh interpreter.
+    Commands run under this pool's interpreter (``python``), not whatever ``python`` resolves to on
+    ``PATH``. Workers are recycled when an EDIT touches a file they have imported
+    (:meth:`notify_edit`). ``run`` returns ``None`` when no worker is available so callers can fall
+    back to a regular subprocess.
+    """
+
+    def __init__(
+        self,
+        prefixes: Sequence[str] = ("python -m pytest",),
+        preload: Sequence[str] = ("pytest",),
+        size: int = 2,
+        python: str | None = None,
+    ) -> None:
+        self.prefixes = [shlex.split(prefix) for prefix in prefixes if prefix.strip()]
+        self.preload = list(preload)
+        self.size = max(1, size)
+        self.python = python or sys.executable
+        self._idle: dict[str, list[_WarmWorker]] = {}
+        self._active: dict[str, int] = {}
+        self._module_files: dict[str, set[str]] = {}
+        self._generation: dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    def matches(self, command: str) -> bool:
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            return False
+        if len(argv) < 3 or argv[1] != "-m":
+            return False
+        return any(argv[: len(prefix)] == prefix for prefix in self.prefixes)
+
+    def run(
+        self,
+        command: str,
+        cwd: str,
+        timeout: float,
+        max_output_bytes: int = RUN_CAPTURE_MAX_BYTES,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, object] | None:
+        """Run ``command`` on a warm worker; ``None`` if no worker could serve it.
+
+        Setting ``cancel`` kills the command's process group, like ``_run_command_safe`` does.
+        """
+
+        argv = shlex.split(command)
+        worker, generation = self._checkout(cwd)
+        if worker is None:
+            return None
+
+        stdout_capture = BoundedCapture(max_output_bytes)
+        stderr_capture = BoundedCapture(max_output_bytes)
+        with tempfile.TemporaryDirectory(prefix="warm-run-") as tmpdir:
+            stdout_path = Path(tmpdir) / "stdout"
+            stderr_path = Path(tmpdir) / "stderr"
+            stdout_path.touch()
+            stderr_path.touch()
+            started_at = time.time()
+            response = worker.request(
+                {
+                    "module": argv[2],
+                    "args": argv[3:],
+                    "cwd": cwd,
+                    "timeout": timeout,
+                    "stdout_path": str(stdout_path),
+                    "stderr_path": str(stderr_path),
+                },
+                timeout + WORKER_RESPONSE_GRACE_SECONDS,
+                cancel,
+            )
+            ended_at = time.time()
+            healthy = response is not None
+            self._checkin(cwd, worker, generation, healthy=healthy)
+            if response is None:
+                return None
+            with open(stdout_path, "rb") as handle:
+                stdout_capture.drain(handle)
+            with open(stderr_path, "rb") as handle:
+                stderr_capture.drain(handle)
+
+        timed_out = bool(response.get("timed_out"))
+        cancelled = bool(response.get("cancelled"))
+        stderr = stderr_capture.text()
+        if timed_out:
+            stderr += "\n[timeout expired]"
+        if cancelled:
+            stderr += "\n[cancelled]"
+        return {
+            "stdout": stdout_capture.text(),
+            "stderr": stderr,
+            "exit_code": -1 if cancelled else int(response.get("exit_code", -1)),  # type: ignore[arg-type]
+            "stdout_truncated_bytes": stdout_capture.truncated_bytes,
+            "stderr_truncated_bytes": stderr_capture.truncated_bytes,
+            "timed_out": timed_out,
+            "cancelled": cancelled,
+            "rusage": response.get("rusage"),
+            "warm": True,
+            "started_at": started_at,
+            "ended_at": ended_at,
+        }
+
+    def notify_edit(self, repo_root: str, file_path: str) -> bool:
+        """Recycle ``repo_root``'s workers if ``file_path`` is a module they have imported."""
+
+        target = os.path.realpath(Path(repo_root) / file_path)
+        with self._cond:
+            if target not in self._module_files.get(repo_root, set()):
+                return False
+        self.recycle(repo_root)
+        return True
+
+    def recycle(self, repo_root: str) -> None:
+        with self._cond:
+            self._generation[repo_root] = self._generation.get(repo_root, 0) + 1
+            stale = self._idle.pop(repo_root, [])
+            self._module_files.pop(repo_root, None)
+        for worker in stale:
+            worker.close()
+
+    def close(self) -> None:
+        with self._cond:
+            roots = list(self._idle)
+        for repo_root in roots:
+            self.recycle(repo_root)
+
+    def _checkout(self, repo_root: str) -> tuple[_WarmWorker | None, int]:
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(repo_root, [])
+                while idle:
+                    worker = idle.pop()
+                    if worker.alive():
+                        self._active[repo_root] = self._active.get(repo_root, 0) + 1
+                        return worker, self._generation.get(repo_root, 0)
+                    worker.close()
+                if self._active.get(repo_root, 0) < self.size:
+                    self._active[repo_root] = self._active.get(repo_root, 0) + 1
+                    generation = self._generation.get(repo_root, 0)
+                    break
+                self._cond.wait()
+        try:
+            worker = _WarmWorker(repo_root, self.preload, self.python)
+        except (OSError, RuntimeError, ValueError):
+            with self._cond:
+                self._active[repo_root] -= 1
+                self._cond.notify()
+            return None, generation
+        with self._cond:
+            self._module_files.setdefault(repo_root, set()).update(worker.module_files)
+        return worker, generation
+
+    def _checkin(self, repo_root: str, worker: _WarmWorker, generation: int, *, healthy: bool) -> None:
+        with self._cond:
+            self._active[repo_root] -= 1
+            keep = healthy and worker.alive() and self._generation.get(repo_root, 0) == generation
+            if keep:
+                self._idle.setdefault(repo_root, []).append(worker)
+            self._cond.notify()
+        if not keep:
+            worker.close()
+
+
+__all__ = ["WarmRunnerPool"]
@@ -0,0 +1,143 @@
+"""Fork-server process backing :class:`core.warm_pool.WarmRunnerPool`.
+
+Executed as a standalone script (``python core/warm_worker.py '<json list of modules>'``) so it does
+not import anything from this repository. It pre-imports the given modules once, then serves
+requests read as JSON lines from stdin: each request forks a child that runs
+``python -m <module> <args>`` in-process via :mod:`runpy` with stdout/stderr redirected to the
+requested files. The child leads its own session, and its pid (which is also its process group id)
+is written back as ``{"pid": ...}`` right after the fork so the pool can kill the group itself. The
+child is reaped with ``os.wait4`` and a second JSON line with the exit code, resource usage and
+timeout flag is written back. Forking per request keeps runs isolated from each other
+while skipping interpreter start-up and the framework's import time.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import runpy
+import signal
+import sys
+import time
+
+POLL_INTERVAL_SECONDS = 0.01
+
+
+def _rusage_to_dict(usage) -> dict:  # type: ignore[no-untyped-def]
+    max_rss = int(usage.ru_maxrss)
+    if sys.platform == "darwin":
+        max_rss //= 1024
+    return {
+        "user_cpu_s": round(float(usage.ru_utime), 6),
+        "sys_cpu_s": round(float(usage.ru_stime), 6),
+        "max_rss_kb": max_rss,
+        "block_in": int(usage.ru_inblock),
+        "block_out": int(usage.ru_oublock),
+        "voluntary_ctx_switches": int(usage.ru_nvcsw),
+        "involuntary_ctx_switches": int(usage.ru_nivcsw),
+    }
+
+
+def _run_child(request: dict) -> None:
+    os.setsid()
+    os.chdir(request["cwd"])
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    stdout_fd = os.open(request["stdout_path"], os.O_WRONLY | os.O_TRUNC)
+    stderr_fd = os.open(request["stderr_path"], os.O_WRONLY | os.O_TRUNC)
+    os.dup2(devnull, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    module, args = request["module"], request["args"]
+    sys.argv = [module, *args]
+    sys.path[0] = request["cwd"]
+    code = 0
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as exc:
+        if exc.code is None:
+            code = 0
+        elif isinstance(exc.code, int):
+            code = exc.code
+        else:
+            print(exc.code, file=sys.stderr)
+            code = 1
+    except BaseException:  # noqa: BLE001 - mirror the interpreter's uncaught-exception exit
+        import traceback
+
+        traceback.print_exc()
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:  # noqa: BLE001
+                pass
+    os._exit(code)
+
+
+def _serve(request: dict, proto_out) -> None:  # type: ignore[no-untyped-def]
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        proto_out.close()
+        _run_child(request)
+    proto_out.write(json.dumps({"pid": pid}) + "\n")
+    proto_out.flush()
+    deadline = time.monotonic() + float(request["timeout"])
+    timed_out = False
+    while True:
+        waited, status, usage = os.wait4(pid, os.WNOHANG)
+        if waited:
+            break
+        if time.monotonic() >= deadline:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status, usage = os.wait4(pid, 0)
+            break
+        time.sleep(POLL_INTERVAL_SECONDS)
+    response = {
+        "exit_code": -1 if timed_out else os.waitstatus_to_exitcode(status),
+        "rusage": _rusage_to_dict(usage),
+        "timed_out": timed_out,
+    }
+    proto_out.write(json.dumps(response) + "\n")
+    proto_out.flush()
+
+
+def main() -> None:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [entry for entry in sys.path if os.path.abspath(entry or ".") != script_dir]
+    # Mirror ``python -m``: the working directory (the repo root) leads sys.path.
+    sys.path.insert(0, os.getcwd())
+
+    # Keep the protocol on private fds so stray output from preloaded modules cannot corrupt it.
+    proto_in = os.fdopen(os.dup(0), "r")
+    proto_out = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+
+    preload = json.loads(sys.argv[1]) if len(sys.argv) > 1 else []
+    for module in preload:
+        __import__(module)
+    module_files = sorted(
+        {
+            os.path.realpath(path)
+            for path in (getattr(mod, "__file__", None) for mod in list(sys.modules.values()))
+            if isinstance(path, str)
+        }
+    )
+    proto_out.write(json.dumps({"ready": True, "modules": module_files}) + "\n")
+    proto_out.flush()
+
+    for line in proto_in:
+        line = line.strip()
+        if not line:
+            continue
+        _serve(json.loads(line), proto_out)
+
+
+if __name__ == "__main__":
+    main()
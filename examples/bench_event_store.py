@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+import uuid
+
+from sqlmodel import Session
+
+from schemas.core import Event
+from store.event_log import SegmentedEventStore
+from store.blobs import EventBlobRow, extract_blobs
+from store.event_store import EventRow, EventStore, JobAggregateRow, promoted_fields
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def make_events(count: int, job_id: str) -> list[Event]:
+    """Build RUN-shaped events with a realistic payload size."""
+
+    now = time.time()
+    return [
+        Event(
+            event_id=str(uuid.uuid4()),
+            job_id=job_id,
+            step_id=index,
+            type="RUN",
+            payload={
+                "cmd": "python -m pytest -q",
+                "stdout": "." * 200 + f"\n{index} passed\n",
+                "stderr": "",
+                "exit_code": 0,
+                "stdout_truncated_bytes": 0,
+                "stderr_truncated_bytes": 0,
+            },
+            started_at=now,
+            ended_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def orm_append(store: EventStore, events: list[Event]) -> None:
+    """The previous append path, doing the same work as ``EventStore.append`` one ORM object at a time.
+
+    Each event is stored with stdlib json, its large fields are moved to blobs, its promoted columns
+    are set and its job's aggregate row is updated, all in one session and one commit.
+    """
+
+    with Session(store.engine) as session:
+        for event in events:
+            payload, blobs = extract_blobs(event.payload, store.blob_min_bytes, store.blob_compression)
+            for blob in blobs:
+                row = session.get(EventBlobRow, blob["digest"])
+                if row is None:
+                    session.add(EventBlobRow(**blob, refs=1))
+                else:
+                    row.refs = (row.refs or 0) + 1
+            exit_code, cmd = promoted_fields(event, payload)
+            session.add(
+                EventRow(
+                    job_id=event.job_id,
+                    step_id=event.step_id,
+                    event_id=event.event_id,
+                    type=event.type,
+                    payload_json=json.dumps(payload),
+                    started_at=event.started_at,
+                    ended_at=event.ended_at,
+                    exit_code=exit_code,
+                    cmd=cmd,
+                )
+            )
+            aggregate = session.get(JobAggregateRow, event.job_id)
+            if aggregate is None:
+                aggregate = JobAggregateRow(job_id=event.job_id)
+                session.add(aggregate)
+            aggregate.events += 1
+            aggregate.last_step_id = max(aggregate.last_step_id or 0, event.step_id)
+            aggregate.last_event_at = max(aggregate.last_event_at or 0.0, event.ended_at)
+            if event.type == "EDIT":
+                aggregate.edits += 1
+            elif event.type == "RUN":
+                failed = exit_code is not None and exit_code != 0
+                aggregate.runs += 1
+                aggregate.failures += int(failed)
+                if aggregate.last_run_step_id is None or event.step_id >= aggregate.last_run_step_id:
+                    aggregate.last_run_step_id = event.step_id
+                    aggregate.last_status = "failed" if failed else "ok"
+        session.commit()
+
+
+def measure(append, store: EventStore | SegmentedEventStore, batch_size: int, total: int) -> float:  # type: ignore[no-untyped-def]
+    """Return events/sec for appending ``total`` events in batches of ``batch_size``."""
+
+    batches = [make_events(batch_size, job_id=f"job-{index}") for index in range(max(1, total // batch_size))]
+    started = time.perf_counter()
+    for batch in batches:
+        append(store, batch)
+    elapsed = time.perf_counter() - started
+    return sum(len(batch) for batch in batches) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare event append throughput: ORM rows, bulk insert and the segmented log.")
+    parser.add_argument("--total", type=int, default=20_000, help="Events appended per batch size and path")
+    args = parser.parse_args()
+
+    paths = {"orm": orm_append, "bulk": EventStore.append, "segmented": SegmentedEventStore.append}
+    print(f"{'batch':>8} {'orm ev/s':>12} {'bulk ev/s':>12} {'speedup':>8} {'segment ev/s':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory(prefix="devagent_bench_") as tmp:
+        for batch_size in BATCH_SIZES:
+            # Single-event batches pay a commit each; cap them so the run stays short.
+            total = min(args.total, 2_000) if batch_size == 1 else max(args.total, batch_size)
+            rates = {}
+            for name, append in paths.items():
+                if name == "segmented":
+                    store = SegmentedEventStore(str(Path(tmp) / f"{name}-{batch_size}"))
+                else:
+                    store = EventStore(db_path=str(Path(tmp) / f"{name}-{batch_size}.db"))
+                rates[name] = measure(append, store, batch_size, total)
+            print(
+                f"{batch_size:>8} {rates['orm']:>12,.0f} {rates['bulk']:>12,.0f} "
+                f"{rates['bulk'] / rates['orm']:>7.1f}x {rates['segmented']:>13,.0f} "
+                f"{rates['segmented'] / rates['orm']:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
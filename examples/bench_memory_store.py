@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+from memory.store import MemoryStore
+from schemas.memory import MemoryItem
+
+BATCH_SIZES = (1, 100, 10_000)
+
+
+def make_items(count: int, prefix: str) -> list[MemoryItem]:
+    """Build items shaped like the ones MemoryIngestPipeline derives from RUN events."""
+
+    now = time.time()
+    return [
+        MemoryItem(
+            id=f"{prefix}-{index}",
+            kind="error_pattern" if index % 5 == 0 else "run_config",  # type: ignore[arg-type]
+            pointer={"event_id": f"{prefix}-{index}", "job_id": "bench"},
+            snippet=f"RUN failed with exit_code=1, stderr=assert {index} == 0",
+            dimensions={"kind": "run", "exit_code": index % 5 == 0, "job_id": f"job-{index % 20}"},
+            stats={"created_at": now, "access_count": 0},
+        )
+        for index in range(count)
+    ]
+
+
+def per_item(store: MemoryStore, items: list[MemoryItem]) -> None:
+    for item in items:
+        store.upsert_item(item)
+
+
+def measure(store: MemoryStore, items: list[MemoryItem], batch_size: int) -> float:
+    """Return items/sec for upserting ``items`` in batches of ``batch_size`` (1 = one call per item)."""
+
+    started = time.perf_counter()
+    if batch_size == 1:
+        per_item(store, items)
+    else:
+        for offset in range(0, len(items), batch_size):
+            store.upsert_items(items[offset : offset + batch_size])
+    return len(items) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare MemoryStore bulk-load throughput per batch size.")
+    parser.add_argument("--total", type=int, default=10_000, help="Items loaded per batch size")
+    args = parser.parse_args()
+
+    print(f"{'batch':>8} {'insert it/s':>12} {'update it/s':>12}")
+    with tempfile.TemporaryDirectory(prefix="devagent_bench_") as tmp:
+        for batch_size in BATCH_SIZES:
+            # One transaction per item is slow; cap it so the run stays short.
+            total = min(args.total, 2_000) if batch_size == 1 else args.total
+            store = MemoryStore(db_path=str(Path(tmp) / f"memory-{batch_size}.db"))
+            items = make_items(total, prefix=f"b{batch_size}")
+            inserted = measure(store, items, batch_size)
+            # Second pass hits ON CONFLICT for every id; flip kinds so counts move too.
+            updated_items = [
+                item.model_copy(update={"kind": "run_config" if item.kind == "error_pattern" else "error_pattern"})
+                for item in items
+            ]
+            updated = measure(store, updated_items, batch_size)
+            print(f"{batch_size:>8} {inserted:>12,.0f} {updated:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
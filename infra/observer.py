@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Iterable
+from typing import Any, Callable, Iterable, TypeVar
 
 from pydantic import BaseModel
 
@@ -12,6 +12,7 @@ from config.settings import settings
 from schemas.core import Event
 from store.event_store import EventStore
 from store.trace_ledger import TraceEntry, TraceLedger
+from infra.write_behind import WriteBehindWriter
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -25,19 +26,52 @@ class UnifiedObserver:
         event_store: EventStore | None = None,
         trace_ledger: TraceLedger | None = None,
         perceiver: Perceiver | None = None,
+        *,
+        write_behind: bool = False,
+        write_behind_max_pending: int | None = None,
+        write_behind_max_batch: int | None = None,
     ) -> None:
         self.event_store = event_store
         self.trace_ledger = trace_ledger
         self.perceiver = perceiver
+        # With write-behind, records are committed by a background thread; call flush() before
+        # reading them back from the stores and close() when done.
+        self.writer: WriteBehindWriter | None = None
+        if write_behind and (event_store is not None or trace_ledger is not None):
+            self.writer = WriteBehindWriter(
+                event_store,
+                trace_ledger,
+                max_pending=write_behind_max_pending or settings.observer_write_behind_max_pending,
+                max_batch=write_behind_max_batch or settings.observer_write_behind_max_batch,
+            )
 
     def record_events(self, events: Iterable[Event]) -> None:
-        if self.event_store is not None:
+        if self.event_store is None:
+            return
+        if self.writer is not None:
+            self.writer.put_events(events)
+        else:
             self.event_store.append(events)
 
     def record_trace(self, entry: TraceEntry) -> None:
-        if self.trace_ledger is not None:
+        if self.trace_ledger is None:
+            return
+        if self.writer is not None:
+            self.writer.put_trace(entry)
+        else:
             self.trace_ledger.append(entry)
 
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every recorded event and trace entry is committed; ``False`` on timeout."""
+
+        if self.writer is None:
+            return True
+        return self.writer.flush(timeout)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
     def perceive(self, payload: dict[str, Any]) -> dict[str, Any] | None:
         if self.perceiver is None:
             return None
@@ -53,3 +87,9 @@ class NullObserver:
 
     def perceive(self, payload: dict[str, Any]) -> None:  # noqa: ARG002
         return None
+
+    def flush(self, timeout: float | None = None) -> bool:  # noqa: ARG002
+        return True
+
+    def close(self) -> None:
+        return None
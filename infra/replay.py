@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from agent.devagent import DevAgent
+from config.settings import settings
+from infra.observer import UnifiedObserver
+from infra.timing import StageTimer, percentile
+from memory.store import MemoryStore
+from meta.controller import MetaController
+from meta.llm_meta_planner import LLMMetaPlanner
+from schemas.core import Event, Instruction, Program, State
+from schemas.views import AgentHints, DevAgentMode, GoalView
+from store.event_store import EventStore
+from store.trace_ledger import TraceEntry, TraceLedger
+
+# Recorded summary fields compared between the original and the replayed step.
+COMPARED_SUMMARIES = ("decision_input_summary", "program_summary")
+
+
+@dataclass
+class RecordedStep:
+    """One traced step of a recorded job: its trace entry and the events it emitted."""
+
+    trace: TraceEntry
+    start_step_id: int
+    events: list[Event]
+
+    def program(self) -> Program:
+        """A Program with one instruction per recorded event.
+
+        Skipped instructions are rebuilt from the ``kind`` their SYSTEM event records.
+        """
+
+        instructions: list[Instruction] = []
+        for event in self.events:
+            kind = event.payload.get("kind") if event.type == "SYSTEM" else event.type
+            if kind in ("RUN", "EDIT", "META"):
+                instructions.append(Instruction(kind=kind, payload=dict(event.payload)))
+        return Program(instructions=instructions)
+
+
+def load_recorded_steps(job_id: str, event_store: Any, trace_ledger: TraceLedger) -> list[RecordedStep]:
+    """Group a job's stored events under its trace entries in step order.
+
+    A step starts one past the last step id an earlier entry emitted and owns the following events
+    up to its own ``step_id``, capped at the ``event_count`` its trace recorded. A step that emitted
+    nothing records its start id as ``step_id``, so the cap keeps it from claiming the next step's
+    first event.
+    """
+
+    events = list(event_store.iter_job_events(job_id))
+    steps: list[RecordedStep] = []
+    last_step_id = 0
+    position = 0
+    for trace in trace_ledger.iter_job_traces(job_id):
+        expected = trace.outcome_summary.get("event_count")
+        owned: list[Event] = []
+        while (
+            position < len(events)
+            and events[position].step_id <= trace.step_id
+            and (expected is None or len(owned) < expected)
+        ):
+            owned.append(events[position])
+            position += 1
+        steps.append(RecordedStep(trace=trace, start_step_id=last_step_id + 1, events=owned))
+        if owned:
+            last_step_id = max(last_step_id, trace.step_id)
+    return steps
+
+
+class ReplayInterpreter:
+    """Interpreter that returns recorded events instead of running anything.
+
+    Each call consumes the next recorded step, so the replay is deterministic regardless of the
+    Program it is handed; events are re-stamped with the replay job id. Edits are not applied and
+    the state's ``git_head`` is set to the one recorded for the step.
+    """
+
+    def __init__(self, steps: list[RecordedStep]) -> None:
+        self._pending = deque(steps)
+
+    def interpret(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]:
+        if not self._pending:
+            raise RuntimeError("replay interpreter has no recorded steps left")
+        step = self._pending.popleft()
+        events = [event.model_copy(update={"job_id": job_id}) for event in step.events]
+        git_head = step.trace.outcome_summary.get("git_head")
+        if git_head is not None:
+            state.git_head = git_head
+        return state, events
+
+    async def interpret_async(
+        self, state: State, program: Program, job_id: str, step_id: int, **options: Any
+    ) -> tuple[State, list[Event]]:
+        return self.interpret(state, program, job_id, step_id, **options)
+
+
+class AllocationTimer(StageTimer):
+    """StageTimer that also records the peak bytes allocated inside each stage via ``tracemalloc``.
+
+    Stages must not nest: each stage resets the tracemalloc peak when it starts.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.allocations: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not tracemalloc.is_tracing():
+            with super().stage(name):
+                yield
+            return
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            with super().stage(name):
+                yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.allocations[name] = self.allocations.get(name, 0) + max(0, peak - baseline)
+
+
+@dataclass
+class ReplayStepReport:
+    step_id: int
+    timings: dict[str, float]
+    allocations: dict[str, int]
+    # Summary name -> (recorded, replayed) for every compared summary that differs.
+    divergence: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class ReplayReport:
+    job_id: str
+    steps: list[ReplayStepReport] = field(default_factory=list)
+
+    @property
+    def diverged_steps(self) -> list[int]:
+        return [step.step_id for step in self.steps if step.divergence]
+
+    def stage_summary(self) -> dict[str, dict[str, float]]:
+        """Per-stage nearest-rank p50/p95/p99 latency, total seconds and peak allocation over all steps."""
+
+        latencies: dict[str, list[float]] = {}
+        allocations: dict[str, int] = {}
+        for step in self.steps:
+            for stage, seconds in step.timings.items():
+                latencies.setdefault(stage, []).append(seconds)
+            for stage, size in step.allocations.items():
+                allocations[stage] = max(allocations.get(stage, 0), size)
+        summary: dict[str, dict[str, float]] = {}
+        for stage, values in latencies.items():
+            values.sort()
+            summary[stage] = {
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "total": round(sum(values), 6),
+                "max_alloc_bytes": allocations.get(stage, 0),
+            }
+        return summary
+
+
+def _mode(steps: list[RecordedStep]) -> DevAgentMode:
+    for step in steps:
+        recorded = step.trace.decision_input_summary.get("mode")
+        if recorded is not None:
+            return DevAgentMode(recorded)
+    return DevAgentMode.OPTIMIZED_STRUCTURED
+
+
+def replay_job(
+    job_id: str,
+    event_store: Any,
+    trace_ledger: TraceLedger,
+    workdir: str,
+    *,
+    goal: str = "",
+    repo_root: str | None = None,
+    trace_allocations: bool = True,
+) -> ReplayReport:
+    """Re-drive a recorded job through MetaController -> DevAgent -> memory/focus without subprocesses.
+
+    The replay writes to fresh stores under ``workdir`` so the original databases are only read.
+    Each step's recorded events are fed back through :class:`ReplayInterpreter`; the report carries
+    per-stage timings, per-stage allocation peaks (when ``trace_allocations``) and the summaries
+    whose replayed value differs from the recorded trace. Only those summaries are compared: the
+    trace ledger does not record the full DecisionInputView (memory items, stats, hints).
+    """
+
+    steps = load_recorded_steps(job_id, event_store, trace_ledger)
+    base = Path(workdir)
+    base.mkdir(parents=True, exist_ok=True)
+    replay_events = EventStore(db_path=str(base / "events.db"))
+    replay_traces = TraceLedger(db_path=str(base / "trace.db"))
+    memory_store = MemoryStore(db_path=str(base / "memory.db"))
+    observer = UnifiedObserver(event_store=replay_events, trace_ledger=replay_traces)
+    devagent = DevAgent(
+        mode=_mode(steps),
+        observer=observer,
+        memory_store=memory_store,
+        interpreter=ReplayInterpreter(steps),
+    )
+    controller = MetaController(
+        devagent=devagent,
+        planner=LLMMetaPlanner(),
+        memory_store=memory_store,
+        trace_ledger=replay_traces,
+        event_store=replay_events,
+    )
+
+    task_type = steps[0].trace.decision_input_summary.get("goal_task_type") if steps else None
+    goal_view = GoalView(task_type=task_type or "fix_failures", natural_language_goal=goal)
+    state = State(git_head="", repo_root=repo_root or str(base))
+    report = ReplayReport(job_id=job_id)
+    started_tracing = trace_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        for step in steps:
+            timer = AllocationTimer()
+            state, _, _ = controller.run_step(
+                job_id=job_id,
+                state=state,
+                program=step.program(),
+                goal_view=goal_view,
+                hints=AgentHints(),
+                start_step_id=step.start_step_id,
+                timer=timer,
+            )
+            replayed = replay_traces.recent_for_job(job_id, limit=1)[0]
+            divergence = {
+                name: (getattr(step.trace, name), getattr(replayed, name))
+                for name in COMPARED_SUMMARIES
+                if getattr(step.trace, name) != getattr(replayed, name)
+            }
+            report.steps.append(
+                ReplayStepReport(
+                    step_id=step.trace.step_id,
+                    timings=timer.as_dict(),
+                    allocations=dict(timer.allocations),
+                    divergence=divergence,
+                )
+            )
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        observer.close()
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a recorded DevAgent job and report per-stage cost.")
+    parser.add_argument("job_id")
+    parser.add_argument("--event-db", default=settings.event_db_path)
+    parser.add_argument("--trace-db", default=settings.trace_db_path)
+    parser.add_argument("--workdir", default=None, help="Directory for the replay's own stores (default: temporary)")
+    parser.add_argument("--goal", default="", help="Natural-language goal used for the replayed GoalView")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip tracemalloc allocation tracking")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report = replay_job(
+            args.job_id,
+            EventStore(db_path=args.event_db),
+            TraceLedger(db_path=args.trace_db),
+            args.workdir or tmpdir,
+            goal=args.goal,
+            trace_allocations=not args.no_alloc,
+        )
+    print(f"{report.job_id}: {len(report.steps)} steps replayed, {len(report.diverged_steps)} diverged")
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'total ms':>11}{'max alloc KiB':>15}")
+    for stage, row in report.stage_summary().items():
+        print(
+            f"{stage:<12}{row['p50'] * 1000:>10.3f}{row['p95'] * 1000:>10.3f}{row['p99'] * 1000:>10.3f}"
+            f"{row['total'] * 1000:>11.3f}{row['max_alloc_bytes'] / 1024:>15.1f}"
+        )
+    for step in report.steps:
+        for name, (recorded, replayed) in step.divergence.items():
+            print(f"step {step.step_id} diverged in {name}: recorded={recorded} replayed={replayed}")
+
+
+__all__ = [
+    "AllocationTimer",
+    "RecordedStep",
+    "ReplayInterpreter",
+    "ReplayReport",
+    "ReplayStepReport",
+    "load_recorded_steps",
+    "replay_job",
+]
+
+
+if __name__ == "__main__":
+    main()
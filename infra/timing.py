@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence
+
+
+class StageTimer:
+    """Accumulates wall time per named pipeline stage using a monotonic clock.
+
+    A stage entered more than once (e.g. ``persist`` for events and traces) accumulates; ``as_dict``
+    reports seconds in the order stages were first entered.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self._durations: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self._durations[name] = self._durations.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self._durations.items()}
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted, non-empty ``sorted_values``."""
+
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+__all__ = ["StageTimer", "percentile"]
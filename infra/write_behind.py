@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Iterable
+
+from schemas.core import Event
+from store.event_store import EventStore
+from store.trace_ledger import TraceEntry, TraceLedger
+
+# Transient failures (e.g. SQLITE_BUSY beyond the busy timeout) are retried before the writer gives up.
+WRITE_RETRY_ATTEMPTS = 3
+WRITE_RETRY_BACKOFF_S = 0.05
+
+
+class WriteBehindError(RuntimeError):
+    """Raised to producers, ``flush`` and ``close`` once the background writer has failed."""
+
+
+class WriteBehindWriter:
+    """Bounded in-process queue drained by one background thread that group-commits records.
+
+    Each drain takes up to ``max_batch`` queued events and writes them with a single
+    ``EventStore.append`` (one transaction), then the queued trace entries with a single
+    ``TraceLedger.append_many``. At most ``max_pending`` records are queued or in flight; producers
+    block while a new batch would exceed that bound, so a slow disk throttles the caller instead of
+    growing memory without limit.
+
+    If a batch still fails after retries, the writer stops, keeps the unwritten records queued and
+    raises :class:`WriteBehindError` from later calls. ``close`` is registered with ``atexit`` and
+    writes whatever is still queued before the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        event_store: EventStore | None,
+        trace_ledger: TraceLedger | None,
+        *,
+        max_pending: int,
+        max_batch: int,
+    ) -> None:
+        if max_pending < 1 or max_batch < 1:
+            raise ValueError("max_pending and max_batch must be positive")
+        self.event_store = event_store
+        self.trace_ledger = trace_ledger
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self._events: deque[Event] = deque()
+        self._traces: deque[TraceEntry] = deque()
+        # Queued plus in-flight records; reaches zero only once everything handed in is committed.
+        self._pending = 0
+        self._closed = False
+        self._error: BaseException | None = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="devagent-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return self._pending
+
+    def put_events(self, events: Iterable[Event]) -> None:
+        batch = list(events)
+        if batch:
+            self._put(self._events, batch)
+
+    def put_trace(self, entry: TraceEntry) -> None:
+        self._put(self._traces, [entry])
+
+    def _put(self, queue: deque, records: list) -> None:  # type: ignore[type-arg]
+        count = len(records)
+        with self._cond:
+            self._raise_if_failed()
+            if self._closed:
+                raise WriteBehindError("write-behind writer is closed")
+            # A batch larger than the whole bound is admitted once the queue is empty rather than never.
+            while self._pending and self._pending + count > self.max_pending:
+                self._cond.wait()
+                self._raise_if_failed()
+            queue.extend(records)
+            self._pending += count
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every record handed in so far is committed; return ``False`` on timeout."""
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0 or self._error is not None, timeout)
+            self._raise_if_failed()
+            return self._pending == 0
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting records, write everything still queued and stop the writer thread.
+
+        Idempotent. If the background writer failed, one last synchronous attempt is made from the
+        calling thread before the error is raised.
+        """
+
+        with self._cond:
+            already_closed = self._closed
+            self._closed = True
+            self._cond.notify_all()
+        if already_closed:
+            return
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return
+        with self._cond:
+            if self._pending == 0:
+                return
+            self._error = None
+        while self._drain_once():
+            pass
+        with self._cond:
+            self._raise_if_failed()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise WriteBehindError("write-behind persistence failed") from self._error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._events or self._traces or self._closed)
+                if not (self._events or self._traces):
+                    return
+            if not self._drain_once():
+                return
+
+    def _drain_once(self) -> bool:
+        """Write one batch; return ``False`` when the queue is empty or the write failed."""
+
+        with self._cond:
+            events = [self._events.popleft() for _ in range(min(self.max_batch, len(self._events)))]
+            traces = [self._traces.popleft() for _ in range(min(self.max_batch, len(self._traces)))]
+        if not (events or traces):
+            return False
+        taken = len(events) + len(traces)
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                self._write(events, traces)
+            except Exception as exc:  # noqa: BLE001
+                if attempt + 1 < WRITE_RETRY_ATTEMPTS:
+                    time.sleep(WRITE_RETRY_BACKOFF_S * (attempt + 1))
+                    continue
+                with self._cond:
+                    self._events.extendleft(reversed(events))
+                    self._traces.extendleft(reversed(traces))
+                    self._pending -= taken - len(events) - len(traces)
+                    self._error = exc
+                    self._cond.notify_all()
+                return False
+            break
+        with self._cond:
+            self._pending -= taken
+            self._cond.notify_all()
+        return True
+
+    def _write(self, events: list[Event], traces: list[TraceEntry]) -> None:
+        """Write and remove records from ``events``/``traces`` so a retry never duplicates committed ones."""
+
+        if events:
+            if self.event_store is not None:
+                self.event_store.append(events)
+            events.clear()
+        if traces:
+            if self.trace_ledger is not None:
+                self.trace_ledger.append_many(traces)
+            traces.clear()
+
+
+__all__ = ["WriteBehindError", "WriteBehindWriter"]
@@ -15,6 +15,12 @@ class MemoryIngestPipeline:
         self.store = store
 
     def ingest(self, events: Iterable[Event]) -> None:
+        """Derive memory items from ``events`` and store them with one ``upsert_items`` transaction.
+
+        If the batch write fails, items are retried one by one so a single bad item only loses itself.
+        """
+
+        items: list[MemoryItem] = []
         for event in events:
             try:
                 if event.type == "RUN":
@@ -38,7 +44,7 @@ class MemoryIngestPipeline:
                         dimensions=dimensions,
                         stats=stats,
                     )
-                    self.store.upsert_item(item)
+                    items.append(item)
                 elif event.type == "EDIT":
                     file_path = event.payload.get("file_path")
                     pointer = {"event_id": event.event_id, "job_id": event.job_id, "file_path": file_path}
@@ -53,6 +59,17 @@ class MemoryIngestPipeline:
                         dimensions=dimensions,
                         stats=stats,
                     )
-                    self.store.upsert_item(item)
+                    items.append(item)
             except Exception:
                 logger.exception("Failed to ingest event", event_id=event.event_id)
+        if not items:
+            return
+        try:
+            self.store.upsert_items(items)
+        except Exception:
+            logger.exception("Batch memory upsert failed; retrying items individually", count=len(items))
+            for item in items:
+                try:
+                    self.store.upsert_item(item)
+                except Exception:
+                    logger.exception("Failed to ingest event", event_id=item.id)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from pathlib import Path
 import json
-from typing import Any
+import time
+from typing import Any, Iterable, Sequence
 
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+from sqlalchemy import Index, exists, func, inspect, literal_column, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Session, SQLModel, col, select
 
 from config.settings import settings
 from schemas.memory import MemoryItem, MemoryStats
+from store.engine import create_sqlite_engine, create_tables
 
 
 class MemoryRow(SQLModel, table=True):
@@ -19,45 +22,180 @@ class MemoryRow(SQLModel, table=True):
     stats_json: str
 
 
+class MemoryDimensionRow(SQLModel, table=True):
+    """One ``dimensions`` entry of a memory item, normalized so dimension filters run in SQL.
+
+    ``value`` holds ``str(value)``, the same comparison ``query_by_dimensions`` has always applied.
+    """
+
+    __table_args__ = (Index("ix_memorydimensionrow_key_value", "key", "value", "item_id"),)
+
+    item_id: str = Field(primary_key=True)
+    key: str = Field(primary_key=True)
+    value: str
+
+
+class MemoryKindCountRow(SQLModel, table=True):
+    """Number of memory items per ``kind``, kept current by ``MemoryStore.upsert_item``."""
+
+    kind: str = Field(primary_key=True)
+    count: int = 0
+
+
+class NodeDurationRow(SQLModel, table=True):
+    """Smoothed run time of one test node id, used to balance sharded RUN commands."""
+
+    repo_root: str = Field(primary_key=True)
+    node_id: str = Field(primary_key=True)
+    duration_s: float
+    samples: int = 1
+    updated_at: float
+
+
+# Weight of the newest sample in the smoothed per-test duration.
+DURATION_SMOOTHING = 0.5
+# Ids bound per IN (...) statement; older SQLite builds cap statements at 999 parameters.
+SQLITE_PARAM_CHUNK = 500
+# Memory rows read per batch when backfilling the dimension table of an existing database.
+DIMENSION_BACKFILL_BATCH = 1_000
+# Index entries counted per filter when choosing which dimension filter drives a query.
+DIMENSION_PROBE_LIMIT = 1_000
+
+
+def dimension_rows(item_id: str, dimensions: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"item_id": item_id, "key": str(key), "value": str(value)} for key, value in dimensions.items()]
+
+
 class MemoryStore:
     """SQLite-backed store for structured memory items.
 
     Notes:
     - ``dimensions`` and ``stats`` must be JSON-serializable dictionaries (e.g., may include ``created_at``).
     - ``stats.recent_activity_score`` is a simple proxy currently based on total row count.
+    - Per-kind counts live in ``MemoryKindCountRow`` and are updated in the upsert's transaction, so
+      ``stats()`` reads one row per kind rather than scanning every item.
+    - Dimensions are mirrored into ``MemoryDimensionRow`` in the same transaction, so
+      ``query_by_dimensions`` filters through the ``(key, value)`` index.
     """
 
     def __init__(self, db_path: str | None = None) -> None:
         self.db_path = db_path or settings.memory_db_path
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.engine = create_engine(f"sqlite:///{self.db_path}")
-        SQLModel.metadata.create_all(self.engine)
+        self.engine = create_sqlite_engine(self.db_path)
+        had_dimensions = inspect(self.engine).has_table(MemoryDimensionRow.__tablename__)
+        create_tables(self.engine, MemoryRow, MemoryDimensionRow, MemoryKindCountRow, NodeDurationRow)
+        self._backfill_kind_counts()
+        if not had_dimensions:
+            self._backfill_dimensions()
+
+    def _backfill_kind_counts(self) -> None:
+        with self.engine.begin() as connection:
+            if connection.execute(text("SELECT 1 FROM memorykindcountrow LIMIT 1")).first() is not None:
+                return
+            connection.execute(
+                text("INSERT INTO memorykindcountrow (kind, count) SELECT kind, count(*) FROM memoryrow GROUP BY kind")
+            )
+
+    def _backfill_dimensions(self) -> None:
+        """Populate ``MemoryDimensionRow`` from items written before the table existed."""
+
+        table = MemoryRow.__table__  # type: ignore[attr-defined]
+        dimension_table = MemoryDimensionRow.__table__  # type: ignore[attr-defined]
+        with self.engine.begin() as connection:
+            last_id = ""
+            while True:
+                statement = (
+                    select(table.c.id, table.c.dimensions_json)
+                    .where(table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(DIMENSION_BACKFILL_BATCH)
+                )
+                rows = connection.execute(statement).all()
+                if not rows:
+                    return
+                values: list[dict[str, Any]] = []
+                for item_id, dimensions_json in rows:
+                    try:
+                        dimensions = json.loads(dimensions_json)
+                    except (TypeError, ValueError):
+                        continue
+                    if isinstance(dimensions, dict):
+                        values.extend(dimension_rows(item_id, dimensions))
+                if values:
+                    connection.execute(dimension_table.insert(), values)
+                last_id = rows[-1][0]
 
     def upsert_item(self, item: MemoryItem) -> None:
-        try:
-            pointer_json = json.dumps(item.pointer)
-            dimensions_json = json.dumps(item.dimensions)
-            stats_json = json.dumps(item.stats)
-        except (TypeError, ValueError) as exc:
-            raise ValueError("MemoryStore items must be JSON-serializable") from exc
+        self.upsert_items([item])
 
-        with Session(self.engine) as session:
-            existing = session.get(MemoryRow, item.id)
-            payload = dict(
-                id=item.id,
-                kind=item.kind,
-                pointer_json=pointer_json,
-                snippet=item.snippet,
-                dimensions_json=dimensions_json,
-                stats_json=stats_json,
+    def upsert_items(self, items: Iterable[MemoryItem]) -> None:
+        """Insert or replace ``items`` in one transaction.
+
+        Rows go through a single ``INSERT ... ON CONFLICT DO UPDATE`` executemany; per-kind counts
+        and the dimension side table are updated in the same transaction. When an id repeats within
+        ``items`` the last occurrence wins. Raises ``ValueError`` (writing nothing) if any item is
+        not JSON-serializable.
+        """
+
+        batch: dict[str, MemoryItem] = {}
+        rows: dict[str, dict[str, Any]] = {}
+        for item in items:
+            try:
+                rows[item.id] = dict(
+                    id=item.id,
+                    kind=item.kind,
+                    pointer_json=json.dumps(item.pointer),
+                    snippet=item.snippet,
+                    dimensions_json=json.dumps(item.dimensions),
+                    stats_json=json.dumps(item.stats),
+                )
+            except (TypeError, ValueError) as exc:
+                raise ValueError("MemoryStore items must be JSON-serializable") from exc
+            batch[item.id] = item
+        if not rows:
+            return
+
+        table = MemoryRow.__table__  # type: ignore[attr-defined]
+        dimension_table = MemoryDimensionRow.__table__  # type: ignore[attr-defined]
+        count_table = MemoryKindCountRow.__table__  # type: ignore[attr-defined]
+        ids = list(rows)
+        chunks = [ids[offset : offset + SQLITE_PARAM_CHUNK] for offset in range(0, len(ids), SQLITE_PARAM_CHUNK)]
+        with self.engine.begin() as connection:
+            # pysqlite only opens the transaction at the first write, and that write takes SQLite's
+            # writer lock. Deleting first means the previous kinds are read under that lock, so a
+            # concurrent upsert cannot apply the same kind change twice.
+            for chunk in chunks:
+                connection.execute(dimension_table.delete().where(dimension_table.c.item_id.in_(chunk)))
+            previous: dict[str, str] = {}
+            for chunk in chunks:
+                previous.update(connection.execute(select(table.c.id, table.c.kind).where(table.c.id.in_(chunk))).all())
+
+            deltas: dict[str, int] = {}
+            for item_id, row in rows.items():
+                old_kind = previous.get(item_id)
+                if old_kind != row["kind"]:
+                    if old_kind is not None:
+                        deltas[old_kind] = deltas.get(old_kind, 0) - 1
+                    deltas[row["kind"]] = deltas.get(row["kind"], 0) + 1
+
+            insert = sqlite_insert(table)
+            upsert = insert.on_conflict_do_update(
+                index_elements=["id"],
+                set_={name: insert.excluded[name] for name in rows[ids[0]] if name != "id"},
             )
-            if existing:
-                for key, value in payload.items():
-                    setattr(existing, key, value)
-                session.add(existing)
-            else:
-                session.add(MemoryRow(**payload))
-            session.commit()
+            connection.execute(upsert, list(rows.values()))
+            dimensions = [value for item in batch.values() for value in dimension_rows(item.id, item.dimensions)]
+            if dimensions:
+                connection.execute(dimension_table.insert(), dimensions)
+            changed = [{"kind": kind, "count": delta} for kind, delta in deltas.items() if delta]
+            if changed:
+                count_insert = sqlite_insert(count_table)
+                connection.execute(
+                    count_insert.on_conflict_do_update(
+                        index_elements=["kind"],
+                        set_={"count": count_table.c.count + count_insert.excluded.count},
+                    ),
+                    changed,
+                )
 
     def get_item(self, item_id: str) -> MemoryItem | None:
         with Session(self.engine) as session:
@@ -74,8 +212,47 @@ class MemoryStore:
         )
 
     def query_by_dimensions(self, filters: dict[str, Any], limit: int = 100) -> list[MemoryItem]:
+        """Return up to ``limit`` items, in insertion order, whose dimensions match every filter.
+
+        A filter matches when ``str(dimensions.get(key)) == str(value)``. Filters are evaluated in
+        SQL: the most selective filter reads its matches from the ``(key, value)`` index of
+        ``MemoryDimensionRow`` and the rest are checked per candidate, so cost follows the number of
+        items matching that filter rather than the table size.
+        """
+
+        table: Any = MemoryRow
+        dimensions_table = MemoryDimensionRow.__table__  # type: ignore[attr-defined]
+        driving = self._driving_filter(filters)
+        statement = select(MemoryRow)
+        for key, value in filters.items():
+            expected = str(value)
+            if expected == str(None):
+                # A missing key also reads as ``None``, so exclude only items holding another value.
+                statement = statement.where(
+                    ~exists().where(
+                        dimensions_table.c.item_id == table.id,
+                        dimensions_table.c.key == str(key),
+                        dimensions_table.c.value != expected,
+                    )
+                )
+            elif key == driving:
+                # The most selective filter's index range drives the query ...
+                matching = select(dimensions_table.c.item_id).where(
+                    dimensions_table.c.key == str(key),
+                    dimensions_table.c.value == expected,
+                )
+                statement = statement.where(table.id.in_(matching))
+            else:
+                # ... and the others are primary-key probes per candidate.
+                statement = statement.where(
+                    exists().where(
+                        dimensions_table.c.item_id == table.id,
+                        dimensions_table.c.key == str(key),
+                        dimensions_table.c.value == expected,
+                    )
+                )
+        statement = statement.order_by(literal_column("memoryrow.rowid")).limit(limit)
         with Session(self.engine) as session:
-            statement = select(MemoryRow).limit(limit)
             rows = session.exec(statement).all()
         results: list[MemoryItem] = []
         for row in rows:
@@ -85,30 +262,91 @@ class MemoryStore:
                 continue
             if not isinstance(dimensions, dict):
                 continue
-            if all(str(dimensions.get(k)) == str(v) for k, v in filters.items()):
-                try:
-                    pointer = json.loads(row.pointer_json)
-                    stats = json.loads(row.stats_json)
-                except (TypeError, ValueError):
-                    continue
-                results.append(
-                    MemoryItem(
-                        id=row.id,
-                        kind=row.kind,  # type: ignore[arg-type]
-                        pointer=pointer,
-                        snippet=row.snippet,
-                        dimensions=dimensions,
-                        stats=stats,
-                    )
+            try:
+                pointer = json.loads(row.pointer_json)
+                stats = json.loads(row.stats_json)
+            except (TypeError, ValueError):
+                continue
+            results.append(
+                MemoryItem(
+                    id=row.id,
+                    kind=row.kind,  # type: ignore[arg-type]
+                    pointer=pointer,
+                    snippet=row.snippet,
+                    dimensions=dimensions,
+                    stats=stats,
                 )
+            )
         return results
 
+    def _driving_filter(self, filters: dict[str, Any]) -> Any:
+        """Key of the non-``None`` filter with the fewest matches, counting at most ``DIMENSION_PROBE_LIMIT``."""
+
+        table = MemoryDimensionRow.__table__  # type: ignore[attr-defined]
+        candidates = [(key, str(value)) for key, value in filters.items() if str(value) != str(None)]
+        if len(candidates) < 2:
+            return candidates[0][0] if candidates else None
+        best_key, best_count = None, DIMENSION_PROBE_LIMIT + 1
+        with self.engine.connect() as connection:
+            for key, expected in candidates:
+                probe = (
+                    select(table.c.item_id)
+                    .where(table.c.key == str(key), table.c.value == expected)
+                    .limit(min(best_count, DIMENSION_PROBE_LIMIT + 1))
+                    .subquery()
+                )
+                count = connection.execute(select(func.count()).select_from(probe)).scalar_one()
+                if best_key is None or count < best_count:
+                    best_key, best_count = key, count
+        return best_key
+
     def stats(self) -> MemoryStats:
         with Session(self.engine) as session:
-            statement = select(MemoryRow.kind)
-            kinds = session.exec(statement).all()
-        counts: dict[str, int] = {}
-        for kind in kinds:
-            counts[kind] = counts.get(kind, 0) + 1
-        recent_activity_score = float(len(kinds))
+            statement = select(MemoryKindCountRow.kind, MemoryKindCountRow.count).where(MemoryKindCountRow.count > 0)
+            counts = dict(session.exec(statement).all())
+        recent_activity_score = float(sum(counts.values()))
         return MemoryStats(counts_by_kind=counts, recent_activity_score=recent_activity_score)
+
+    def node_durations(self, repo_root: str, node_ids: Sequence[str]) -> dict[str, float]:
+        durations: dict[str, float] = {}
+        unique = list(dict.fromkeys(node_ids))
+        with Session(self.engine) as session:
+            for offset in range(0, len(unique), SQLITE_PARAM_CHUNK):
+                chunk = unique[offset : offset + SQLITE_PARAM_CHUNK]
+                statement = select(NodeDurationRow.node_id, NodeDurationRow.duration_s).where(
+                    NodeDurationRow.repo_root == repo_root,
+                    col(NodeDurationRow.node_id).in_(chunk),
+                )
+                durations.update({node_id: duration for node_id, duration in session.exec(statement).all()})
+        return durations
+
+    def record_node_durations(self, repo_root: str, durations: dict[str, float]) -> None:
+        """Fold measured test durations into the history with an exponential moving average."""
+
+        if not durations:
+            return
+        now = time.time()
+        rows = [
+            {
+                "repo_root": repo_root,
+                "node_id": node_id,
+                "duration_s": float(duration),
+                "samples": 1,
+                "updated_at": now,
+            }
+            for node_id, duration in durations.items()
+        ]
+        table = NodeDurationRow.__table__  # type: ignore[attr-defined]
+        insert = sqlite_insert(table)
+        statement = insert.on_conflict_do_update(
+            index_elements=["repo_root", "node_id"],
+            set_={
+                "duration_s": table.c.duration_s * (1 - DURATION_SMOOTHING)
+                + insert.excluded.duration_s * DURATION_SMOOTHING,
+                "samples": table.c.samples + 1,
+                "updated_at": insert.excluded.updated_at,
+            },
+        )
+        with Session(self.engine) as session:
+            session.exec(statement, params=rows)  # type: ignore[call-overload]
+            session.commit()
@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import asyncio
 import uuid
 from pathlib import Path
 from typing import Any
 
 from agent.devagent import DevAgent
+from infra.timing import StageTimer
 from memory.store import MemoryStore
 from meta.llm_meta_planner import LLMMetaPlanner
 from schemas.core import Event, Program, State
-from schemas.meta import FocusSpec, GoalViewSummary, MetaInputView, RerankHints, SelectorProfile, StateSummary
+from schemas.meta import (
+    FocusSpec,
+    GoalViewSummary,
+    MetaInputView,
+    MetaPlan,
+    RerankHints,
+    SelectorProfile,
+    StateSummary,
+)
 from schemas.views import AgentHints, DecisionInputView, DevAgentMode, GoalView, MemoryView, StateView
 from store.event_store import EventStore
 from store.trace_ledger import TraceEntry, TraceLedger
 from views.focus import LLMFocusInferer
 
+# Number of latest job events the state summary and error-log context look at.
+RECENT_EVENT_WINDOW = 200
+
 
 class MetaController:
     """Meta-level orchestrator that wraps DevAgent with planning and tracing.
@@ -36,28 +49,29 @@ class MetaController:
         self.memory_store = memory_store
         self.trace_ledger = trace_ledger
         self.event_store = event_store
-        self.llm_focus_inferer = LLMFocusInferer()
+        self.llm_focus_inferer = LLMFocusInferer(
+            observer=devagent.observer,
+            baseline=devagent.baseline_focus_inferer,
+        )
 
     def _get_recent_error_logs(self, job_id: str, limit: int = 3, max_chars: int = 2000) -> str:
-        recent = self.event_store.recent_for_job(job_id, limit=200)
+        self.devagent.observer.flush()
+        recent_failures = self.event_store.recent_failures(
+            job_id,
+            limit=limit,
+            fields=("cmd", "exit_code", "stderr"),
+            window=RECENT_EVENT_WINDOW,
+        )
         failures: list[str] = []
-        for event in recent:
-            if event.type != "RUN":
-                continue
-            payload = event.payload or {}
-            exit_code = int(payload.get("exit_code", 0) or 0)
-            if exit_code == 0:
-                continue
-            stderr = str(payload.get("stderr", "") or "")
+        for failure in recent_failures:
+            stderr = str(failure["stderr"] or "")
             if max_chars and len(stderr) > max_chars:
                 stderr = stderr[:max_chars]
-            cmd = payload.get("cmd")
-            header = f"RUN failed (exit_code={exit_code})"
+            cmd = failure["cmd"]
+            header = f"RUN failed (exit_code={failure['exit_code']})"
             if isinstance(cmd, str):
                 header = f"{header}: {cmd}"
             failures.append(f"{header}\n{stderr}")
-            if len(failures) >= limit:
-                break
         return "\n\n---\n\n".join(failures)
 
     def _get_repo_tree(self, repo_root: str, max_depth: int = 2) -> str:
@@ -144,7 +158,7 @@ class MetaController:
         ]
         return "\n\n".join(sections)
 
-    def _run_bootstrap_llm_heavy(
+    def _prepare_bootstrap(
         self,
         job_id: str,
         state: State,
@@ -154,8 +168,7 @@ class MetaController:
         focus_spec: FocusSpec,
         selector_profile: SelectorProfile,
         rerank_hints: RerankHints | None,
-        start_step_id: int,
-    ) -> tuple[State, list[Event], DecisionInputView]:
+    ) -> tuple[Program, DecisionInputView]:
         repo_tree = self._get_repo_tree(state.repo_root)
         recent_errors = self._get_recent_error_logs(job_id)
 
@@ -196,27 +209,81 @@ class MetaController:
         )
 
         program = self.devagent.devagent_step(decision_input, prompt)
+        return program, decision_input
+
+    def _run_bootstrap_llm_heavy(
+        self,
+        job_id: str,
+        state: State,
+        goal_view: GoalView,
+        *,
+        hints: AgentHints | None,
+        focus_spec: FocusSpec,
+        selector_profile: SelectorProfile,
+        rerank_hints: RerankHints | None,
+        start_step_id: int,
+        timer: StageTimer,
+    ) -> tuple[State, list[Event], DecisionInputView]:
+        with timer.stage("prepare"):
+            program, decision_input = self._prepare_bootstrap(
+                job_id,
+                state,
+                goal_view,
+                hints=hints,
+                focus_spec=focus_spec,
+                selector_profile=selector_profile,
+                rerank_hints=rerank_hints,
+            )
         new_state, events = self.devagent.execute_program(
             state=state,
             program=program,
             job_id=job_id,
             start_step_id=start_step_id,
+            timer=timer,
+        )
+        return new_state, events, decision_input
+
+    async def _run_bootstrap_llm_heavy_async(
+        self,
+        job_id: str,
+        state: State,
+        goal_view: GoalView,
+        *,
+        hints: AgentHints | None,
+        focus_spec: FocusSpec,
+        selector_profile: SelectorProfile,
+        rerank_hints: RerankHints | None,
+        start_step_id: int,
+        timer: StageTimer,
+    ) -> tuple[State, list[Event], DecisionInputView]:
+        with timer.stage("prepare"):
+            program, decision_input = await asyncio.to_thread(
+                self._prepare_bootstrap,
+                job_id,
+                state,
+                goal_view,
+                hints=hints,
+                focus_spec=focus_spec,
+                selector_profile=selector_profile,
+                rerank_hints=rerank_hints,
+            )
+        new_state, events = await self.devagent.execute_program_async(
+            state=state,
+            program=program,
+            job_id=job_id,
+            start_step_id=start_step_id,
+            timer=timer,
         )
         return new_state, events, decision_input
 
     def _build_state_summary(self, job_id: str) -> StateSummary:
         """Derive a lightweight StateSummary from recent events."""
 
-        recent = self.event_store.recent_for_job(job_id, limit=200)
-        failing_tests_count = 0
-        for evt in recent:
-            if evt.type != "RUN":
-                continue
-            payload = evt.payload or {}
-            exit_code = int(payload.get("exit_code", 0) or 0)
-            if exit_code != 0:
-                failing_tests_count += 1
-
+        # A write-behind observer may still hold the previous step's events.
+        self.devagent.observer.flush()
+        # Bounded to the latest events (served by the failed-RUN partial index) so the count reflects
+        # the job's recent runs rather than its whole history.
+        failing_tests_count = self.event_store.count_failures(job_id, window=RECENT_EVENT_WINDOW)
         return StateSummary(repo_size=0, failing_tests_count=failing_tests_count, key_modules=[])
 
     def _mode_literal(self, mode: DevAgentMode) -> str:
@@ -224,17 +291,7 @@ class MetaController:
             return "bootstrap_llm_heavy"
         return "optimized_structured"
 
-    def run_step(
-        self,
-        job_id: str,
-        state: State,
-        program: Program,
-        goal_view: GoalView,
-        *,
-        hints: AgentHints | None = None,
-        start_step_id: int = 1,
-    ) -> tuple[State, list[Event], DecisionInputView]:
-        """Plan and execute a single step: build MetaInputView, call planner, delegate to DevAgent, and trace the outcome."""
+    def _propose_plan(self, job_id: str, goal_view: GoalView) -> MetaPlan:
         goal_summary = GoalViewSummary(
             task_type=goal_view.task_type,
             natural_language_goal=goal_view.natural_language_goal,
@@ -250,7 +307,90 @@ class MetaController:
             mode=self._mode_literal(self.devagent.mode),
         )
 
-        plan = self.planner.propose_plan(meta_input)
+        return self.planner.propose_plan(meta_input)
+
+    def _run_resources(self, events: list[Event]) -> list[dict[str, Any]]:
+        """Per-command resource usage for the RUN events of a step, as reported by the interpreter."""
+
+        resources: list[dict[str, Any]] = []
+        for event in events:
+            if event.type != "RUN":
+                continue
+            rusage = event.payload.get("rusage")
+            if not isinstance(rusage, dict):
+                continue
+            resources.append(
+                {
+                    "step_id": event.step_id,
+                    "cmd": event.payload.get("cmd"),
+                    "wall_s": round(event.ended_at - event.started_at, 6),
+                    **rusage,
+                }
+            )
+        return resources
+
+    def _record_trace(
+        self,
+        job_id: str,
+        program: Program,
+        plan: MetaPlan,
+        new_state: State,
+        events: list[Event],
+        decision_input: DecisionInputView,
+        *,
+        start_step_id: int,
+        timings: dict[str, float] | None = None,
+    ) -> None:
+        decision_id = str(uuid.uuid4())
+        step_id = max((event.step_id for event in events), default=start_step_id)
+        decision_input_summary: dict[str, Any] = {
+            "goal_task_type": decision_input.goal_view.task_type,
+            "files": decision_input.focus_view.files,
+            "mode": decision_input.mode,
+        }
+        program_summary = {"instruction_count": len(program.instructions)}
+        outcome_summary = {
+            "event_count": len(events),
+            "git_head": new_state.git_head,
+            "rerank_hints": plan.rerank_hints.model_dump() if plan.rerank_hints else None,
+            "run_resources": self._run_resources(events),
+        }
+
+        entry = TraceEntry(
+            decision_id=decision_id,
+            job_id=job_id,
+            step_id=step_id,
+            decision_input_summary=decision_input_summary,
+            program_summary=program_summary,
+            outcome_summary=outcome_summary,
+            timings=timings or {},
+        )
+        observer = self.devagent.observer
+        if getattr(observer, "trace_ledger", None) is self.trace_ledger:
+            # Lets a write-behind observer commit the trace off the step's critical path.
+            observer.record_trace(entry)
+        else:
+            self.trace_ledger.append(entry)
+
+    def run_step(
+        self,
+        job_id: str,
+        state: State,
+        program: Program,
+        goal_view: GoalView,
+        *,
+        hints: AgentHints | None = None,
+        start_step_id: int = 1,
+        timer: StageTimer | None = None,
+    ) -> tuple[State, list[Event], DecisionInputView]:
+        """Plan and execute a single step: build MetaInputView, call planner, delegate to DevAgent, and trace the outcome.
+
+        Stage timings are collected in ``timer`` (a fresh :class:`StageTimer` by default) and stored on the trace entry.
+        """
+        timer = timer or StageTimer()
+        started = timer.clock()
+        with timer.stage("plan"):
+            plan = self._propose_plan(job_id, goal_view)
         if self.devagent.mode == DevAgentMode.BOOTSTRAP_LLM_HEAVY:
             new_state, events, decision_input = self._run_bootstrap_llm_heavy(
                 job_id=job_id,
@@ -261,6 +401,7 @@ class MetaController:
                 selector_profile=plan.selector_profile,
                 rerank_hints=plan.rerank_hints,
                 start_step_id=start_step_id,
+                timer=timer,
             )
         else:
             new_state, events, decision_input = self.devagent.run_step(
@@ -273,30 +414,77 @@ class MetaController:
                 selector_profile=plan.selector_profile,
                 start_step_id=start_step_id,
                 rerank_hints=plan.rerank_hints,
+                timer=timer,
             )
+        timer.add("total", timer.clock() - started)
 
-        decision_id = str(uuid.uuid4())
-        step_id = max((event.step_id for event in events), default=start_step_id)
-        decision_input_summary: dict[str, Any] = {
-            "goal_task_type": decision_input.goal_view.task_type,
-            "files": decision_input.focus_view.files,
-            "mode": decision_input.mode,
-        }
-        program_summary = {"instruction_count": len(program.instructions)}
-        outcome_summary = {
-            "event_count": len(events),
-            "git_head": new_state.git_head,
-            "rerank_hints": plan.rerank_hints.model_dump() if plan.rerank_hints else None,
-        }
-
-        entry = TraceEntry(
-            decision_id=decision_id,
-            job_id=job_id,
-            step_id=step_id,
-            decision_input_summary=decision_input_summary,
-            program_summary=program_summary,
-            outcome_summary=outcome_summary,
+        self._record_trace(
+            job_id,
+            program,
+            plan,
+            new_state,
+            events,
+            decision_input,
+            start_step_id=start_step_id,
+            timings=timer.as_dict(),
         )
-        self.trace_ledger.append(entry)
+        return new_state, events, decision_input
+
+    async def run_step_async(
+        self,
+        job_id: str,
+        state: State,
+        program: Program,
+        goal_view: GoalView,
+        *,
+        hints: AgentHints | None = None,
+        start_step_id: int = 1,
+        timer: StageTimer | None = None,
+    ) -> tuple[State, list[Event], DecisionInputView]:
+        """Async counterpart of :meth:`run_step` that awaits program execution instead of blocking.
+
+        Planning, store reads and trace recording run in worker threads so the event loop stays free.
+        """
+        timer = timer or StageTimer()
+        started = timer.clock()
+        with timer.stage("plan"):
+            plan = await asyncio.to_thread(self._propose_plan, job_id, goal_view)
+        if self.devagent.mode == DevAgentMode.BOOTSTRAP_LLM_HEAVY:
+            new_state, events, decision_input = await self._run_bootstrap_llm_heavy_async(
+                job_id=job_id,
+                state=state,
+                goal_view=goal_view,
+                hints=hints,
+                focus_spec=plan.focus_spec,
+                selector_profile=plan.selector_profile,
+                rerank_hints=plan.rerank_hints,
+                start_step_id=start_step_id,
+                timer=timer,
+            )
+        else:
+            new_state, events, decision_input = await self.devagent.run_step_async(
+                job_id=job_id,
+                state=state,
+                program=program,
+                goal_view=goal_view,
+                hints=hints,
+                focus_spec=plan.focus_spec,
+                selector_profile=plan.selector_profile,
+                start_step_id=start_step_id,
+                rerank_hints=plan.rerank_hints,
+                timer=timer,
+            )
+        timer.add("total", timer.clock() - started)
 
+        await asyncio.to_thread(
+            self._record_trace,
+            job_id,
+            program,
+            plan,
+            new_state,
+            events,
+            decision_input,
+            start_step_id=start_step_id,
+            timings=timer.as_dict(),
+        )
         return new_state, events, decision_input
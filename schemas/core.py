@@ -1,6 +1,6 @@
 from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer
 
 
 class StateDiagnostics(BaseModel):
@@ -29,8 +29,22 @@ class GeneratedInstructions(BaseModel):
     instructions: list[GeneratedInstruction]
 
 
+class ExecutionPolicy(BaseModel):
+    """How a Program reacts to failures.
+
+    ``continue`` runs every instruction. ``fail_fast`` stops after the first RUN with a non-zero exit
+    code or failed EDIT; ``stop_on_exit_codes`` stops after a RUN exits with one of
+    ``stop_on_exit_codes``. Once stopped, still-running commands of the same parallel group are
+    cancelled and the remaining instructions are skipped.
+    """
+
+    mode: Literal["continue", "fail_fast", "stop_on_exit_codes"] = "continue"
+    stop_on_exit_codes: list[int] = []
+
+
 class Program(BaseModel):
     instructions: list[Instruction]
+    policy: ExecutionPolicy = ExecutionPolicy()
 
 
 class Event(BaseModel):
@@ -42,6 +56,11 @@ class Event(BaseModel):
     started_at: float
     ended_at: float
 
+    @field_serializer("payload")
+    def _serialize_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
+        # Stored events may carry a lazily loaded dict subclass; copying resolves its values.
+        return payload if type(payload) is dict else dict(payload)
+
 
 __all__ = [
     "StateDiagnostics",
@@ -49,6 +68,7 @@ __all__ = [
     "Instruction",
     "GeneratedInstruction",
     "GeneratedInstructions",
+    "ExecutionPolicy",
     "Program",
     "Event",
 ]
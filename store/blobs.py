@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Any, Callable, Iterator
+
+from sqlmodel import Field, SQLModel
+
+# Payload keys whose large string values are moved out of ``EventRow.payload_json``.
+BLOB_FIELDS = ("stdout", "stderr")
+BLOB_REF_KEY = "$blob"
+
+
+class EventBlobRow(SQLModel, table=True):
+    """Content-addressed payload value, keyed by the SHA-256 of its UTF-8 text."""
+
+    digest: str = Field(primary_key=True)
+    codec: str
+    raw_size: int
+    data: bytes
+    # Number of event rows referencing the blob; retention drops the blob when it reaches zero.
+    refs: int | None = None
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def encode_blob(text: str, compression: str) -> tuple[str, dict[str, Any]]:
+    """Return ``(digest, row values)`` for ``text``; compression is kept only when it saves space."""
+
+    raw = text.encode("utf-8", errors="surrogatepass")
+    digest = hashlib.sha256(raw).hexdigest()
+    codec, data = "none", raw
+    if compression == "zlib":
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            codec, data = "zlib", compressed
+    return digest, {"digest": digest, "codec": codec, "raw_size": len(raw), "data": data}
+
+
+def decode_blob(codec: str, data: bytes) -> str:
+    raw = zlib.decompress(data) if codec == "zlib" else data
+    return raw.decode("utf-8", errors="surrogatepass")
+
+
+def extract_blobs(
+    payload: dict[str, Any],
+    min_bytes: int,
+    compression: str,
+) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Replace large ``BLOB_FIELDS`` values with blob references.
+
+    Returns the payload to serialize and the blob rows to store alongside it; ``payload`` itself is
+    not modified.
+    """
+
+    blobs: list[dict[str, Any]] = []
+    stored = payload
+    for key in BLOB_FIELDS:
+        value = payload.get(key)
+        if not isinstance(value, str) or len(value) < min_bytes:
+            continue
+        digest, row = encode_blob(value, compression)
+        if stored is payload:
+            stored = dict(payload)
+        stored[key] = {BLOB_REF_KEY: digest, "size": row["raw_size"]}
+        blobs.append(row)
+    return stored, blobs
+
+
+class LazyPayload(dict):  # type: ignore[type-arg]
+    """Event payload whose blob-backed values are loaded on first access.
+
+    Key lookups, ``get``, iteration, ``items``/``values``, copies (``dict(p)``, ``{**p}``) and
+    equality all see the real values; each blob is fetched once through ``load`` and then cached in
+    place. Checking ``"stdout" in payload`` or reading other keys never touches the blob table.
+    """
+
+    __slots__ = ("_load",)
+
+    def __init__(self, data: dict[str, Any], load: Callable[[str], str]) -> None:
+        super().__init__(data)
+        self._load = load
+
+    def _resolve(self, key: Any, value: Any) -> Any:
+        if is_blob_ref(value):
+            value = self._load(value[BLOB_REF_KEY])
+            dict.__setitem__(self, key, value)
+        return value
+
+    def pending(self) -> list[str]:
+        """Keys whose values have not been loaded yet."""
+
+        return [key for key, value in dict.items(self) if is_blob_ref(value)]
+
+    def materialize(self) -> LazyPayload:
+        for key, value in list(dict.items(self)):
+            self._resolve(key, value)
+        return self
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if dict.__contains__(self, key):
+            return self[key]
+        return default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if dict.__contains__(self, key):
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def __iter__(self) -> Iterator[Any]:
+        # Overriding __iter__ makes dict(p) and {**p} go through keys()/__getitem__.
+        return iter(dict.keys(self))
+
+    def items(self):  # type: ignore[no-untyped-def, override]
+        return dict.items(self.materialize())
+
+    def values(self):  # type: ignore[no-untyped-def, override]
+        return dict.values(self.materialize())
+
+    def copy(self) -> dict[str, Any]:  # type: ignore[override]
+        return dict(self.materialize())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyPayload):
+            other.materialize()
+        return dict.__eq__(self.materialize(), other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return dict.__repr__(self.materialize())
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        return (dict, (dict(self.materialize()),))
+
+
+__all__ = [
+    "BLOB_FIELDS",
+    "EventBlobRow",
+    "LazyPayload",
+    "decode_blob",
+    "encode_blob",
+    "extract_blobs",
+    "is_blob_ref",
+]
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Index, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.pool import QueuePool
+from sqlmodel import SQLModel, create_engine
+
+from config.settings import settings
+
+
+def sqlite_pragmas() -> dict[str, Any]:
+    """Connection pragmas applied to every store connection, tuned from ``Settings``.
+
+    WAL lets readers proceed while a writer commits; ``synchronous=NORMAL`` is durable across
+    application crashes in WAL mode and only risks the last transactions on power loss.
+    """
+
+    return {
+        # Only takes effect on a database without tables yet; older files keep their mode until a
+        # full VACUUM (see ``store.retention``). Must precede journal_mode, which creates the file.
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": settings.sqlite_synchronous,
+        # Negative values are KiB rather than pages.
+        "cache_size": -settings.sqlite_cache_size_kb,
+        "mmap_size": settings.sqlite_mmap_size_bytes,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "temp_store": "MEMORY",
+    }
+
+
+def create_sqlite_engine(db_path: str) -> Engine:
+    """Build the pooled SQLite engine shared by ``EventStore``, ``TraceLedger`` and ``MemoryStore``."""
+
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        poolclass=QueuePool,
+        pool_size=settings.sqlite_pool_size,
+        max_overflow=settings.sqlite_pool_size,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+    )
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def ensure_columns(engine: Engine, model: type[SQLModel]) -> list[str]:
+    """Add columns declared on ``model`` but missing from its existing table; return their names.
+
+    Only additive, nullable columns are supported, which is all ``ALTER TABLE ... ADD COLUMN`` allows
+    without rebuilding the table.
+    """
+
+    table = model.__table__  # type: ignore[attr-defined]
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    added: list[str] = []
+    with engine.begin() as connection:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            added.append(column.name)
+    return added
+
+
+def _index_creation_order(index: Index) -> tuple[bool, str]:
+    # Without ANALYZE statistics SQLite breaks cost ties in favour of the most recently created
+    # index, so partial indexes (narrower, and only usable when their predicate holds) go last.
+    return (index.dialect_options["sqlite"]["where"] is not None, index.name or "")
+
+
+def ensure_autoincrement(engine: Engine, model: type[SQLModel]) -> bool:
+    """Rebuild ``model``'s existing table with ``AUTOINCREMENT`` if the model asks for it; return whether it did.
+
+    Without ``AUTOINCREMENT`` SQLite hands out ``max(rowid) + 1``, so ids of deleted newest rows are
+    reused, which breaks id-based watermarks. The rebuild copies rows with their ids, which seeds
+    ``sqlite_sequence`` with the current maximum; ids deleted before the rebuild cannot be recovered.
+    """
+
+    table = model.__table__  # type: ignore[attr-defined]
+    if not table.dialect_options["sqlite"]["autoincrement"]:
+        return False
+    with engine.begin() as connection:
+        created = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+        ).scalar()
+        if created is None or "AUTOINCREMENT" in created.upper():
+            return False
+        old_indexes = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"),
+            {"name": table.name},
+        ).scalars()
+        for index_name in list(old_indexes):
+            connection.execute(text(f'DROP INDEX "{index_name}"'))
+        connection.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{table.name}__rebuild"'))
+        connection.execute(CreateTable(table))
+        columns = ", ".join(f'"{column.name}"' for column in table.columns)
+        connection.execute(
+            text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{table.name}__rebuild" ORDER BY id')
+        )
+        connection.execute(text(f'DROP TABLE "{table.name}__rebuild"'))
+        for index in sorted(table.indexes, key=_index_creation_order):
+            index.create(connection)
+    return True
+
+
+def create_tables(engine: Engine, *models: type[SQLModel]) -> dict[str, list[str]]:
+    """Create only ``models``' tables in ``engine``, migrating existing ones forward.
+
+    Columns added to a model since its table was created are appended (see :func:`ensure_columns`),
+    tables whose model sets ``sqlite_autoincrement`` are rebuilt once if they lack it (see
+    :func:`ensure_autoincrement`), and indexes are created individually because ``create_all``
+    skips the indexes of tables that already exist. Returns the added column names per table so
+    callers can backfill them.
+    """
+
+    tables = [model.__table__ for model in models]  # type: ignore[attr-defined]
+    SQLModel.metadata.create_all(engine, tables=tables)
+    added = {model.__table__.name: ensure_columns(engine, model) for model in models}  # type: ignore[attr-defined]
+    for model in models:
+        ensure_autoincrement(engine, model)
+    for table in tables:
+        for index in sorted(table.indexes, key=_index_creation_order):
+            index.create(engine, checkfirst=True)
+    return added
+
+
+__all__ = ["create_sqlite_engine", "create_tables", "ensure_autoincrement", "ensure_columns", "sqlite_pragmas"]
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import bisect
+import os
+import struct
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms have no advisory locks
+    fcntl = None
+
+from config.settings import settings
+from schemas.core import Event
+from store.event_store import (
+    EVENT_COLUMNS,
+    PAYLOAD_KEY,
+    JobAggregateRow,
+    _row_values,
+    dump_json_bytes,
+    load_payload,
+    promoted_fields,
+)
+from store.paging import DEFAULT_PAGE_SIZE, Cursor
+
+# Each record is ``<length><crc32>`` followed by ``length`` bytes of JSON.
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+LOCK_NAME = "writer.lock"
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Where one event lives, plus the columns needed to filter without reading it."""
+
+    seq: int
+    step_id: int
+    segment: int
+    offset: int
+    length: int
+    exit_code: int | None
+
+    @property
+    def cursor(self) -> Cursor:
+        return (self.step_id, self.seq)
+
+
+def _cursor(entry: IndexEntry) -> Cursor:
+    return entry.cursor
+
+
+@dataclass
+class _JobCounters:
+    """In-memory counterpart of ``JobAggregateRow``; plain attributes keep per-event updates cheap."""
+
+    events: int = 0
+    runs: int = 0
+    failures: int = 0
+    edits: int = 0
+    last_step_id: int | None = None
+    last_status: str | None = None
+    last_run_step_id: int | None = None
+
+
+class SegmentedEventStore:
+    """Append-only event log in rotating segment files, a drop-in for :class:`EventStore` reads/writes.
+
+    ``append`` writes CRC-framed JSON records to the active ``seg-N.log`` and one line per event to
+    its ``seg-N.idx`` sidecar (sequence number, job, step, offset, length, type, exit code). Opening
+    the store loads only the sidecars into a per-job offset index; a torn tail from a crash is
+    recovered by rescanning the active segment past its last indexed record. Each job's index is
+    kept in ``(step_id, seq)`` order as entries arrive, so reads slice or bisect it and ``pread``
+    just the records they return, newest first for ``recent_for_job``.
+
+    A directory has a single writer: the store takes an exclusive ``flock`` on ``writer.lock``.
+    Another process opening the same directory while the lock is held gets a read-only store
+    (``read_only`` is true): it sees the events indexed when it was opened, never repairs a torn
+    tail, and its ``append`` raises ``RuntimeError``.
+
+    ``seq`` plays the role of ``EventRow.id``: a global insertion counter used in cursors and
+    ``iter_row_batches``. Per-job counters match ``EventStore.job_aggregate`` except for the
+    retention timestamps. There is no SQL, so retention and ad-hoc queries are not available for
+    this backend, and payloads are stored inline rather than in a blob table.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        *,
+        segment_max_bytes: int | None = None,
+        fsync: bool | None = None,
+    ) -> None:
+        self.directory = Path(directory or settings.event_segment_dir)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes or settings.event_segment_max_bytes
+        self.fsync = settings.event_segment_fsync if fsync is None else fsync
+        self._lock = threading.RLock()
+        self._jobs: dict[str, list[IndexEntry]] = {}
+        self._aggregates: dict[str, _JobCounters] = {}
+        self._read_fds: dict[int, int] = {}
+        self._next_seq = 1
+        self._segment = 0
+        self._log: Any = None
+        self._index: Any = None
+        self._lock_fd: int | None = None
+        self.read_only = not self._acquire_writer_lock()
+        self._load()
+
+    def _acquire_writer_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        fd = os.open(self.directory / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _segment_path(self, segment: int, suffix: str) -> Path:
+        return self.directory / f"seg-{segment:06d}{suffix}"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(path.stem.split("-")[1]) for path in self.directory.glob(f"seg-*{SEGMENT_SUFFIX}"))
+
+    def _open_segment(self, segment: int) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._index.close()
+        self._segment = segment
+        self._log = open(self._segment_path(segment, SEGMENT_SUFFIX), "ab")
+        self._index = open(self._segment_path(segment, INDEX_SUFFIX), "ab")
+
+    def _read_fd(self, segment: int) -> int:
+        with self._lock:
+            fd = self._read_fds.get(segment)
+            if fd is None:
+                fd = self._read_fds[segment] = os.open(self._segment_path(segment, SEGMENT_SUFFIX), os.O_RDONLY)
+            return fd
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._index.close()
+                self._log = self._index = None
+            for fd in self._read_fds.values():
+                os.close(fd)
+            self._read_fds.clear()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def _load(self) -> None:
+        segments = self._segments()
+        for segment in segments:
+            indexed_end = self._load_index(segment)
+            if segment == segments[-1] and not self.read_only:
+                self._recover_tail(segment, indexed_end)
+        if not self.read_only:
+            self._open_segment(segments[-1] if segments else 1)
+
+    def _load_index(self, segment: int) -> int:
+        """Load ``segment``'s sidecar; return the end offset of its last indexed record."""
+
+        path = self._segment_path(segment, INDEX_SUFFIX)
+        if not path.exists():
+            return 0
+        data = path.read_bytes()
+        good = data[: data.rfind(b"\n") + 1]
+        if len(good) != len(data) and not self.read_only:
+            # Drop a partially written last line; the records it described are re-indexed below.
+            with open(path, "r+b") as handle:
+                handle.truncate(len(good))
+        end = 0
+        for line in good.splitlines():
+            seq, job_id, step_id, offset, length, event_type, exit_code = orjson.loads(line)
+            self._index_event(seq, job_id, step_id, segment, offset, length, event_type, exit_code)
+            end = max(end, offset + RECORD_HEADER.size + length)
+        return end
+
+    def _recover_tail(self, segment: int, offset: int) -> None:
+        path = self._segment_path(segment, SEGMENT_SUFFIX)
+        with open(path, "rb") as handle:
+            handle.seek(offset)
+            tail = handle.read()
+        lines: list[bytes] = []
+        position = 0
+        while position + RECORD_HEADER.size <= len(tail):
+            length, crc = RECORD_HEADER.unpack_from(tail, position)
+            body = tail[position + RECORD_HEADER.size : position + RECORD_HEADER.size + length]
+            if len(body) < length or zlib.crc32(body) != crc:
+                break
+            record = load_payload(body)
+            record_offset = offset + position
+            lines.append(self._index_record(record, segment, record_offset, length))
+            position += RECORD_HEADER.size + length
+        if position < len(tail):
+            with open(path, "r+b") as handle:
+                handle.truncate(offset + position)
+        if lines:
+            with open(self._segment_path(segment, INDEX_SUFFIX), "ab") as handle:
+                handle.write(b"".join(lines))
+
+    def _index_event(
+        self,
+        seq: int,
+        job_id: str,
+        step_id: int,
+        segment: int,
+        offset: int,
+        length: int,
+        event_type: str,
+        exit_code: int | None,
+    ) -> None:
+        entries = self._jobs.setdefault(job_id, [])
+        entry = IndexEntry(seq, step_id, segment, offset, length, exit_code)
+        if entries and entry.cursor < entries[-1].cursor:
+            bisect.insort(entries, entry, key=_cursor)
+        else:
+            entries.append(entry)
+        self._next_seq = max(self._next_seq, seq + 1)
+        aggregate = self._aggregates.get(job_id)
+        if aggregate is None:
+            aggregate = self._aggregates[job_id] = _JobCounters()
+        aggregate.events += 1
+        aggregate.last_step_id = step_id if aggregate.last_step_id is None else max(aggregate.last_step_id, step_id)
+        if event_type == "EDIT":
+            aggregate.edits += 1
+        elif event_type == "RUN":
+            failed = exit_code is not None and exit_code != 0
+            aggregate.runs += 1
+            aggregate.failures += int(failed)
+            if aggregate.last_run_step_id is None or step_id >= aggregate.last_run_step_id:
+                aggregate.last_run_step_id = step_id
+                aggregate.last_status = "failed" if failed else "ok"
+
+    def _index_record(self, record: dict[str, Any], segment: int, offset: int, length: int) -> bytes:
+        event = Event.model_validate(record["event"])
+        exit_code, _cmd = promoted_fields(event, event.payload)
+        fields = (record["seq"], event.job_id, event.step_id, offset, length, event.type, exit_code)
+        self._index_event(record["seq"], event.job_id, event.step_id, segment, offset, length, event.type, exit_code)
+        return orjson.dumps(fields) + b"\n"
+
+    def append(self, events: Iterable[Event]) -> None:
+        """Frame ``events`` as records and write them with one ``write`` per file.
+
+        The segment data is written before its sidecar lines, so after a crash the index never
+        points past valid data. With ``fsync`` both files are synced before returning.
+        """
+
+        if self.read_only:
+            raise RuntimeError(f"{self.directory} is locked by another writer; this store is read-only")
+        batch = list(events)
+        if not batch:
+            return
+        with self._lock:
+            if self._log.tell() >= self.segment_max_bytes:
+                self._open_segment(self._segment + 1)
+            offset = self._log.tell()
+            frames: list[bytes] = []
+            lines: list[bytes] = []
+            entries: list[tuple[Any, ...]] = []
+            for event in batch:
+                seq = self._next_seq
+                self._next_seq += 1
+                record = {
+                    "seq": seq,
+                    "event": {
+                        "event_id": event.event_id,
+                        "job_id": event.job_id,
+                        "step_id": event.step_id,
+                        "type": event.type,
+                        "payload": event.payload,
+                        "started_at": event.started_at,
+                        "ended_at": event.ended_at,
+                    },
+                }
+                body = dump_json_bytes(record)
+                exit_code, _cmd = promoted_fields(event, event.payload)
+                fields = (seq, event.job_id, event.step_id, offset, len(body), event.type, exit_code)
+                frames.append(RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body)
+                lines.append(orjson.dumps(fields) + b"\n")
+                entries.append(fields)
+                offset += RECORD_HEADER.size + len(body)
+            self._log.write(b"".join(frames))
+            self._log.flush()
+            self._index.write(b"".join(lines))
+            self._index.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+                os.fsync(self._index.fileno())
+            for seq, job_id, step_id, record_offset, length, event_type, exit_code in entries:
+                self._index_event(seq, job_id, step_id, self._segment, record_offset, length, event_type, exit_code)
+
+    def _read(self, entry: IndexEntry) -> dict[str, Any]:
+        frame = os.pread(self._read_fd(entry.segment), RECORD_HEADER.size + entry.length, entry.offset)
+        return load_payload(frame[RECORD_HEADER.size :])
+
+    def _event(self, entry: IndexEntry) -> Event:
+        return Event.model_validate(self._read(entry)["event"])
+
+    def _tail(self, job_id: str, count: int | None) -> list[IndexEntry]:
+        """The job's last ``count`` index entries (all of them for ``None``) in cursor order."""
+
+        with self._lock:
+            entries = self._jobs.get(job_id, [])
+            if count is None:
+                return list(entries)
+            return entries[-count:] if count else []
+
+    def recent_for_job(self, job_id: str, limit: int = 200) -> list[Event]:
+        return [self._event(entry) for entry in reversed(self._tail(job_id, limit))]
+
+    def page_job_events(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> tuple[list[Event], Cursor | None]:
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        with self._lock:
+            entries = self._jobs.get(job_id, [])
+            start = 0 if after is None else bisect.bisect_right(entries, tuple(after), key=_cursor)
+            page = entries[start : start + limit]
+        cursor = page[-1].cursor if len(page) == limit else None
+        return [self._event(entry) for entry in page], cursor
+
+    def iter_job_events(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        batch_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Event]:
+        cursor = after
+        while True:
+            events, cursor = self.page_job_events(job_id, cursor, batch_size)
+            yield from events
+            if cursor is None:
+                return
+
+    def iter_row_batches(self, after_id: int = 0, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[list[dict[str, Any]]]:
+        """``EventRow``-shaped dicts with ``seq > after_id`` in insertion order, for exports."""
+
+        with self._lock:
+            entries = [entry for job in self._jobs.values() for entry in job if entry.seq > after_id]
+        entries.sort(key=lambda entry: entry.seq)
+        for start in range(0, len(entries), batch_size):
+            rows: list[dict[str, Any]] = []
+            for entry in entries[start : start + batch_size]:
+                event = self._event(entry)
+                rows.append({"id": entry.seq, **_row_values(event, event.payload)})
+            yield rows
+
+    def _failures(self, job_id: str, window: int | None, limit: int | None = None) -> list[IndexEntry]:
+        """Failed RUN entries among the job's last ``window`` entries, newest first, at most ``limit``."""
+
+        failures: list[IndexEntry] = []
+        if limit == 0:
+            return failures
+        for entry in reversed(self._tail(job_id, window)):
+            if entry.exit_code is not None and entry.exit_code != 0:
+                failures.append(entry)
+                if limit is not None and len(failures) == limit:
+                    break
+        return failures
+
+    def recent_failures(
+        self,
+        job_id: str,
+        limit: int = 3,
+        fields: Sequence[str] = ("step_id", "cmd", "exit_code"),
+        *,
+        window: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Same contract as :meth:`EventStore.recent_failures`, answered from the offset index."""
+
+        for field in fields:
+            if field not in EVENT_COLUMNS and not PAYLOAD_KEY.match(field):
+                raise ValueError(f"unsupported event field: {field!r}")
+        results: list[dict[str, Any]] = []
+        for entry in self._failures(job_id, window, limit):
+            event = self._event(entry)
+            row = _row_values(event, event.payload)
+            results.append(
+                {field: row[field] if field in EVENT_COLUMNS else event.payload.get(field) for field in fields}
+            )
+        return results
+
+    def count_failures(self, job_id: str, *, window: int | None = None) -> int:
+        if window is None:
+            with self._lock:
+                aggregate = self._aggregates.get(job_id)
+                return aggregate.failures if aggregate is not None else 0
+        return len(self._failures(job_id, window))
+
+    def job_aggregate(self, job_id: str) -> JobAggregateRow:
+        with self._lock:
+            aggregate = self._aggregates.get(job_id)
+            values = asdict(aggregate) if aggregate is not None else {}
+        return JobAggregateRow(job_id=job_id, **values)
+
+
+__all__ = ["IndexEntry", "SegmentedEventStore"]
@@ -1,16 +1,31 @@
 from __future__ import annotations
 
-from pathlib import Path
 import json
-from typing import Iterable
+import re
+from typing import Any, Iterable, Iterator, Sequence
 
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+import orjson
+from sqlalchemy import Index, case, func, literal_column, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Field, Session, SQLModel, select
 
-from config.settings import settings
+from config.settings import Settings, settings
 from schemas.core import Event
+from store.blobs import BLOB_FIELDS, BLOB_REF_KEY, EventBlobRow, LazyPayload, decode_blob, extract_blobs, is_blob_ref
+from store.engine import create_sqlite_engine, create_tables
+from store.paging import DEFAULT_PAGE_SIZE, Cursor, page_job_rows, scan_rows
 
 
 class EventRow(SQLModel, table=True):
+    __table_args__ = (
+        # Serves the per-job, step-ordered scans in ``recent_for_job`` without a sort.
+        Index("ix_eventrow_job_step_id", "job_id", "step_id", "id"),
+        # Partial index holding only failed RUNs, for ``recent_failures``/``count_failures``.
+        Index("ix_eventrow_job_failures", "job_id", "step_id", "id", sqlite_where=text("exit_code != 0")),
+        # Ids are never reused after retention deletes the newest rows, so exports can watermark on them.
+        {"sqlite_autoincrement": True},
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     job_id: str
     step_id: int
@@ -19,29 +34,315 @@ class EventRow(SQLModel, table=True):
     payload_json: str
     started_at: float
     ended_at: float
+    # Promoted from RUN payloads so failure queries never decode payload_json; NULL for other types.
+    exit_code: int | None = None
+    cmd: str | None = None
+
+
+class JobAggregateRow(SQLModel, table=True):
+    """Per-job counters kept current by ``EventStore.append`` in the transaction that adds the events."""
+
+    job_id: str = Field(primary_key=True)
+    events: int = 0
+    runs: int = 0
+    # RUN events with a non-zero exit code, matching ``count_failures`` without a window.
+    failures: int = 0
+    edits: int = 0
+    last_step_id: int | None = None
+    # Outcome of the job's latest RUN ("ok" or "failed") and the step it ran in.
+    last_status: str | None = None
+    last_run_step_id: int | None = None
+    # Latest ``ended_at`` of the job's events; retention treats long-idle jobs as finished.
+    last_event_at: float | None = None
+    # Set by ``store.retention`` when the job's rows were moved to the cold archive.
+    archived_at: float | None = None
+
+
+# Fields ``recent_failures`` reads straight from EventRow columns; anything else is a payload key.
+EVENT_COLUMNS = ("event_id", "job_id", "step_id", "type", "cmd", "exit_code", "started_at", "ended_at")
+PAYLOAD_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+# Leading character of JSON written by the stdlib fallback. orjson never emits leading whitespace,
+# and such text must be decoded with ``json``: orjson reads integers beyond 64 bits as floats.
+STDLIB_JSON_PREFIX = " "
+
+
+def dump_json_bytes(value: Any) -> bytes:
+    """Serialize ``value`` to JSON bytes, using orjson when the value allows it.
+
+    orjson rejects a few inputs the stdlib accepts (e.g. integers beyond 64 bits); those are written
+    by ``json`` behind ``STDLIB_JSON_PREFIX`` so :func:`load_payload` decodes them losslessly.
+    """
+
+    try:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return (STDLIB_JSON_PREFIX + json.dumps(value)).encode()
+
+
+def dump_payload(payload: dict[str, Any]) -> str:
+    """Serialize an event payload to JSON text (see :func:`dump_json_bytes`)."""
+
+    return dump_json_bytes(payload).decode()
+
+
+def load_payload(data: str | bytes) -> Any:
+    """Decode JSON written by :func:`dump_payload` / :func:`dump_json_bytes`."""
+
+    if data[:1] in (STDLIB_JSON_PREFIX, STDLIB_JSON_PREFIX.encode()):
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+def _job_deltas(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fold inserted event rows into one ``JobAggregateRow`` increment per job."""
+
+    deltas: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        delta = deltas.get(row["job_id"])
+        if delta is None:
+            delta = deltas[row["job_id"]] = {
+                "job_id": row["job_id"],
+                "events": 0,
+                "runs": 0,
+                "failures": 0,
+                "edits": 0,
+                "last_step_id": row["step_id"],
+                "last_status": None,
+                "last_run_step_id": None,
+                "last_event_at": row["ended_at"],
+            }
+        delta["events"] += 1
+        delta["last_step_id"] = max(delta["last_step_id"], row["step_id"])
+        delta["last_event_at"] = max(delta["last_event_at"], row["ended_at"])
+        if row["type"] == "EDIT":
+            delta["edits"] += 1
+        elif row["type"] == "RUN":
+            delta["runs"] += 1
+            failed = row["exit_code"] is not None and row["exit_code"] != 0
+            delta["failures"] += int(failed)
+            if delta["last_run_step_id"] is None or row["step_id"] >= delta["last_run_step_id"]:
+                delta["last_run_step_id"] = row["step_id"]
+                delta["last_status"] = "failed" if failed else "ok"
+    return list(deltas.values())
+
+
+def _build_aggregate_upsert() -> Any:
+    table = JobAggregateRow.__table__  # type: ignore[attr-defined]
+    insert = sqlite_insert(table)
+    newer_run = (insert.excluded.last_run_step_id.is_not(None)) & (
+        table.c.last_run_step_id.is_(None) | (insert.excluded.last_run_step_id >= table.c.last_run_step_id)
+    )
+    return insert.on_conflict_do_update(
+        index_elements=["job_id"],
+        set_={
+            "events": table.c.events + insert.excluded.events,
+            "runs": table.c.runs + insert.excluded.runs,
+            "failures": table.c.failures + insert.excluded.failures,
+            "edits": table.c.edits + insert.excluded.edits,
+            "last_step_id": func.max(table.c.last_step_id, insert.excluded.last_step_id),
+            "last_status": case((newer_run, insert.excluded.last_status), else_=table.c.last_status),
+            "last_run_step_id": case((newer_run, insert.excluded.last_run_step_id), else_=table.c.last_run_step_id),
+            "last_event_at": func.max(
+                func.coalesce(table.c.last_event_at, insert.excluded.last_event_at), insert.excluded.last_event_at
+            ),
+        },
+    )
+
+
+def _build_blob_refs_upsert() -> Any:
+    table = EventBlobRow.__table__  # type: ignore[attr-defined]
+    insert = sqlite_insert(table)
+    return insert.on_conflict_do_update(
+        index_elements=["digest"],
+        set_={"refs": func.coalesce(table.c.refs, 0) + insert.excluded.refs},
+    )
+
+
+# Statements are built once; SQLAlchemy caches their compiled form, so each append only binds rows.
+_AGGREGATE_UPSERT = _build_aggregate_upsert()
+_BLOB_REFS_UPSERT = _build_blob_refs_upsert()
+
+
+def promoted_fields(event: Event, payload: dict[str, Any]) -> tuple[int | None, str | None]:
+    """``(exit_code, cmd)`` as stored in the promoted columns; both ``None`` for non-RUN events."""
+
+    exit_code = cmd = None
+    if event.type == "RUN":
+        raw_exit_code, raw_cmd = payload.get("exit_code"), payload.get("cmd")
+        if isinstance(raw_exit_code, int) and not isinstance(raw_exit_code, bool):
+            exit_code = raw_exit_code
+        if isinstance(raw_cmd, str):
+            cmd = raw_cmd
+    return exit_code, cmd
+
+
+def _row_values(event: Event, payload: dict[str, Any]) -> dict[str, Any]:
+    exit_code, cmd = promoted_fields(event, payload)
+    return {
+        "job_id": event.job_id,
+        "step_id": event.step_id,
+        "event_id": event.event_id,
+        "type": event.type,
+        "payload_json": dump_payload(payload),
+        "started_at": event.started_at,
+        "ended_at": event.ended_at,
+        "exit_code": exit_code,
+        "cmd": cmd,
+    }
 
 
 class EventStore:
-    def __init__(self, db_path: str | None = None) -> None:
+    """SQLite-backed append-only event log.
+
+    ``stdout``/``stderr`` values of at least ``blob_min_bytes`` characters are stored once per
+    distinct content in a separate blob table (zlib-compressed unless ``blob_compression`` is
+    ``"none"``) and the row keeps a reference. Events read back carry a :class:`LazyPayload` that
+    fetches those values only when they are accessed.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        *,
+        blob_min_bytes: int | None = None,
+        blob_compression: str | None = None,
+    ) -> None:
         self.db_path = db_path or settings.event_db_path
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.engine = create_engine(f"sqlite:///{self.db_path}")
-        SQLModel.metadata.create_all(self.engine)
+        self.blob_min_bytes = settings.event_blob_min_bytes if blob_min_bytes is None else blob_min_bytes
+        self.blob_compression = blob_compression or settings.event_blob_compression
+        self.engine = create_sqlite_engine(self.db_path)
+        added = create_tables(self.engine, EventRow, EventBlobRow, JobAggregateRow)
+        if "exit_code" in added["eventrow"] or "cmd" in added["eventrow"]:
+            self._backfill_promoted_columns()
+        self._backfill_job_aggregates()
+        if "refs" in added["eventblobrow"]:
+            self._backfill_blob_refs()
+        if "last_event_at" in added["jobaggregaterow"]:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "UPDATE jobaggregaterow SET last_event_at = "
+                        "(SELECT max(ended_at) FROM eventrow WHERE eventrow.job_id = jobaggregaterow.job_id)"
+                    )
+                )
+
+    def _backfill_blob_refs(self) -> None:
+        """Count each blob's referencing rows once, for databases created before ``refs`` existed."""
+
+        references = " UNION ALL ".join(
+            f"SELECT json_extract(payload_json, '$.{key}.\"{BLOB_REF_KEY}\"') AS digest FROM eventrow"
+            for key in BLOB_FIELDS
+        )
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(
+                    "UPDATE eventblobrow SET refs = counted.refs FROM "
+                    f"(SELECT digest, count(*) AS refs FROM ({references}) WHERE digest IS NOT NULL GROUP BY digest) "
+                    "AS counted WHERE counted.digest = eventblobrow.digest"
+                )
+            )
+            connection.execute(text("UPDATE eventblobrow SET refs = 0 WHERE refs IS NULL"))
+
+    def _backfill_promoted_columns(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(
+                    "UPDATE eventrow SET "
+                    "exit_code = CAST(json_extract(payload_json, '$.exit_code') AS INTEGER), "
+                    "cmd = json_extract(payload_json, '$.cmd') "
+                    "WHERE type = 'RUN'"
+                )
+            )
+
+    def _backfill_job_aggregates(self) -> None:
+        """Build ``JobAggregateRow`` from existing events, for databases created before it existed."""
+
+        with self.engine.begin() as connection:
+            if connection.execute(text("SELECT 1 FROM jobaggregaterow LIMIT 1")).first() is not None:
+                return
+            connection.execute(
+                text(
+                    "INSERT INTO jobaggregaterow "
+                    "(job_id, events, runs, failures, edits, last_step_id, last_status, last_run_step_id, "
+                    "last_event_at) "
+                    "SELECT job_id, count(*), sum(type = 'RUN'), "
+                    "sum(type = 'RUN' AND exit_code IS NOT NULL AND exit_code != 0), sum(type = 'EDIT'), "
+                    "max(step_id), NULL, max(CASE WHEN type = 'RUN' THEN step_id END), max(ended_at) "
+                    "FROM eventrow GROUP BY job_id"
+                )
+            )
+            connection.execute(
+                text(
+                    "UPDATE jobaggregaterow SET last_status = ("
+                    "SELECT CASE WHEN exit_code IS NOT NULL AND exit_code != 0 THEN 'failed' ELSE 'ok' END "
+                    "FROM eventrow WHERE eventrow.job_id = jobaggregaterow.job_id AND type = 'RUN' "
+                    "ORDER BY step_id DESC, id DESC LIMIT 1) "
+                    "WHERE last_run_step_id IS NOT NULL"
+                )
+            )
 
     def append(self, events: Iterable[Event]) -> None:
+        """Insert ``events`` with a single executemany in one transaction.
+
+        Payloads are serialized up front and rows go through a Core ``INSERT`` rather than ORM
+        objects, so per-event cost is one parameter tuple. Blobs and the per-job aggregates are
+        written in the same transaction.
+        """
+
+        rows: list[dict[str, Any]] = []
+        blobs: dict[str, dict[str, Any]] = {}
+        for event in events:
+            payload, event_blobs = extract_blobs(event.payload, self.blob_min_bytes, self.blob_compression)
+            for blob in event_blobs:
+                stored = blobs.setdefault(blob["digest"], {**blob, "refs": 0})
+                stored["refs"] += 1
+            rows.append(_row_values(event, payload))
+        if not rows:
+            return
+        with self.engine.begin() as connection:
+            if blobs:
+                connection.execute(_BLOB_REFS_UPSERT, list(blobs.values()))
+            connection.execute(EventRow.__table__.insert(), rows)  # type: ignore[attr-defined]
+            connection.execute(_AGGREGATE_UPSERT, _job_deltas(rows))
+
+    def job_aggregate(self, job_id: str) -> JobAggregateRow:
+        """Return the job's maintained counters (all zero for a job without events) in one key lookup."""
+
         with Session(self.engine) as session:
-            for event in events:
-                row = EventRow(
-                    job_id=event.job_id,
-                    step_id=event.step_id,
-                    event_id=event.event_id,
-                    type=event.type,
-                    payload_json=json.dumps(event.payload),
-                    started_at=event.started_at,
-                    ended_at=event.ended_at,
-                )
-                session.add(row)
-            session.commit()
+            row = session.get(JobAggregateRow, job_id)
+        return row if row is not None else JobAggregateRow(job_id=job_id)
+
+    def load_blob(self, digest: str) -> str:
+        with Session(self.engine) as session:
+            row = session.get(EventBlobRow, digest)
+        if row is None:
+            raise KeyError(f"event blob {digest} not found")
+        return decode_blob(row.codec, row.data)
+
+    def _to_event(self, row: EventRow) -> Event:
+        payload = load_payload(row.payload_json)
+        if not any(is_blob_ref(payload.get(key)) for key in BLOB_FIELDS):
+            return Event(
+                event_id=row.event_id,
+                job_id=row.job_id,
+                step_id=row.step_id,
+                type=row.type,  # type: ignore[arg-type]
+                payload=payload,
+                started_at=row.started_at,
+                ended_at=row.ended_at,
+            )
+        # Validation would copy the payload into a plain dict and load every blob up front.
+        return Event.model_construct(
+            event_id=row.event_id,
+            job_id=row.job_id,
+            step_id=row.step_id,
+            type=row.type,
+            payload=LazyPayload(payload, self.load_blob),
+            started_at=row.started_at,
+            ended_at=row.ended_at,
+        )
 
     def recent_for_job(self, job_id: str, limit: int = 200) -> list[Event]:
         with Session(self.engine) as session:
@@ -52,17 +353,133 @@ class EventStore:
                 .limit(limit)
             )
             rows = session.exec(statement).all()
-        events: list[Event] = []
-        for row in rows:
-            events.append(
-                Event(
-                    event_id=row.event_id,
-                    job_id=row.job_id,
-                    step_id=row.step_id,
-                    type=row.type,  # type: ignore[arg-type]
-                    payload=json.loads(row.payload_json),
-                    started_at=row.started_at,
-                    ended_at=row.ended_at,
-                )
+        return [self._to_event(row) for row in rows]
+
+    def page_job_events(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> tuple[list[Event], Cursor | None]:
+        """One page of the job's events in ``(step_id, id)`` order and the cursor for the next page."""
+
+        rows, cursor = page_job_rows(self.engine, EventRow, job_id, after, limit)
+        return [self._to_event(row) for row in rows], cursor
+
+    def iter_row_batches(self, after_id: int = 0, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[list[dict[str, Any]]]:
+        """Raw ``EventRow`` column dicts of all jobs with ``id > after_id``, in id (insertion) order."""
+
+        return scan_rows(self.engine, EventRow, after_id, batch_size)
+
+    def iter_job_events(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        batch_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Event]:
+        """Stream every event of ``job_id`` after ``after`` in step order, ``batch_size`` rows at a time.
+
+        Each batch is a separate short read, so no transaction stays open while the caller consumes
+        events and memory use is bounded by ``batch_size``.
+        """
+
+        cursor = after
+        while True:
+            events, cursor = self.page_job_events(job_id, cursor, batch_size)
+            yield from events
+            if cursor is None:
+                return
+
+    def _failure_filter(self, job_id: str, window: int | None) -> list[Any]:
+        table = EventRow.__table__  # type: ignore[attr-defined]
+        # A literal 0 (rather than a bound parameter) lets SQLite match the partial failure index.
+        conditions = [table.c.job_id == job_id, table.c.exit_code != literal_column("0")]
+        if window is not None:
+            latest = (
+                select(table.c.id)
+                .where(table.c.job_id == job_id)
+                .order_by(table.c.step_id.desc(), table.c.id.desc())
+                .limit(window)
             )
-        return events
+            conditions.append(table.c.id.in_(latest))
+        return conditions
+
+    def recent_failures(
+        self,
+        job_id: str,
+        limit: int = 3,
+        fields: Sequence[str] = ("step_id", "cmd", "exit_code"),
+        *,
+        window: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return the most recent failed RUN events of ``job_id`` as dicts holding only ``fields``.
+
+        Filtering and ordering happen in SQL on the promoted ``exit_code`` column. Names in
+        ``EVENT_COLUMNS`` come from columns; any other field is extracted from the payload in SQL
+        (blob-backed ``stdout``/``stderr`` are loaded only if requested). With ``window``, only the
+        job's latest ``window`` events are considered.
+        """
+
+        table = EventRow.__table__  # type: ignore[attr-defined]
+        columns: list[Any] = []
+        for field in fields:
+            if field in EVENT_COLUMNS:
+                columns.append(table.c[field])
+            elif PAYLOAD_KEY.match(field):
+                extracted = func.json_extract(table.c.payload_json, f'$."{field}"')
+                # json_quote keeps objects as JSON and quotes strings, so the value decodes losslessly.
+                columns.append(func.json_quote(extracted).label(field))
+            else:
+                raise ValueError(f"unsupported event field: {field!r}")
+        statement = (
+            select(*columns)
+            .where(*self._failure_filter(job_id, window))
+            .order_by(table.c.step_id.desc(), table.c.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        results: list[dict[str, Any]] = []
+        for row in rows:
+            record: dict[str, Any] = {}
+            for field, value in zip(fields, row):
+                if field not in EVENT_COLUMNS:
+                    value = orjson.loads(value) if value is not None else None
+                    if is_blob_ref(value):
+                        value = self.load_blob(value["$blob"])
+                record[field] = value
+            results.append(record)
+        return results
+
+    def count_failures(self, job_id: str, *, window: int | None = None) -> int:
+        """Count failed RUN events of ``job_id``, optionally among its latest ``window`` events only."""
+
+        statement = select(func.count()).select_from(EventRow).where(*self._failure_filter(job_id, window))
+        with self.engine.connect() as connection:
+            return int(connection.execute(statement).scalar_one())
+
+
+def create_event_store(config: Settings | None = None) -> Any:
+    """Build the event store selected by ``Settings.event_store_backend`` ("sqlite" or "segmented").
+
+    Both backends share the ``append``/``recent_for_job``/paging/failure-query interface; only the
+    SQLite one supports retention and SQL access.
+    """
+
+    config = config or settings
+    if config.event_store_backend == "segmented":
+        from store.event_log import SegmentedEventStore
+
+        return SegmentedEventStore(
+            config.event_segment_dir,
+            segment_max_bytes=config.event_segment_max_bytes,
+            fsync=config.event_segment_fsync,
+        )
+    if config.event_store_backend != "sqlite":
+        raise ValueError(f"unknown event store backend: {config.event_store_backend!r}")
+    return EventStore(
+        db_path=config.event_db_path,
+        blob_min_bytes=config.event_blob_min_bytes,
+        blob_compression=config.event_blob_compression,
+    )
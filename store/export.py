@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import orjson
+
+from config.settings import settings
+from store.event_store import EventStore, load_payload
+from store.trace_ledger import TraceLedger
+
+try:
+    import pyarrow as pa  # type: ignore[import]
+    import pyarrow.parquet as pq  # type: ignore[import]
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+WATERMARK_FILE = "watermark.json"
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+# Typed export columns; payload fields common to most events are flattened out of ``payload_json``.
+EVENT_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("row_id", "int64"),
+    ("job_id", "string"),
+    ("step_id", "int64"),
+    ("event_id", "string"),
+    ("type", "string"),
+    ("started_at", "float64"),
+    ("ended_at", "float64"),
+    ("duration_s", "float64"),
+    ("exit_code", "int64"),
+    ("cmd", "string"),
+    ("file_path", "string"),
+    ("timed_out", "bool"),
+    ("cancelled", "bool"),
+    ("user_cpu_s", "float64"),
+    ("sys_cpu_s", "float64"),
+    ("max_rss_kb", "int64"),
+    ("payload_json", "string"),
+)
+TRACE_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("row_id", "int64"),
+    ("job_id", "string"),
+    ("step_id", "int64"),
+    ("decision_id", "string"),
+    ("created_at", "float64"),
+    ("instruction_count", "int64"),
+    ("event_count", "int64"),
+    ("payload_json", "string"),
+)
+
+
+def _typed(value: Any, kind: str) -> Any:
+    """Coerce ``value`` to the column type, or ``None`` when it does not fit."""
+
+    if value is None:
+        return None
+    if kind == "int64":
+        if isinstance(value, int) and not isinstance(value, bool) and INT64_MIN <= value <= INT64_MAX:
+            return value
+        return None
+    if kind == "float64":
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+    if kind == "bool":
+        return value if isinstance(value, bool) else None
+    return value if isinstance(value, str) else None
+
+
+def flatten_event_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Export record for one ``EventRow`` column dict.
+
+    Blob-backed ``stdout``/``stderr`` stay as references inside ``payload_json``; exports carry the
+    structure of a run, not its full output.
+    """
+
+    payload = load_payload(row["payload_json"])
+    rusage = payload.get("rusage") if isinstance(payload.get("rusage"), dict) else {}
+    values = {
+        "row_id": row["id"],
+        "job_id": row["job_id"],
+        "step_id": row["step_id"],
+        "event_id": row["event_id"],
+        "type": row["type"],
+        "started_at": row["started_at"],
+        "ended_at": row["ended_at"],
+        "duration_s": row["ended_at"] - row["started_at"],
+        "exit_code": row["exit_code"],
+        "cmd": row["cmd"],
+        "file_path": payload.get("file_path"),
+        "timed_out": payload.get("timed_out"),
+        "cancelled": payload.get("cancelled"),
+        "user_cpu_s": rusage.get("user_cpu_s"),
+        "sys_cpu_s": rusage.get("sys_cpu_s"),
+        "max_rss_kb": rusage.get("max_rss_kb"),
+        "payload_json": row["payload_json"],
+    }
+    return {name: _typed(values[name], kind) for name, kind in EVENT_COLUMNS}
+
+
+def flatten_trace_row(row: dict[str, Any]) -> dict[str, Any]:
+    entry = load_payload(row["payload_json"])
+    program_summary = entry.get("program_summary") or {}
+    outcome_summary = entry.get("outcome_summary") or {}
+    values = {
+        "row_id": row["id"],
+        "job_id": row["job_id"],
+        "step_id": row["step_id"],
+        "decision_id": row["decision_id"],
+        "created_at": row.get("created_at"),
+        "instruction_count": program_summary.get("instruction_count"),
+        "event_count": outcome_summary.get("event_count"),
+        "payload_json": row["payload_json"],
+    }
+    return {name: _typed(values[name], kind) for name, kind in TRACE_COLUMNS}
+
+
+def load_watermark(out_dir: Path) -> dict[str, int]:
+    path = out_dir / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    return {key: int(value) for key, value in json.loads(path.read_text(encoding="utf-8")).items()}
+
+
+def save_watermark(out_dir: Path, watermark: dict[str, int]) -> None:
+    path = out_dir / WATERMARK_FILE
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(watermark, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def resolve_format(fmt: str) -> str:
+    if fmt == "auto":
+        return "parquet" if pq is not None else "ndjson"
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("parquet export requires pyarrow; install it or use --format ndjson")
+    if fmt not in ("parquet", "ndjson"):
+        raise ValueError(f"unsupported export format: {fmt!r}")
+    return fmt
+
+
+class _PartWriter:
+    """Writes one part file batch by batch; the file appears under its final name only on ``close``."""
+
+    def __init__(self, path: Path, fmt: str, columns: tuple[tuple[str, str], ...]) -> None:
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.fmt = fmt
+        self.rows = 0
+        if fmt == "parquet":
+            arrow_types = {"int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_(), "string": pa.string()}
+            self.schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+            self._writer = pq.ParquetWriter(str(self.tmp_path), self.schema, compression="zstd")
+        else:
+            self._handle = gzip.open(self.tmp_path, "wb")
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_pylist(records, schema=self.schema))
+        else:
+            self._handle.write(b"".join(orjson.dumps(record) + b"\n" for record in records))
+        self.rows += len(records)
+
+    def close(self) -> None:
+        if self.fmt == "parquet":
+            self._writer.close()
+        else:
+            self._handle.close()
+        os.replace(self.tmp_path, self.path)
+
+
+@dataclass
+class ExportReport:
+    format: str
+    rows: dict[str, int] = field(default_factory=dict)
+    files: list[str] = field(default_factory=list)
+    watermark: dict[str, int] = field(default_factory=dict)
+
+
+def _export_table(
+    name: str,
+    batches: Iterator[list[dict[str, Any]]],
+    flatten: Callable[[dict[str, Any]], dict[str, Any]],
+    columns: tuple[tuple[str, str], ...],
+    out_dir: Path,
+    fmt: str,
+    after_id: int,
+    report: ExportReport,
+    *,
+    replace_parts: bool = False,
+) -> None:
+    writer: _PartWriter | None = None
+    last_id = after_id
+    for rows in batches:
+        if writer is None:
+            # Parts are named by their first row id, so re-running after a crash before the
+            # watermark was saved overwrites the partial export instead of duplicating it.
+            suffix = "parquet" if fmt == "parquet" else "ndjson.gz"
+            (out_dir / name).mkdir(parents=True, exist_ok=True)
+            writer = _PartWriter(out_dir / name / f"part-{rows[0]['id']:012d}.{suffix}", fmt, columns)
+        writer.write([flatten(row) for row in rows])
+        last_id = rows[-1]["id"]
+    if writer is not None:
+        writer.close()
+        report.files.append(str(writer.path))
+    if replace_parts:
+        # A full export supersedes every earlier part; they are dropped only once the new part is
+        # complete, so a failed run leaves the previous export (and its watermark) usable.
+        for part in sorted((out_dir / name).glob("part-*")):
+            if writer is None or part != writer.path:
+                part.unlink()
+    report.rows[name] = 0 if writer is None else writer.rows
+    report.watermark[name] = last_id
+
+
+def export_history(
+    out_dir: str,
+    event_store: EventStore | None = None,
+    trace_ledger: TraceLedger | None = None,
+    *,
+    fmt: str = "auto",
+    incremental: bool = True,
+    batch_size: int = 10_000,
+) -> ExportReport:
+    """Stream event and trace rows into columnar part files under ``out_dir``.
+
+    With ``incremental``, only rows past the ids recorded in ``out_dir/watermark.json`` are exported,
+    and the watermark is advanced once every part file is complete. Otherwise each exported table is
+    rewritten from its first row and its earlier part files are removed. Rows are read ``batch_size``
+    at a time by id, so memory stays flat regardless of history size.
+    """
+
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    report = ExportReport(format=resolve_format(fmt))
+    watermark = load_watermark(out_path)
+    if event_store is not None:
+        after_id = watermark.get("events", 0) if incremental else 0
+        _export_table(
+            "events",
+            event_store.iter_row_batches(after_id, batch_size),
+            flatten_event_row,
+            EVENT_COLUMNS,
+            out_path,
+            report.format,
+            after_id,
+            report,
+            replace_parts=not incremental,
+        )
+    if trace_ledger is not None:
+        after_id = watermark.get("traces", 0) if incremental else 0
+        _export_table(
+            "traces",
+            trace_ledger.iter_row_batches(after_id, batch_size),
+            flatten_trace_row,
+            TRACE_COLUMNS,
+            out_path,
+            report.format,
+            after_id,
+            report,
+            replace_parts=not incremental,
+        )
+    save_watermark(out_path, {**watermark, **report.watermark})
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export DevAgent event and trace history for offline analysis.")
+    parser.add_argument("--out", default=str(Path(settings.data_dir) / "export"), help="Output directory")
+    parser.add_argument("--event-db", default=settings.event_db_path)
+    parser.add_argument("--trace-db", default=settings.trace_db_path)
+    parser.add_argument("--format", choices=("auto", "parquet", "ndjson"), default="auto")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and export everything")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    report = export_history(
+        args.out,
+        EventStore(db_path=args.event_db),
+        TraceLedger(db_path=args.trace_db),
+        fmt=args.format,
+        incremental=not args.full,
+        batch_size=args.batch_size,
+    )
+    for name, rows in report.rows.items():
+        print(f"{name}: {rows} rows (watermark {report.watermark[name]})")
+    for path in report.files:
+        print(path)
+
+
+__all__ = [
+    "EVENT_COLUMNS",
+    "ExportReport",
+    "TRACE_COLUMNS",
+    "export_history",
+    "flatten_event_row",
+    "flatten_trace_row",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Any, Iterator, Sequence, TypeVar
+
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, select
+
+# Position of a row within its job: ``(step_id, id)``, the order of the ``(job_id, step_id, id)`` index.
+Cursor = tuple[int, int]
+
+RowT = TypeVar("RowT", bound=SQLModel)
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def page_job_rows(
+    engine: Engine,
+    model: type[RowT],
+    job_id: str,
+    after: Cursor | None,
+    limit: int,
+) -> tuple[list[RowT], Cursor | None]:
+    """Return up to ``limit`` rows of ``job_id`` ordered by ``(step_id, id)`` strictly after ``after``.
+
+    Keyset pagination: each page is one index range scan, so its cost does not grow with the number
+    of rows already read. The returned cursor is ``None`` once the job has no further rows.
+    """
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    columns: Any = model
+    statement = select(model).where(columns.job_id == job_id)
+    if after is not None:
+        statement = statement.where(tuple_(columns.step_id, columns.id) > tuple_(int(after[0]), int(after[1])))
+    statement = statement.order_by(columns.step_id, columns.id).limit(limit)
+    with Session(engine) as session:
+        rows = list(session.exec(statement).all())
+    if len(rows) < limit:
+        return rows, None
+    last: Any = rows[-1]
+    return rows, (last.step_id, last.id)
+
+
+def page_job_values(
+    engine: Engine,
+    model: type[SQLModel],
+    job_id: str,
+    after: Cursor | None,
+    limit: int,
+    columns: Sequence[Any],
+) -> tuple[list[tuple[Any, ...]], Cursor | None]:
+    """Like :func:`page_job_rows` but selects only ``columns`` and returns plain value tuples.
+
+    Skips building ORM objects, for readers that want raw or partial rows.
+    """
+
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    table: Any = model.__table__  # type: ignore[attr-defined]
+    statement = select(*columns, table.c.step_id, table.c.id).where(table.c.job_id == job_id)
+    if after is not None:
+        statement = statement.where(tuple_(table.c.step_id, table.c.id) > tuple_(int(after[0]), int(after[1])))
+    statement = statement.order_by(table.c.step_id, table.c.id).limit(limit)
+    with engine.connect() as connection:
+        rows = connection.execute(statement).all()
+    values = [tuple(row[:-2]) for row in rows]
+    if len(rows) < limit:
+        return values, None
+    return values, (rows[-1][-2], rows[-1][-1])
+
+
+def scan_rows(engine: Engine, model: type[SQLModel], after_id: int, batch_size: int) -> Iterator[list[dict[str, Any]]]:
+    """Yield batches of all rows with ``id > after_id`` in id order as plain column dicts.
+
+    Used for bulk reads (exports) where building ORM objects per row would dominate the cost.
+    """
+
+    table: Any = model.__table__  # type: ignore[attr-defined]
+    while True:
+        statement = select(table).where(table.c.id > after_id).order_by(table.c.id).limit(batch_size)
+        with engine.connect() as connection:
+            rows = [dict(row) for row in connection.execute(statement).mappings()]
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+        if len(rows) < batch_size:
+            return
+
+
+def parse_cursor(value: str) -> Cursor:
+    """Parse the ``"<step_id>:<id>"`` text form used by the HTTP API."""
+
+    step_id, separator, row_id = value.partition(":")
+    if not separator:
+        raise ValueError(f"invalid cursor: {value!r}")
+    return int(step_id), int(row_id)
+
+
+def format_cursor(cursor: Cursor | None) -> str | None:
+    return None if cursor is None else f"{cursor[0]}:{cursor[1]}"
+
+
+__all__ = [
+    "Cursor",
+    "DEFAULT_PAGE_SIZE",
+    "format_cursor",
+    "page_job_rows",
+    "page_job_values",
+    "parse_cursor",
+    "scan_rows",
+]
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import gzip
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from urllib.parse import quote, unquote
+
+from loguru import logger
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection, Engine
+
+from config.settings import Settings, settings
+from schemas.core import Event
+from store.blobs import BLOB_FIELDS, BLOB_REF_KEY, decode_blob, is_blob_ref
+from store.event_store import EventStore, _job_deltas, dump_json_bytes, load_payload
+from store.trace_ledger import TraceEntry, TraceLedger
+
+ARCHIVE_SUFFIX = ".ndjson.gz"
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits applied to one store; ``None`` disables a limit.
+
+    ``max_age_s`` removes rows older than that many seconds, ``max_per_job`` keeps only each job's
+    latest rows, and ``archive_idle_after_s`` moves every row of a job with no events for that long
+    (a finished job) to the cold archive.
+    """
+
+    max_age_s: float | None = None
+    max_per_job: int | None = None
+    archive_idle_after_s: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit is not None for limit in (self.max_age_s, self.max_per_job, self.archive_idle_after_s))
+
+
+@dataclass
+class CompactionReport:
+    events_removed: int = 0
+    traces_removed: int = 0
+    blobs_removed: int = 0
+    jobs_archived: list[str] = field(default_factory=list)
+    pages_freed: int = 0
+
+
+class ColdArchive:
+    """Gzip-compressed NDJSON files holding rows removed from the stores, one file per job and kind.
+
+    Each write appends a gzip member, so files grow without being rewritten and readers see the
+    concatenation. Event payloads are stored with blob values inlined, making the archive
+    self-contained once the blob rows are garbage-collected.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def _path(self, kind: str, job_id: str) -> Path:
+        return self.root / kind / f"{quote(job_id, safe='')}{ARCHIVE_SUFFIX}"
+
+    def write(self, kind: str, records: list[dict[str, Any]]) -> None:
+        """Append ``records`` (each with a ``job_id``) and fsync before returning."""
+
+        by_job: dict[str, list[dict[str, Any]]] = {}
+        for record in records:
+            by_job.setdefault(record["job_id"], []).append(record)
+        for job_id, job_records in by_job.items():
+            path = self._path(kind, job_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = b"".join(dump_json_bytes(record) + b"\n" for record in job_records)
+            with open(path, "ab") as handle:
+                handle.write(gzip.compress(data))
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def _read(self, kind: str, job_id: str) -> Iterator[dict[str, Any]]:
+        path = self._path(kind, job_id)
+        if not path.exists():
+            return
+        with gzip.open(path, "rb") as handle:
+            for line in handle:
+                if line.strip():
+                    yield load_payload(line)
+
+    def jobs(self, kind: str = "events") -> list[str]:
+        directory = self.root / kind
+        if not directory.is_dir():
+            return []
+        return sorted(unquote(path.name[: -len(ARCHIVE_SUFFIX)]) for path in directory.glob(f"*{ARCHIVE_SUFFIX}"))
+
+    def events_for_job(self, job_id: str) -> list[Event]:
+        """Archived events of ``job_id`` in step order; a row archived twice is returned once."""
+
+        records = {record["id"]: record for record in self._read("events", job_id)}
+        ordered = sorted(records.values(), key=lambda record: (record["step_id"], record["id"]))
+        return [
+            Event(
+                event_id=record["event_id"],
+                job_id=record["job_id"],
+                step_id=record["step_id"],
+                type=record["type"],
+                payload=record["payload"],
+                started_at=record["started_at"],
+                ended_at=record["ended_at"],
+            )
+            for record in ordered
+        ]
+
+    def traces_for_job(self, job_id: str) -> list[TraceEntry]:
+        records = {record["id"]: record for record in self._read("traces", job_id)}
+        ordered = sorted(records.values(), key=lambda record: (record["step_id"], record["id"]))
+        return [TraceEntry(**record["entry"]) for record in ordered]
+
+
+class RetentionCompactor:
+    """Applies retention policies to the event and trace databases in small transactions.
+
+    Rows are selected ``batch_size`` at a time, written to the archive (when configured) and only
+    then deleted, so a crash can duplicate archived rows but never lose them. Afterwards the freed
+    pages are returned to the filesystem with ``PRAGMA incremental_vacuum``; a database created
+    before incremental auto-vacuum was enabled gets one full ``VACUUM`` to convert it.
+    """
+
+    def __init__(
+        self,
+        event_store: EventStore | None = None,
+        trace_ledger: TraceLedger | None = None,
+        *,
+        event_policy: RetentionPolicy | None = None,
+        trace_policy: RetentionPolicy | None = None,
+        archive: ColdArchive | None = None,
+        batch_size: int | None = None,
+        vacuum_pages: int | None = None,
+    ) -> None:
+        self.event_store = event_store
+        self.trace_ledger = trace_ledger
+        self.event_policy = event_policy or RetentionPolicy()
+        self.trace_policy = trace_policy or RetentionPolicy()
+        self.archive = archive
+        self.batch_size = batch_size or settings.retention_batch_size
+        self.vacuum_pages = vacuum_pages or settings.retention_vacuum_pages
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(
+        cls,
+        event_store: EventStore | None,
+        trace_ledger: TraceLedger | None,
+        config: Settings | None = None,
+    ) -> RetentionCompactor:
+        config = config or settings
+        return cls(
+            event_store,
+            trace_ledger,
+            event_policy=RetentionPolicy(
+                max_age_s=config.event_retention_max_age_s,
+                max_per_job=config.event_retention_max_per_job,
+                archive_idle_after_s=config.retention_archive_idle_after_s,
+            ),
+            trace_policy=RetentionPolicy(
+                max_age_s=config.trace_retention_max_age_s,
+                max_per_job=config.trace_retention_max_per_job,
+                archive_idle_after_s=config.retention_archive_idle_after_s,
+            ),
+            archive=ColdArchive(config.retention_archive_dir) if config.retention_archive_dir else None,
+            batch_size=config.retention_batch_size,
+            vacuum_pages=config.retention_vacuum_pages,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return (self.event_store is not None and self.event_policy.enabled) or (
+            self.trace_ledger is not None and self.trace_policy.enabled
+        )
+
+    def run_once(self, now: float | None = None) -> CompactionReport:
+        now = time.time() if now is None else now
+        report = CompactionReport()
+        idle_jobs = self._idle_jobs(now)
+        if self.event_store is not None and self.event_policy.enabled:
+            report.events_removed, report.blobs_removed = self._compact_events(self.event_policy, idle_jobs, now)
+            if report.events_removed:
+                report.pages_freed += self._vacuum(self.event_store.engine)
+        if self.trace_ledger is not None and self.trace_policy.enabled:
+            report.traces_removed = self._compact_traces(self.trace_policy, idle_jobs, now)
+            if report.traces_removed:
+                report.pages_freed += self._vacuum(self.trace_ledger.engine)
+        if idle_jobs and self.event_store is not None:
+            self._mark_archived(idle_jobs, now)
+        report.jobs_archived = idle_jobs
+        return report
+
+    def start(self, interval_s: float | None = None) -> None:
+        """Run :meth:`run_once` every ``interval_s`` seconds on a daemon thread until :meth:`stop`."""
+
+        if self._thread is not None:
+            return
+        interval = interval_s or settings.retention_interval_s
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="devagent-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except Exception:  # noqa: BLE001
+                logger.exception("Retention compaction failed")
+
+    def _idle_jobs(self, now: float) -> list[str]:
+        idle_after = self.event_policy.archive_idle_after_s
+        if idle_after is None or self.event_store is None:
+            return []
+        # Jobs already archived are skipped until they record new events.
+        statement = text(
+            "SELECT job_id FROM jobaggregaterow WHERE last_event_at < :cutoff "
+            "AND (archived_at IS NULL OR archived_at < last_event_at) ORDER BY job_id"
+        )
+        with self.event_store.engine.connect() as connection:
+            return [job_id for (job_id,) in connection.execute(statement, {"cutoff": now - idle_after})]
+
+    def _mark_archived(self, job_ids: list[str], now: float) -> None:
+        assert self.event_store is not None
+        with self.event_store.engine.begin() as connection:
+            connection.execute(
+                text("UPDATE jobaggregaterow SET archived_at = :now WHERE job_id = :job_id"),
+                [{"now": now, "job_id": job_id} for job_id in job_ids],
+            )
+
+    def _selections(
+        self,
+        engine: Engine,
+        table: str,
+        time_column: str,
+        policy: RetentionPolicy,
+        idle_jobs: list[str],
+        now: float,
+    ) -> Iterator[tuple[str, dict[str, Any], str]]:
+        """``(WHERE clause, params, ORDER BY)`` triples selecting the rows each limit removes.
+
+        Job-scoped selections are ordered like the ``(job_id, step_id, id)`` index so every batch
+        is one range scan.
+        """
+
+        for job_id in idle_jobs:
+            yield "job_id = :job_id", {"job_id": job_id}, "step_id, id"
+        if policy.max_age_s is not None:
+            yield f"{time_column} < :cutoff", {"cutoff": now - policy.max_age_s}, "id"
+        if policy.max_per_job is not None:
+            for job_id, step_id, row_id in self._per_job_cutoffs(engine, table, policy.max_per_job):
+                yield (
+                    "job_id = :job_id AND (step_id, id) <= (:step_id, :row_id)",
+                    {"job_id": job_id, "step_id": step_id, "row_id": row_id},
+                    "step_id, id",
+                )
+
+    def _per_job_cutoffs(self, engine: Engine, table: str, keep: int) -> list[tuple[str, int, int]]:
+        """``(job_id, step_id, id)`` of the newest row to remove for each job holding more than ``keep`` rows.
+
+        Computed once per run: jobs over the limit come from the maintained event counters (or one
+        grouped index scan for traces), and each cutoff is an ``OFFSET keep`` walk down the job's index.
+        """
+
+        if table == "eventrow":
+            over_limit = text("SELECT job_id FROM jobaggregaterow WHERE events > :keep ORDER BY job_id")
+        else:
+            over_limit = text(f"SELECT job_id FROM {table} GROUP BY job_id HAVING count(*) > :keep ORDER BY job_id")
+        cutoff = text(
+            f"SELECT step_id, id FROM {table} WHERE job_id = :job_id "
+            "ORDER BY step_id DESC, id DESC LIMIT 1 OFFSET :keep"
+        )
+        cutoffs: list[tuple[str, int, int]] = []
+        with engine.connect() as connection:
+            for (job_id,) in connection.execute(over_limit, {"keep": keep}).all():
+                row = connection.execute(cutoff, {"job_id": job_id, "keep": keep}).first()
+                if row is not None:
+                    cutoffs.append((job_id, row[0], row[1]))
+        return cutoffs
+
+    def _remove_batches(
+        self,
+        engine: Engine,
+        table: str,
+        selections: Iterator[tuple[str, dict[str, Any], str]],
+        archive_kind: str,
+        to_record: Any,
+        release: Callable[[Connection, list[Any]], int] | None = None,
+    ) -> tuple[int, int]:
+        """Archive and delete the selected rows; return ``(rows removed, total returned by release)``.
+
+        ``release`` runs in each batch's transaction after its DELETE, so state derived from the
+        rows (aggregates, blob references) never disagrees with the rows that remain.
+        """
+
+        removed = released = 0
+        for where, params, order in selections:
+            while True:
+                with engine.begin() as connection:
+                    rows = connection.execute(
+                        text(f"SELECT * FROM {table} WHERE {where} ORDER BY {order} LIMIT :batch"),
+                        {**params, "batch": self.batch_size},
+                    ).mappings().all()
+                    if not rows:
+                        break
+                    if self.archive is not None:
+                        self.archive.write(archive_kind, [to_record(connection, row) for row in rows])
+                    ids = [row["id"] for row in rows]
+                    connection.execute(
+                        text(f"DELETE FROM {table} WHERE id IN ({','.join(str(row_id) for row_id in ids)})")
+                    )
+                    if release is not None:
+                        released += release(connection, list(rows))
+                removed += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+        return removed, released
+
+    def _compact_events(self, policy: RetentionPolicy, idle_jobs: list[str], now: float) -> tuple[int, int]:
+        assert self.event_store is not None
+        engine = self.event_store.engine
+        selections = self._selections(engine, "eventrow", "ended_at", policy, idle_jobs, now)
+        return self._remove_batches(engine, "eventrow", selections, "events", _event_record, _release_events)
+
+    def _compact_traces(self, policy: RetentionPolicy, idle_jobs: list[str], now: float) -> int:
+        assert self.trace_ledger is not None
+        if policy.archive_idle_after_s is None:
+            idle_jobs = []
+        engine = self.trace_ledger.engine
+        selections = self._selections(engine, "tracerow", "created_at", policy, idle_jobs, now)
+        removed, _ = self._remove_batches(engine, "tracerow", selections, "traces", _trace_record)
+        return removed
+
+    def _vacuum(self, engine: Engine) -> int:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            before = connection.exec_driver_sql("PRAGMA freelist_count").scalar_one()
+            if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar_one() == 2:
+                # Each step of the pragma frees one page and ``execute`` steps a row-less statement
+                # only once; ``executescript`` runs it to completion.
+                connection.connection.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+            else:
+                # The connect pragmas already requested INCREMENTAL; VACUUM rebuilds the file with it.
+                connection.exec_driver_sql("VACUUM")
+            after = connection.exec_driver_sql("PRAGMA freelist_count").scalar_one()
+        return max(0, int(before) - int(after))
+
+
+def _release_events(connection: Connection, rows: list[Any]) -> int:
+    """Take deleted event rows out of the job counters and blob reference counts; return blobs dropped.
+
+    Counters are decremented by the same per-job deltas ``EventStore.append`` added, and a job left
+    without RUN (or any) events loses the "latest" fields describing them.
+    """
+
+    deltas = _job_deltas(rows)
+    connection.execute(
+        text(
+            "UPDATE jobaggregaterow SET events = events - :events, runs = runs - :runs, "
+            "failures = failures - :failures, edits = edits - :edits, "
+            "last_step_id = CASE WHEN events - :events > 0 THEN last_step_id END, "
+            "last_status = CASE WHEN runs - :runs > 0 THEN last_status END, "
+            "last_run_step_id = CASE WHEN runs - :runs > 0 THEN last_run_step_id END "
+            "WHERE job_id = :job_id"
+        ),
+        deltas,
+    )
+    references: dict[str, int] = {}
+    for row in rows:
+        payload = load_payload(row["payload_json"])
+        for key in BLOB_FIELDS:
+            value = payload.get(key)
+            if is_blob_ref(value):
+                references[value[BLOB_REF_KEY]] = references.get(value[BLOB_REF_KEY], 0) + 1
+    if not references:
+        return 0
+    connection.execute(
+        text("UPDATE eventblobrow SET refs = refs - :count WHERE digest = :digest"),
+        [{"digest": digest, "count": count} for digest, count in references.items()],
+    )
+    statement = text("DELETE FROM eventblobrow WHERE refs <= 0 AND digest IN :digests").bindparams(
+        bindparam("digests", expanding=True)
+    )
+    return connection.execute(statement, {"digests": list(references)}).rowcount
+
+
+def _event_record(connection: Connection, row: Any) -> dict[str, Any]:
+    payload = load_payload(row["payload_json"])
+    for key in BLOB_FIELDS:
+        value = payload.get(key)
+        if is_blob_ref(value):
+            blob = connection.execute(
+                text("SELECT codec, data FROM eventblobrow WHERE digest = :digest"),
+                {"digest": value[BLOB_REF_KEY]},
+            ).first()
+            if blob is not None:
+                payload[key] = decode_blob(blob.codec, blob.data)
+    return {
+        "id": row["id"],
+        "job_id": row["job_id"],
+        "step_id": row["step_id"],
+        "event_id": row["event_id"],
+        "type": row["type"],
+        "payload": payload,
+        "started_at": row["started_at"],
+        "ended_at": row["ended_at"],
+    }
+
+
+def _trace_record(_connection: Connection, row: Any) -> dict[str, Any]:
+    return {
+        "id": row["id"],
+        "job_id": row["job_id"],
+        "step_id": row["step_id"],
+        "created_at": row["created_at"],
+        "entry": load_payload(row["payload_json"]),
+    }
+
+
+__all__ = ["ColdArchive", "CompactionReport", "RetentionCompactor", "RetentionPolicy"]
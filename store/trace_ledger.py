@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from pathlib import Path
-import json
-from typing import Any
+import time
+from typing import Any, Iterable, Iterator, Sequence
 
+import orjson
 from pydantic import BaseModel
-from sqlmodel import Field, Session, SQLModel, create_engine, select
+from pydantic import Field as PydanticField
+from sqlalchemy import Index, func, text
+from sqlmodel import Field, Session, SQLModel, select
 
 from config.settings import settings
+from infra.timing import percentile
+from store.engine import create_sqlite_engine, create_tables
+from store.event_store import PAYLOAD_KEY, dump_payload, load_payload
+from store.paging import DEFAULT_PAGE_SIZE, Cursor, page_job_rows, page_job_values, scan_rows
+
+# Fields served straight from ``TraceRow`` columns; any other field is read from the stored entry.
+TRACE_ROW_COLUMNS = ("decision_id", "job_id", "step_id", "created_at")
 
 
 class TraceEntry(BaseModel):
@@ -17,34 +26,200 @@ class TraceEntry(BaseModel):
     decision_input_summary: dict[str, Any]
     program_summary: dict[str, Any]
     outcome_summary: dict[str, Any]
+    # Seconds spent in each pipeline stage of the step (see ``infra.timing.StageTimer``).
+    timings: dict[str, float] = PydanticField(default_factory=dict)
 
 
 class TraceRow(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_tracerow_job_step_id", "job_id", "step_id", "id"),
+        # Ids are never reused after retention deletes the newest rows, so exports can watermark on them.
+        {"sqlite_autoincrement": True},
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     decision_id: str
     job_id: str
     step_id: int
     payload_json: str
+    # Append time, used by retention; NULL for rows written before the column existed.
+    created_at: float | None = None
 
 
 class TraceLedger:
     def __init__(self, db_path: str | None = None) -> None:
         self.db_path = db_path or settings.trace_db_path
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        self.engine = create_engine(f"sqlite:///{self.db_path}")
-        SQLModel.metadata.create_all(self.engine)
+        self.engine = create_sqlite_engine(self.db_path)
+        create_tables(self.engine, TraceRow)
 
     def append(self, entry: TraceEntry) -> None:
-        payload_json = json.dumps(entry.model_dump())
-        with Session(self.engine) as session:
-            row = TraceRow(
-                decision_id=entry.decision_id,
-                job_id=entry.job_id,
-                step_id=entry.step_id,
-                payload_json=payload_json,
-            )
-            session.add(row)
-            session.commit()
+        self.append_many([entry])
+
+    def append_many(self, entries: Iterable[TraceEntry]) -> None:
+        """Insert ``entries`` with a single executemany in one transaction.
+
+        Entries are serialized with orjson up front and inserted through a Core ``INSERT``, as in
+        ``EventStore.append``.
+        """
+
+        created_at = time.time()
+        rows = [
+            {
+                "decision_id": entry.decision_id,
+                "job_id": entry.job_id,
+                "step_id": entry.step_id,
+                "payload_json": dump_payload(entry.model_dump()),
+                "created_at": created_at,
+            }
+            for entry in entries
+        ]
+        if not rows:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(TraceRow.__table__.insert(), rows)  # type: ignore[attr-defined]
+
+    def _record_columns(self, fields: Sequence[str] | None) -> list[Any]:
+        table = TraceRow.__table__  # type: ignore[attr-defined]
+        if fields is None:
+            return [table.c.payload_json]
+        columns: list[Any] = []
+        for field in fields:
+            if field in TRACE_ROW_COLUMNS:
+                columns.append(table.c[field])
+            elif PAYLOAD_KEY.match(field):
+                extracted = func.json_extract(table.c.payload_json, f'$."{field}"')
+                # json_quote keeps objects as JSON and quotes strings, so the value decodes losslessly.
+                columns.append(func.json_quote(extracted).label(field))
+            else:
+                raise ValueError(f"unsupported trace field: {field!r}")
+        return columns
+
+    @staticmethod
+    def _to_record(fields: Sequence[str] | None, values: Sequence[Any]) -> dict[str, Any]:
+        if fields is None:
+            return load_payload(values[0])
+        return {
+            field: value if field in TRACE_ROW_COLUMNS or value is None else orjson.loads(value)
+            for field, value in zip(fields, values)
+        }
+
+    def page_job_records(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        fields: Sequence[str] | None = None,
+    ) -> tuple[list[dict[str, Any]], Cursor | None]:
+        """Like :meth:`page_job_traces` but returns plain dicts without pydantic validation.
+
+        Without ``fields`` each dict is the stored entry; otherwise it holds only ``fields``, taken
+        from columns (``TRACE_ROW_COLUMNS``) or extracted from the entry in SQL.
+        """
+
+        values, cursor = page_job_values(self.engine, TraceRow, job_id, after, limit, self._record_columns(fields))
+        return [self._to_record(fields, row) for row in values], cursor
+
+    def recent_records(
+        self,
+        job_id: str,
+        limit: int = 100,
+        fields: Sequence[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Like :meth:`recent_for_job` but returns plain dicts (optionally only ``fields``), newest first."""
+
+        table = TraceRow.__table__  # type: ignore[attr-defined]
+        statement = (
+            select(*self._record_columns(fields))
+            .where(table.c.job_id == job_id)
+            .order_by(table.c.step_id.desc(), table.c.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        return [self._to_record(fields, row) for row in rows]
+
+    def entries_for_step(self, job_id: str, step_id: int) -> list[TraceEntry]:
+        """Trace entries recorded for ``(job_id, step_id)`` in append order, via the job/step index."""
+
+        table = TraceRow.__table__  # type: ignore[attr-defined]
+        statement = (
+            select(table.c.payload_json)
+            .where(table.c.job_id == job_id, table.c.step_id == step_id)
+            .order_by(table.c.id)
+        )
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        return [TraceEntry(**load_payload(row[0])) for row in rows]
+
+    def page_job_traces(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> tuple[list[TraceEntry], Cursor | None]:
+        """One page of the job's trace entries in ``(step_id, id)`` order and the next-page cursor."""
+
+        rows, cursor = page_job_rows(self.engine, TraceRow, job_id, after, limit)
+        return [TraceEntry(**load_payload(row.payload_json)) for row in rows], cursor
+
+    def iter_row_batches(self, after_id: int = 0, batch_size: int = DEFAULT_PAGE_SIZE) -> Iterator[list[dict[str, Any]]]:
+        """Raw ``TraceRow`` column dicts of all jobs with ``id > after_id``, in id (insertion) order."""
+
+        return scan_rows(self.engine, TraceRow, after_id, batch_size)
+
+    def iter_job_traces(
+        self,
+        job_id: str,
+        after: Cursor | None = None,
+        batch_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[TraceEntry]:
+        """Stream the job's trace entries after ``after``, reading ``batch_size`` rows per query."""
+
+        cursor = after
+        while True:
+            entries, cursor = self.page_job_traces(job_id, cursor, batch_size)
+            yield from entries
+            if cursor is None:
+                return
+
+    def stage_latency_percentiles(
+        self,
+        job_id: str | None = None,
+        since: float | None = None,
+        percentiles: tuple[float, ...] = (50, 95, 99),
+    ) -> dict[str, dict[str, float]]:
+        """Nearest-rank latency percentiles per pipeline stage, across jobs unless ``job_id`` is given.
+
+        Reads the ``timings`` block of each trace entry (optionally only those appended at or after
+        ``since``) and returns ``{stage: {"p50": s, "p95": s, "p99": s, "count": n}}``. Entries written
+        before timings were recorded are skipped.
+        """
+
+        clauses = ["1 = 1"]
+        params: dict[str, Any] = {}
+        if job_id is not None:
+            clauses.append("t.job_id = :job_id")
+            params["job_id"] = job_id
+        if since is not None:
+            clauses.append("t.created_at >= :since")
+            params["since"] = since
+        statement = text(
+            "SELECT s.key AS stage, s.value AS seconds "
+            "FROM tracerow AS t, json_each(t.payload_json, '$.timings') AS s "
+            f"WHERE {' AND '.join(clauses)}"
+        )
+        samples: dict[str, list[float]] = {}
+        with self.engine.connect() as connection:
+            for stage, seconds in connection.execute(statement, params):
+                samples.setdefault(stage, []).append(float(seconds))
+
+        report: dict[str, dict[str, float]] = {}
+        for stage, values in samples.items():
+            values.sort()
+            summary = {f"p{pct:g}": percentile(values, pct) for pct in percentiles}
+            summary["count"] = len(values)
+            report[stage] = summary
+        return report
 
     def recent_for_job(self, job_id: str, limit: int = 100) -> list[TraceEntry]:
         with Session(self.engine) as session:
@@ -57,6 +232,6 @@ class TraceLedger:
             rows = session.exec(statement).all()
         entries: list[TraceEntry] = []
         for row in rows:
-            data = json.loads(row.payload_json)
+            data = load_payload(row.payload_json)
             entries.append(TraceEntry(**data))
         return entries
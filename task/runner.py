@@ -33,12 +33,7 @@ class TaskRunner:
         hints: AgentHints | None = None,
     ) -> tuple[State, List[Event], DecisionInputView]:
         """Execute one MetaController-coordinated step for an existing job, advancing state and step counters."""
-        if job_id not in self._states:
-            raise ValueError(f"Unknown job_id: {job_id}")
-
-        state = self._states[job_id]
-        goal_view = self._goals[job_id]
-        start_step_id = self._step_ids[job_id] + 1
+        state, goal_view, start_step_id = self._begin_step(job_id)
 
         new_state, events, decision_input = self.controller.run_step(
             job_id=job_id,
@@ -49,8 +44,38 @@ class TaskRunner:
             start_step_id=start_step_id,
         )
 
+        self._finish_step(job_id, new_state, events)
+        return new_state, events, decision_input
+
+    async def run_step_async(
+        self,
+        job_id: str,
+        program: Program,
+        *,
+        hints: AgentHints | None = None,
+    ) -> tuple[State, List[Event], DecisionInputView]:
+        """Async counterpart of :meth:`run_step` backed by ``MetaController.run_step_async``."""
+        state, goal_view, start_step_id = self._begin_step(job_id)
+
+        new_state, events, decision_input = await self.controller.run_step_async(
+            job_id=job_id,
+            state=state,
+            program=program,
+            goal_view=goal_view,
+            hints=hints,
+            start_step_id=start_step_id,
+        )
+
+        self._finish_step(job_id, new_state, events)
+        return new_state, events, decision_input
+
+    def _begin_step(self, job_id: str) -> tuple[State, GoalView, int]:
+        if job_id not in self._states:
+            raise ValueError(f"Unknown job_id: {job_id}")
+        return self._states[job_id], self._goals[job_id], self._step_ids[job_id] + 1
+
+    def _finish_step(self, job_id: str, new_state: State, events: List[Event]) -> None:
         self._states[job_id] = new_state
         if events:
             max_step = max(event.step_id for event in events)
             self._step_ids[job_id] = max_step
-        return new_state, events, decision_input
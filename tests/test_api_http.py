@@ -99,3 +99,66 @@ def test_run_step_unknown_job_returns_404():
 
         assert resp.status_code == 404
         assert resp.json().get("detail") == "job not found"
+
+
+def test_events_and_traces_are_paged_with_cursors():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir)
+        custom_settings = Settings(
+            llm_api_key="dummy",
+            event_db_path=str(base / "events.db"),
+            memory_db_path=str(base / "memory.db"),
+            trace_db_path=str(base / "trace.db"),
+        )
+        app = create_app(settings=custom_settings)
+        client = TestClient(app)
+        goal_view = GoalView(task_type="fix_failures", natural_language_goal="Make tests pass")
+        job_id = client.post("/jobs", json={"repo_root": str(base), "goal": goal_view.model_dump()}).json()["job_id"]
+        program = Program(
+            instructions=[Instruction(kind="RUN", payload={"cmd": f'python -c "print({index})"'}) for index in range(3)]
+        )
+        for _ in range(2):
+            assert client.post(f"/jobs/{job_id}/steps", json={"program": program.model_dump(), "hints": None}).status_code == 200
+
+        first = client.get(f"/jobs/{job_id}/events", params={"limit": 4}).json()
+        second = client.get(f"/jobs/{job_id}/events", params={"limit": 4, "after": first["next_after"]}).json()
+        steps = [event["step_id"] for event in first["events"] + second["events"]]
+        assert steps == sorted(steps) and len(steps) == 6
+        assert second["next_after"] is None
+        assert first["events"][0]["payload"]["stdout"].strip() == "0"
+
+        traces = client.get(f"/jobs/{job_id}/traces", params={"limit": 1}).json()
+        assert len(traces["traces"]) == 1 and traces["next_after"] is not None
+        rest = client.get(f"/jobs/{job_id}/traces", params={"after": traces["next_after"]}).json()
+        assert len(rest["traces"]) == 1 and rest["next_after"] is None
+        steps = client.get(f"/jobs/{job_id}/traces", params={"fields": "step_id,timings"}).json()
+        assert [sorted(trace) for trace in steps["traces"]] == [["step_id", "timings"]] * 2
+        assert client.get(f"/jobs/{job_id}/traces", params={"fields": "a-b"}).status_code == 400
+
+        assert client.get(f"/jobs/{job_id}/events", params={"after": "bogus"}).status_code == 400
+        assert client.get(f"/jobs/{job_id}/events", params={"limit": 0}).status_code == 422
+
+
+def test_app_shutdown_closes_the_warm_pool():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir)
+        custom_settings = Settings(
+            llm_api_key="dummy",
+            event_db_path=str(base / "events.db"),
+            memory_db_path=str(base / "memory.db"),
+            trace_db_path=str(base / "trace.db"),
+        )
+        app = create_app(settings=custom_settings)
+        closed = []
+
+        class RecordingPool:
+            def close(self) -> None:
+                closed.append(True)
+
+        app.state.devagent.warm_pool = RecordingPool()
+
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+            assert not closed
+
+        assert closed == [True]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import io
+import tempfile
+
+from core.capture import BoundedCapture
+from core.interpret import interpret
+from schemas.core import Instruction, Program, State
+
+
+def test_bounded_capture_keeps_head_and_tail() -> None:
+    capture = BoundedCapture(max_bytes=8)
+    capture.drain(io.BytesIO(b"abcdefghijklmnopqrstuvwxyz"), chunk_size=3)
+
+    assert capture.total_bytes == 26
+    assert capture.truncated_bytes == 18
+    text = capture.text()
+    assert text.startswith("abcd")
+    assert text.endswith("wxyz")
+    assert "[... 18 bytes truncated ...]" in text
+
+
+def test_bounded_capture_without_overflow_is_verbatim() -> None:
+    capture = BoundedCapture(max_bytes=64)
+    capture.write(b"hello ")
+    capture.write(b"world")
+
+    assert capture.truncated_bytes == 0
+    assert capture.text() == "hello world"
+
+
+def test_interpret_records_truncated_bytes_for_chatty_commands() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="", repo_root=tmpdir)
+        cmd = "python -c \"import sys; sys.stdout.write('x' * 100000)\""
+        program = Program(instructions=[Instruction(kind="RUN", payload={"cmd": cmd})])
+
+        _, events = interpret(state, program, job_id="job", step_id=1, capture_max_bytes=1000)
+
+        payload = events[0].payload
+        assert payload["exit_code"] == 0
+        assert payload["stdout_truncated_bytes"] == 99000
+        assert payload["stderr_truncated_bytes"] == 0
+        assert len(payload["stdout"]) < 1100
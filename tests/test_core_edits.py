@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from core.edits import apply_line_ranges, apply_unified_diff
+from core.interpret import interpret
+from schemas.core import Instruction, Program, State
+
+ORIGINAL = "def add(a, b):\n    return a - b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+def test_apply_unified_diff_with_offset_and_no_newline_marker() -> None:
+    diff = (
+        "--- a/calc.py\n"
+        "+++ b/calc.py\n"
+        "@@ -3,2 +3,2 @@\n"
+        " def add(a, b):\n"
+        "-    return a - b\n"
+        "+    return a + b\n"
+        "@@ -6,1 +6,1 @@\n"
+        "-    return a - b\n"
+        "+    return a - b  # unchanged\n"
+        "\\ No newline at end of file\n"
+    )
+
+    patched = apply_unified_diff(ORIGINAL, diff)
+
+    assert patched == "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b  # unchanged"
+
+
+def test_apply_unified_diff_rejects_mismatched_context() -> None:
+    diff = "@@ -1,1 +1,1 @@\n-def mul(a, b):\n+def times(a, b):\n"
+    with pytest.raises(ValueError):
+        apply_unified_diff(ORIGINAL, diff)
+
+
+def test_apply_line_ranges_replaces_and_inserts() -> None:
+    updated = apply_line_ranges(
+        "a\nb\nc\n",
+        [{"start": 2, "end": 2, "content": "B"}, {"start": 4, "end": 3, "content": "d\n"}],
+    )
+    assert updated == "a\nB\nc\nd\n"
+
+    with pytest.raises(ValueError):
+        apply_line_ranges("a\nb\n", [{"start": 1, "end": 2, "content": ""}, {"start": 2, "end": 2, "content": ""}])
+
+
+def test_interpret_patch_edit(tmp_path: Path) -> None:
+    (tmp_path / "calc.py").write_text(ORIGINAL, encoding="utf-8")
+    diff = "@@ -2 +2 @@\n-    return a - b\n+    return a + b\n"
+    program = Program(instructions=[Instruction(kind="EDIT", payload={"file_path": "calc.py", "patch": diff})])
+
+    _, events = interpret(State(git_head="", repo_root=str(tmp_path)), program, job_id="job", step_id=1)
+
+    assert "error" not in events[0].payload
+    assert (tmp_path / "calc.py").read_text(encoding="utf-8").splitlines()[1] == "    return a + b"
+
+
+def test_interpret_edit_group_is_all_or_nothing(tmp_path: Path) -> None:
+    (tmp_path / "keep.py").write_text("original\n", encoding="utf-8")
+    program = Program(
+        instructions=[
+            Instruction(kind="EDIT", payload={"file_path": "keep.py", "content": "changed\n", "edit_group": "fix"}),
+            Instruction(kind="EDIT", payload={"file_path": "new.py", "content": "created\n", "edit_group": "fix"}),
+            Instruction(
+                kind="EDIT",
+                payload={"file_path": "keep.py", "patch": "@@ -1 +1 @@\n-missing\n+x\n", "edit_group": "fix"},
+            ),
+        ]
+    )
+
+    state, events = interpret(State(git_head="", repo_root=str(tmp_path)), program, job_id="job", step_id=1)
+
+    assert [evt.step_id for evt in events] == [1, 2, 3]
+    assert all("error" in evt.payload and evt.payload["edit_group"] == "fix" for evt in events)
+    assert (tmp_path / "keep.py").read_text(encoding="utf-8") == "original\n"
+    assert not (tmp_path / "new.py").exists()
+    assert not list(tmp_path.glob(".*.tmp"))
+    assert state.diagnostics.last_error
+
+
+def test_interpret_content_edit_overwrites_non_utf8_file(tmp_path: Path) -> None:
+    (tmp_path / "legacy.txt").write_bytes(b"caf\xe9\n")
+    program = Program(instructions=[Instruction(kind="EDIT", payload={"file_path": "legacy.txt", "content": "cafe\n"})])
+
+    _, events = interpret(State(git_head="", repo_root=str(tmp_path)), program, job_id="job", step_id=1)
+
+    assert "error" not in events[0].payload
+    assert (tmp_path / "legacy.txt").read_text(encoding="utf-8") == "cafe\n"
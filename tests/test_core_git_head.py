@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from core import interpret as interpret_module
+from core.git_head import GitHeadResolver
+from core.interpret import interpret
+from schemas.core import Instruction, Program, State
+
+
+def _git(repo: Path, *args: str) -> str:
+    out = subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return out.stdout.strip()
+
+
+@pytest.fixture()
+def repo(tmp_path: Path) -> Path:
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "a.txt").write_text("one", encoding="utf-8")
+    _git(tmp_path, "add", "a.txt")
+    _git(tmp_path, "commit", "-q", "-m", "first")
+    return tmp_path
+
+
+def test_resolver_matches_rev_parse_and_tracks_new_commits(repo: Path) -> None:
+    resolver = GitHeadResolver()
+    assert resolver.resolve(str(repo)) == _git(repo, "rev-parse", "HEAD")
+
+    (repo / "a.txt").write_text("two", encoding="utf-8")
+    _git(repo, "commit", "-q", "-am", "second")
+    assert resolver.resolve(str(repo)) == _git(repo, "rev-parse", "HEAD")
+
+
+def test_resolver_reads_packed_refs_and_detached_head(repo: Path) -> None:
+    resolver = GitHeadResolver()
+    head = _git(repo, "rev-parse", "HEAD")
+    _git(repo, "pack-refs", "--all")
+    assert resolver.resolve(str(repo)) == head
+
+    _git(repo, "checkout", "-q", "--detach")
+    assert resolver.resolve(str(repo / "subdir-that-does-not-matter")) == head
+    assert resolver.resolve(str(repo)) == head
+
+
+def test_resolver_returns_none_outside_repo(tmp_path: Path) -> None:
+    assert GitHeadResolver().resolve(str(tmp_path)) is None
+
+
+def test_interpret_skips_head_resolution_for_meta_only_programs(monkeypatch, tmp_path: Path) -> None:
+    calls: list[str] = []
+
+    def fake_resolve(repo_root: str) -> str:
+        calls.append(repo_root)
+        return "resolved"
+
+    monkeypatch.setattr(interpret_module, "resolve_git_head", fake_resolve)
+
+    meta_only = Program(instructions=[Instruction(kind="META", payload={})])
+    state, _ = interpret(State(git_head="known", repo_root=str(tmp_path)), meta_only, job_id="job", step_id=1)
+    assert state.git_head == "known"
+    assert calls == []
+
+    edit = Program(instructions=[Instruction(kind="EDIT", payload={"file_path": "x.txt", "content": "x"})])
+    state, _ = interpret(state, edit, job_id="job", step_id=2)
+    assert state.git_head == "resolved"
+    assert calls == [str(tmp_path)]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from core.interpret import interpret
+from core.run_cache import RunResultCache
+from schemas.core import Instruction, Program, State
+
+COUNTING_CMD = "python -c \"open('runs.log', 'a').write('x'); print(open('src.py').read())\""
+
+
+def _run_count(repo: Path) -> int:
+    return len((repo / "runs.log").read_text(encoding="utf-8"))
+
+
+def test_cache_hit_skips_subprocess_until_an_edit(tmp_path: Path) -> None:
+    (tmp_path / "src.py").write_text("v1", encoding="utf-8")
+    cache = RunResultCache()
+    state = State(git_head="", repo_root=str(tmp_path))
+    run = Program(instructions=[Instruction(kind="RUN", payload={"cmd": COUNTING_CMD})])
+
+    state, first = interpret(state, run, job_id="job", step_id=1, run_cache=cache)
+    state, second = interpret(state, run, job_id="job", step_id=2, run_cache=cache)
+
+    assert "cached" not in first[0].payload
+    assert second[0].payload["cached"] is True
+    assert second[0].payload["stdout"] == first[0].payload["stdout"]
+    assert _run_count(tmp_path) == 1
+
+    edit = Instruction(kind="EDIT", payload={"file_path": "src.py", "content": "v2"})
+    program = Program(instructions=[edit, run.instructions[0]])
+    state, events = interpret(state, program, job_id="job", step_id=3, run_cache=cache)
+
+    assert "cached" not in events[1].payload
+    assert events[1].payload["stdout"].strip() == "v2"
+    assert _run_count(tmp_path) == 2
+
+
+def test_cache_opt_out_per_instruction(tmp_path: Path) -> None:
+    (tmp_path / "src.py").write_text("v1", encoding="utf-8")
+    cache = RunResultCache()
+    state = State(git_head="", repo_root=str(tmp_path))
+    run = Program(instructions=[Instruction(kind="RUN", payload={"cmd": COUNTING_CMD, "cache": False})])
+
+    interpret(state, run, job_id="job", step_id=1, run_cache=cache)
+    _, events = interpret(state, run, job_id="job", step_id=2, run_cache=cache)
+
+    assert "cached" not in events[0].payload
+    assert _run_count(tmp_path) == 2
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used_entries_by_size() -> None:
+    cache = RunResultCache(max_bytes=10)
+    cache.put("a", {"stdout": "aaaa", "stderr": "", "exit_code": 0})
+    cache.put("b", {"stdout": "bbbb", "stderr": "", "exit_code": 0})
+    assert cache.get("a") is not None
+
+    cache.put("c", {"stdout": "cccc", "stderr": "", "exit_code": 1})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c")["exit_code"] == 1
+    assert cache.size_bytes == 8
+
+    cache.put("timeout", {"stdout": "", "stderr": "", "exit_code": -1, "timed_out": True})
+    assert cache.get("timeout") is None
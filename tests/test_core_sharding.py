@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+from core.interpret import interpret, interpret_async
+from core.sharding import balance_shards, merge_shard_results
+from memory.store import MemoryStore
+from schemas.core import ExecutionPolicy, Instruction, Program, State
+
+PYTEST_CMD = "python -m pytest -q -p no:cacheprovider"
+
+
+def _result(exit_code: int, stdout: str, started_at: float, ended_at: float) -> dict[str, object]:
+    return {
+        "stdout": stdout,
+        "stderr": "",
+        "exit_code": exit_code,
+        "stdout_truncated_bytes": 0,
+        "stderr_truncated_bytes": 0,
+        "timed_out": False,
+        "rusage": {"user_cpu_s": 0.5, "max_rss_kb": 100},
+        "started_at": started_at,
+        "ended_at": ended_at,
+    }
+
+
+def test_balance_shards_places_slowest_tests_on_lightest_shard() -> None:
+    node_ids = ["t::a", "t::b", "t::c", "t::d", "t::new"]
+    durations = {"t::a": 8.0, "t::b": 4.0, "t::c": 3.0, "t::d": 1.0}
+
+    shards = balance_shards(node_ids, durations, 2)
+
+    assert shards == [(["t::a", "t::d"], 9.0), (["t::b", "t::c", "t::new"], 10.5)]
+    assert balance_shards(["t::a"], {}, 4) == [(["t::a"], 1.0)]
+
+
+def test_merge_shard_results_reports_first_failure_and_summary() -> None:
+    shards = [(["t::a"], 1.0), (["t::b", "t::c"], 2.0)]
+    results = [_result(0, "ok\n", 10.0, 11.0), _result(1, "boom\n", 10.5, 12.0)]
+
+    merged = merge_shard_results(shards, results)
+
+    assert merged["exit_code"] == 1
+    assert merged["stdout"] == "===== shard 1/2: 1 tests =====\nok\n===== shard 2/2: 2 tests =====\nboom\n"
+    assert merged["started_at"] == 10.0 and merged["ended_at"] == 12.0
+    assert merged["rusage"] == {"user_cpu_s": 1.0, "max_rss_kb": 100}
+    assert [shard["tests"] for shard in merged["shards"]] == [1, 2]
+
+
+def test_sharded_pytest_run_emits_one_event_and_records_durations(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "test_sample.py").write_text(
+        "".join(f"def test_{index}():\n    assert {index} != 3\n\n" for index in range(5)),
+        encoding="utf-8",
+    )
+    store = MemoryStore(str(tmp_path / "memory.db"))
+    state = State(git_head="", repo_root=str(repo))
+    program = Program(instructions=[Instruction(kind="RUN", payload={"cmd": PYTEST_CMD, "shards": 2})])
+
+    state, events = interpret(state, program, "job", 1, duration_store=store)
+
+    assert len(events) == 1
+    payload = events[0].payload
+    assert payload["exit_code"] == 1
+    assert [shard["tests"] for shard in payload["shards"]] == [3, 2]
+    assert payload["stdout"].count("===== shard") == 2
+    assert "1 failed" in payload["stdout"]
+    node_ids = [f"test_sample.py::test_{index}" for index in range(5)]
+    assert set(store.node_durations(str(repo), node_ids)) == set(node_ids)
+
+
+def test_shards_are_ignored_for_non_pytest_commands(tmp_path: Path) -> None:
+    state = State(git_head="", repo_root=str(tmp_path))
+    program = Program(
+        instructions=[Instruction(kind="RUN", payload={"cmd": "python -c \"print('plain')\"", "shards": 4})]
+    )
+
+    _, events = interpret(state, program, "job", 1)
+
+    assert events[0].payload["stdout"].strip() == "plain"
+    assert "shards" not in events[0].payload
+
+
+def test_fail_fast_group_cancels_a_sharded_member(tmp_path: Path) -> None:
+    (tmp_path / "test_slow.py").write_text(
+        "".join(f"def test_{index}():\n    import time\n    time.sleep(20)\n\n" for index in range(4)),
+        encoding="utf-8",
+    )
+    fail_cmd = "python -c \"import sys, time; time.sleep(2); sys.exit(1)\""
+    program = Program(
+        instructions=[
+            Instruction(kind="RUN", payload={"cmd": PYTEST_CMD, "shards": 2, "parallel_group": "g"}),
+            Instruction(kind="RUN", payload={"cmd": fail_cmd, "parallel_group": "g"}),
+        ],
+        policy=ExecutionPolicy(mode="fail_fast"),
+    )
+    for run in (
+        lambda state: interpret(state, program, "job", 1),
+        lambda state: asyncio.run(interpret_async(state, program, "job", 1)),
+    ):
+        started = time.monotonic()
+        _, events = run(State(git_head="head", repo_root=str(tmp_path)))
+
+        assert time.monotonic() - started < 15
+        assert events[0].payload["cancelled"] is True
+        assert events[1].payload["exit_code"] == 1
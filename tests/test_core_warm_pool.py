@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from core.interpret import interpret, interpret_async
+from core.warm_pool import WarmRunnerPool, _WarmWorker
+from schemas.core import ExecutionPolicy, Instruction, Program, State
+
+HELPER_MODULE = "import sys\nVALUE = 'v1'\n"
+RUNNER_MODULE = (
+    "import sys\n"
+    "import helper\n"
+    "print(helper.VALUE, *sys.argv[1:])\n"
+    "sys.exit(3 if 'fail' in sys.argv else 0)\n"
+)
+
+
+def _repo(tmp_path: Path) -> Path:
+    (tmp_path / "helper.py").write_text(HELPER_MODULE, encoding="utf-8")
+    (tmp_path / "runner.py").write_text(RUNNER_MODULE, encoding="utf-8")
+    return tmp_path
+
+
+def test_matches_only_module_commands_with_configured_prefix() -> None:
+    pool = WarmRunnerPool(prefixes=["python -m pytest"], preload=[])
+
+    assert pool.matches("python -m pytest -q tests/test_x.py")
+    assert not pool.matches("python -m pyflakes .")
+    assert not pool.matches("python -c 'import pytest'")
+    assert not pool.matches("pytest -q")
+
+
+def test_warm_run_reports_output_exit_code_and_reuses_worker(tmp_path: Path) -> None:
+    repo = _repo(tmp_path)
+    pool = WarmRunnerPool(prefixes=["python -m runner"], preload=["json"], size=1)
+    try:
+        first = pool.run("python -m runner a b", str(repo), timeout=10)
+        second = pool.run("python -m runner fail", str(repo), timeout=10)
+        assert len(pool._idle[str(repo)]) == 1
+    finally:
+        pool.close()
+
+    assert first is not None and second is not None
+    assert first["warm"] is True
+    assert first["stdout"].strip() == "v1 a b"
+    assert first["exit_code"] == 0
+    assert second["exit_code"] == 3
+    assert "user_cpu_s" in first["rusage"]
+
+
+def test_edit_to_preloaded_module_recycles_workers(tmp_path: Path) -> None:
+    repo = _repo(tmp_path)
+    pool = WarmRunnerPool(prefixes=["python -m runner"], preload=["helper"], size=1)
+    state = State(git_head="", repo_root=str(repo))
+    run = Instruction(kind="RUN", payload={"cmd": "python -m runner"})
+    edit = Instruction(
+        kind="EDIT",
+        payload={"file_path": "helper.py", "content": HELPER_MODULE.replace("v1", "v2")},
+    )
+    try:
+        state, events = interpret(state, Program(instructions=[run, edit, run]), "job", 1, warm_pool=pool)
+        assert not pool.notify_edit(str(repo), "runner.py")
+    finally:
+        pool.close()
+
+    assert events[0].payload["warm"] is True
+    assert events[0].payload["stdout"].strip() == "v1"
+    assert events[2].payload["warm"] is True
+    assert events[2].payload["stdout"].strip() == "v2"
+
+
+def test_warm_run_timeout_kills_child_and_keeps_worker(tmp_path: Path) -> None:
+    (tmp_path / "sleeper.py").write_text("import time\ntime.sleep(30)\n", encoding="utf-8")
+    pool = WarmRunnerPool(prefixes=["python -m sleeper"], preload=[], size=1)
+    try:
+        result = pool.run("python -m sleeper", str(tmp_path), timeout=0.5)
+        assert result is not None
+        assert result["timed_out"] is True
+        assert result["exit_code"] == -1
+        assert pool._idle[str(tmp_path)][0].alive()
+    finally:
+        pool.close()
+
+
+SLEEPER_MODULE = "import os, sys, time\nopen(sys.argv[1], 'w').write(str(os.getpid()))\ntime.sleep(30)\n"
+
+
+def _wait_gone(pid: int, timeout: float = 5.0) -> bool:
+    """True once ``pid`` has exited (a zombie awaiting its reaper counts as gone)."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            os.kill(pid, 0)
+            if Path(f"/proc/{pid}/stat").read_text().split(")")[-1].split()[0] == "Z":
+                return True
+        except (ProcessLookupError, FileNotFoundError):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _wait_pid(path: Path) -> int:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if path.exists() and path.read_text():
+            return int(path.read_text())
+        time.sleep(0.02)
+    raise AssertionError("sleeper did not start")
+
+
+def test_cancel_kills_the_forked_command_and_keeps_worker(tmp_path: Path) -> None:
+    (tmp_path / "sleeper.py").write_text(SLEEPER_MODULE, encoding="utf-8")
+    pid_file = tmp_path / "pid"
+    pool = WarmRunnerPool(prefixes=["python -m sleeper"], preload=[], size=1)
+    cancel = threading.Event()
+    threading.Thread(target=lambda: (_wait_pid(pid_file), cancel.set()), daemon=True).start()
+    try:
+        result = pool.run(f"python -m sleeper {pid_file}", str(tmp_path), timeout=30, cancel=cancel)
+        assert result is not None
+        assert result["cancelled"] is True and result["exit_code"] == -1
+        assert _wait_gone(_wait_pid(pid_file))
+        assert pool._idle[str(tmp_path)][0].alive()
+    finally:
+        pool.close()
+
+
+def test_unanswered_request_kills_the_forked_command(tmp_path: Path) -> None:
+    (tmp_path / "sleeper.py").write_text(SLEEPER_MODULE, encoding="utf-8")
+    pid_file = tmp_path / "pid"
+    for name in ("out", "err"):
+        (tmp_path / name).touch()
+    worker = _WarmWorker(str(tmp_path), [], sys.executable)
+    try:
+        # The worker enforces its own 30s timeout; the pool gives up first, as with a wedged worker.
+        request = {
+            "module": "sleeper",
+            "args": [str(pid_file)],
+            "cwd": str(tmp_path),
+            "timeout": 30,
+            "stdout_path": str(tmp_path / "out"),
+            "stderr_path": str(tmp_path / "err"),
+        }
+        assert worker.request(request, timeout=1.0) is None
+        assert _wait_gone(_wait_pid(pid_file))
+    finally:
+        worker.close()
+
+
+def test_fail_fast_group_cancels_a_warm_member(tmp_path: Path) -> None:
+    (tmp_path / "sleeper.py").write_text(SLEEPER_MODULE, encoding="utf-8")
+    pid_file = tmp_path / "pid"
+    fail_cmd = "python -c \"import sys, time; time.sleep(1); sys.exit(1)\""
+    program = Program(
+        instructions=[
+            Instruction(kind="RUN", payload={"cmd": f"python -m sleeper {pid_file}", "parallel_group": "g"}),
+            Instruction(kind="RUN", payload={"cmd": fail_cmd, "parallel_group": "g"}),
+        ],
+        policy=ExecutionPolicy(mode="fail_fast"),
+    )
+    pool = WarmRunnerPool(prefixes=["python -m sleeper"], preload=[], size=1)
+    try:
+        for run in (
+            lambda state: interpret(state, program, "job", 1, warm_pool=pool),
+            lambda state: asyncio.run(interpret_async(state, program, "job", 1, warm_pool=pool)),
+        ):
+            pid_file.unlink(missing_ok=True)
+            started = time.monotonic()
+            _, events = run(State(git_head="head", repo_root=str(tmp_path)))
+
+            assert time.monotonic() - started < 10
+            assert events[0].payload["warm"] is True and events[0].payload["cancelled"] is True
+            assert events[1].payload["exit_code"] == 1
+            assert _wait_gone(_wait_pid(pid_file))
+    finally:
+        pool.close()
@@ -3,10 +3,13 @@ from __future__ import annotations
 import os
 import tempfile
 
+import pytest
+
 from schemas.core import Event
 from store.event_store import EventStore
 from store.trace_ledger import TraceEntry, TraceLedger
 from infra.observer import NullObserver, UnifiedObserver
+from infra.write_behind import WriteBehindError
 
 
 def _sample_event(job_id: str, step_id: int) -> Event:
@@ -73,3 +76,74 @@ def test_null_observer_is_noop() -> None:
 
         assert event_store.recent_for_job("job-2") == []
         assert trace_ledger.recent_for_job("job-2") == []
+
+
+def _trace_entry(job_id: str, step_id: int) -> TraceEntry:
+    return TraceEntry(
+        decision_id=f"dec-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        decision_input_summary={},
+        program_summary={},
+        outcome_summary={},
+    )
+
+
+def test_write_behind_observer_commits_in_background_and_flushes() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        event_store = EventStore(db_path=os.path.join(tmpdir, "events.db"))
+        trace_ledger = TraceLedger(db_path=os.path.join(tmpdir, "trace.db"))
+        observer = UnifiedObserver(
+            event_store=event_store,
+            trace_ledger=trace_ledger,
+            write_behind=True,
+            write_behind_max_pending=4,
+            write_behind_max_batch=2,
+        )
+
+        for step_id in range(1, 11):
+            observer.record_events([_sample_event("job-wb", step_id)])
+            observer.record_trace(_trace_entry("job-wb", step_id))
+
+        assert observer.flush(timeout=10)
+        assert observer.writer is not None and observer.writer.pending == 0
+        assert len(event_store.recent_for_job("job-wb")) == 10
+        assert len(trace_ledger.recent_for_job("job-wb")) == 10
+        observer.close()
+        observer.close()
+
+
+def test_write_behind_close_persists_queued_records_and_rejects_new_ones() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        event_store = EventStore(db_path=os.path.join(tmpdir, "events.db"))
+        observer = UnifiedObserver(event_store=event_store, write_behind=True)
+
+        observer.record_events([_sample_event("job-close", step_id) for step_id in range(50)])
+        observer.close()
+
+        assert len(event_store.recent_for_job("job-close")) == 50
+        with pytest.raises(WriteBehindError):
+            observer.record_events([_sample_event("job-close", 51)])
+
+
+def test_write_behind_surfaces_writer_failures_and_keeps_records() -> None:
+    class FlakyStore:
+        def __init__(self) -> None:
+            self.fail = True
+            self.appended: list[Event] = []
+
+        def append(self, events: list[Event]) -> None:
+            if self.fail:
+                raise OSError("disk full")
+            self.appended.extend(events)
+
+    store = FlakyStore()
+    observer = UnifiedObserver(event_store=store, write_behind=True)  # type: ignore[arg-type]
+
+    observer.record_events([_sample_event("job-err", 1)])
+    with pytest.raises(WriteBehindError):
+        observer.flush(timeout=10)
+
+    store.fail = False
+    observer.close()
+    assert [event.step_id for event in store.appended] == [1]
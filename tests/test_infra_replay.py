@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from agent.devagent import DevAgent
+from infra.observer import UnifiedObserver
+from infra.replay import load_recorded_steps, replay_job
+from memory.store import MemoryStore
+from meta.controller import MetaController
+from meta.llm_meta_planner import LLMMetaPlanner
+from schemas.core import Event, Instruction, Program, State
+from schemas.views import AgentHints, DevAgentMode, GoalView
+from store.event_store import EventStore
+from store.trace_ledger import TraceEntry, TraceLedger
+
+
+def _record_job(base: Path) -> tuple[EventStore, TraceLedger]:
+    event_store = EventStore(db_path=str(base / "events.db"))
+    trace_ledger = TraceLedger(db_path=str(base / "trace.db"))
+    memory_store = MemoryStore(db_path=str(base / "memory.db"))
+    observer = UnifiedObserver(event_store=event_store, trace_ledger=trace_ledger)
+    devagent = DevAgent(mode=DevAgentMode.OPTIMIZED_STRUCTURED, observer=observer, memory_store=memory_store)
+    controller = MetaController(
+        devagent=devagent,
+        planner=LLMMetaPlanner(),
+        memory_store=memory_store,
+        trace_ledger=trace_ledger,
+        event_store=event_store,
+    )
+    goal_view = GoalView(task_type="fix_failures", natural_language_goal="fix failing tests")
+    state = State(git_head="", repo_root=str(base))
+    programs = [
+        Program(instructions=[Instruction(kind="RUN", payload={"cmd": 'python -c "import sys; sys.exit(1)"'})]),
+        Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": 'python -c "print(1)"'}),
+                Instruction(kind="RUN", payload={"cmd": 'python -c "print(2)"'}),
+            ]
+        ),
+    ]
+    step_id = 1
+    for program in programs:
+        state, events, _ = controller.run_step(
+            job_id="job-1",
+            state=state,
+            program=program,
+            goal_view=goal_view,
+            hints=AgentHints(),
+            start_step_id=step_id,
+        )
+        step_id = max(event.step_id for event in events) + 1
+    return event_store, trace_ledger
+
+
+def test_replay_re_drives_recorded_job_without_subprocesses(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    event_store, trace_ledger = _record_job(tmp_path / "recorded")
+
+    def no_subprocess(*args: object, **kwargs: object) -> None:
+        raise AssertionError("replay must not spawn processes")
+
+    monkeypatch.setattr("core.interpret.subprocess.Popen", no_subprocess)
+    report = replay_job("job-1", event_store, trace_ledger, str(tmp_path / "replay"))
+
+    assert [step.step_id for step in report.steps] == [1, 3]
+    assert report.diverged_steps == []
+    for step in report.steps:
+        assert {"plan", "interpret", "persist", "ingest", "focus", "select", "total"} <= set(step.timings)
+        assert set(step.allocations) >= {"plan", "interpret", "select"}
+    summary = report.stage_summary()
+    assert summary["interpret"]["p99"] >= summary["interpret"]["p50"] >= 0
+    replayed = EventStore(db_path=str(tmp_path / "replay" / "events.db"))
+    assert [event.payload["exit_code"] for event in replayed.iter_job_events("job-1")] == [1, 0, 0]
+
+
+def test_replay_flags_decision_input_divergence(tmp_path: Path) -> None:
+    event_store = EventStore(db_path=str(tmp_path / "events.db"))
+    trace_ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    event_store.append(
+        [
+            Event(
+                event_id="e1",
+                job_id="job",
+                step_id=1,
+                type="RUN",
+                payload={"cmd": "pytest", "exit_code": 0, "stdout": "", "stderr": ""},
+                started_at=1.0,
+                ended_at=2.0,
+            )
+        ]
+    )
+    trace_ledger.append(
+        TraceEntry(
+            decision_id="d1",
+            job_id="job",
+            step_id=1,
+            decision_input_summary={"goal_task_type": "fix_failures", "files": ["gone.py"], "mode": "optimized_structured"},
+            program_summary={"instruction_count": 1},
+            outcome_summary={"event_count": 1, "git_head": "abc"},
+        )
+    )
+
+    steps = load_recorded_steps("job", event_store, trace_ledger)
+    report = replay_job("job", event_store, trace_ledger, str(tmp_path / "replay"), trace_allocations=False)
+
+    assert [len(step.events) for step in steps] == [1]
+    assert report.diverged_steps == [1]
+    recorded, replayed = report.steps[0].divergence["decision_input_summary"]
+    assert recorded["files"] == ["gone.py"] and replayed["files"] != ["gone.py"]
+    assert "program_summary" not in report.steps[0].divergence
+    assert report.steps[0].allocations == {}
+
+
+def test_empty_step_owns_no_events_and_later_steps_keep_theirs(tmp_path: Path) -> None:
+    event_store = EventStore(db_path=str(tmp_path / "events.db"))
+    trace_ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+
+    def run(step_id: int) -> Event:
+        return Event(
+            event_id=f"e{step_id}",
+            job_id="job",
+            step_id=step_id,
+            type="RUN",
+            payload={"cmd": f"cmd-{step_id}", "exit_code": 0},
+            started_at=1.0,
+            ended_at=2.0,
+        )
+
+    def trace(decision_id: str, step_id: int, event_count: int) -> TraceEntry:
+        return TraceEntry(
+            decision_id=decision_id,
+            job_id="job",
+            step_id=step_id,
+            decision_input_summary={},
+            program_summary={"instruction_count": event_count},
+            outcome_summary={"event_count": event_count},
+        )
+
+    # Step ids as TaskRunner assigns them: the empty step does not advance the counter.
+    event_store.append([run(1), run(2), run(3), run(4)])
+    trace_ledger.append_many([trace("d1", 2, 2), trace("d2", 3, 0), trace("d3", 3, 1), trace("d4", 4, 1)])
+
+    steps = load_recorded_steps("job", event_store, trace_ledger)
+
+    assert [[event.step_id for event in step.events] for step in steps] == [[1, 2], [], [3], [4]]
+    assert [step.start_step_id for step in steps] == [1, 3, 3, 4]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from infra.timing import StageTimer, percentile
+from store.trace_ledger import TraceEntry, TraceLedger
+
+
+def test_stage_timer_accumulates_repeated_stages_in_entry_order() -> None:
+    ticks = iter([0.0, 1.0, 1.0, 1.5, 2.0, 4.0])
+    timer = StageTimer(clock=lambda: next(ticks))
+
+    with timer.stage("interpret"):
+        pass
+    with timer.stage("persist"):
+        pass
+    with timer.stage("interpret"):
+        pass
+
+    assert timer.as_dict() == {"interpret": 3.0, "persist": 0.5}
+
+
+def test_percentile_uses_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+
+
+def _entry(job_id: str, step_id: int, timings: dict[str, float]) -> TraceEntry:
+    return TraceEntry(
+        decision_id=f"{job_id}-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        decision_input_summary={},
+        program_summary={},
+        outcome_summary={},
+        timings=timings,
+    )
+
+
+def test_stage_latency_percentiles_aggregate_across_jobs(tmp_path: Path) -> None:
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    for step_id in range(1, 21):
+        ledger.append(_entry("a", step_id, {"interpret": step_id / 10, "select": 0.01}))
+    ledger.append(_entry("b", 1, {"interpret": 5.0}))
+    ledger.append(_entry("b", 2, {}))
+
+    report = ledger.stage_latency_percentiles()
+    only_b = ledger.stage_latency_percentiles(job_id="b")
+
+    assert report["interpret"] == {"p50": 1.1, "p95": 2.0, "p99": 5.0, "count": 21}
+    assert report["select"]["count"] == 20
+    assert only_b == {"interpret": {"p50": 5.0, "p95": 5.0, "p99": 5.0, "count": 1}}
+    assert ledger.stage_latency_percentiles(since=10**12) == {}
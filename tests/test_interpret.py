@@ -1,7 +1,10 @@
+import asyncio
 import tempfile
+import time
+from pathlib import Path
 
-from schemas.core import Event, Instruction, Program, State, StateDiagnostics
-from core.interpret import interpret
+from schemas.core import Event, ExecutionPolicy, Instruction, Program, State, StateDiagnostics
+from core.interpret import interpret, interpret_async
 
 
 def test_interpret_run_sets_diagnostics_with_command():
@@ -32,3 +35,149 @@ def test_interpret_meta_applies_typed_updates_only():
         assert updated_state.diagnostics.last_error == "oops"
         assert events[0].payload == payload_valid
         assert events[1].payload == payload_invalid
+
+
+def test_interpret_parallel_group_runs_concurrently_in_program_order():
+    sleep_cmd = "python -c \"import time; time.sleep(0.5); print('{name}')\""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="head", repo_root=tmpdir)
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": sleep_cmd.format(name=name), "parallel_group": "checks"})
+                for name in ("a", "b", "c")
+            ]
+            + [Instruction(kind="META", payload={"memory_mode": "OK"})]
+        )
+        started = time.monotonic()
+        _, events = interpret(state, program, job_id="job", step_id=5, max_workers=3)
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 1.4
+        assert [evt.step_id for evt in events] == [5, 6, 7, 8]
+        assert [evt.payload.get("stdout", "").strip() for evt in events[:3]] == ["a", "b", "c"]
+        assert events[3].type == "META"
+
+
+def test_interpret_parallel_group_requires_adjacent_matching_groups():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="head", repo_root=tmpdir)
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": "python -c \"print(1)\"", "parallel_group": "g1"}),
+                Instruction(kind="RUN", payload={"cmd": "python -c \"import sys; sys.exit(3)\"", "parallel_group": "g2"}),
+                Instruction(kind="RUN", payload={"cmd": "python -c \"print(3)\"", "parallel_group": "g1"}),
+            ]
+        )
+        updated_state, events = interpret(state, program, job_id="job", step_id=1)
+
+        assert [evt.step_id for evt in events] == [1, 2, 3]
+        assert [evt.payload["exit_code"] for evt in events] == [0, 3, 0]
+        assert "exit_code=3" in updated_state.diagnostics.last_error
+
+
+def test_interpret_async_matches_sync_event_semantics():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": "python -c \"print('a')\"", "parallel_group": "g"}),
+                Instruction(kind="RUN", payload={"cmd": "python -c \"import sys; sys.exit(2)\"", "parallel_group": "g"}),
+                Instruction(kind="EDIT", payload={"file_path": "out.txt", "content": "data"}),
+                Instruction(kind="META", payload={"memory_mode": "DOWN"}),
+            ]
+        )
+        sync_state, sync_events = interpret(State(git_head="", repo_root=tmpdir), program, job_id="job", step_id=1)
+        async_state, async_events = asyncio.run(
+            interpret_async(State(git_head="", repo_root=tmpdir), program, job_id="job", step_id=1)
+        )
+
+        assert [(evt.type, evt.step_id) for evt in async_events] == [(evt.type, evt.step_id) for evt in sync_events]
+        assert [evt.payload.get("exit_code") for evt in async_events] == [0, 2, None, None]
+        assert async_events[0].payload["stdout"].strip() == "a"
+        assert async_state.diagnostics == sync_state.diagnostics
+
+
+def test_interpret_run_records_child_resource_usage():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="", repo_root=tmpdir)
+        cmd = "python -c \"sum(i * i for i in range(2000000)); data = bytearray(32 * 1024 * 1024)\""
+        program = Program(instructions=[Instruction(kind="RUN", payload={"cmd": cmd})])
+
+        _, events = interpret(state, program, job_id="job", step_id=1)
+
+        rusage = events[0].payload["rusage"]
+        assert rusage["user_cpu_s"] > 0
+        assert rusage["max_rss_kb"] >= 32 * 1024
+        assert {"sys_cpu_s", "block_in", "block_out", "voluntary_ctx_switches", "involuntary_ctx_switches"} <= set(
+            rusage
+        )
+
+
+def test_interpret_fail_fast_skips_remaining_instructions():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="head", repo_root=tmpdir)
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": "python -c \"import sys; sys.exit(2)\""}),
+                Instruction(kind="RUN", payload={"cmd": "python -c \"print('never')\""}),
+                Instruction(kind="EDIT", payload={"file_path": "out.txt", "content": "x"}),
+            ],
+            policy=ExecutionPolicy(mode="fail_fast"),
+        )
+        updated_state, events = interpret(state, program, job_id="job", step_id=1)
+        assert [event.type for event in events] == ["RUN", "SYSTEM", "SYSTEM"]
+        assert [event.step_id for event in events] == [1, 2, 3]
+        assert events[1].payload["status"] == "skipped"
+        assert events[1].payload["cmd"] == "python -c \"print('never')\""
+        assert events[2].payload["file_path"] == "out.txt"
+        assert "exited with 2" in events[2].payload["reason"]
+        assert "exit_code=2" in updated_state.diagnostics.last_error
+        assert not (Path(tmpdir) / "out.txt").exists()
+
+
+def test_interpret_stop_on_exit_codes_only_stops_on_listed_codes():
+    exit_cmd = "python -c \"import sys; sys.exit({code})\""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = State(git_head="head", repo_root=tmpdir)
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": exit_cmd.format(code=1)}),
+                Instruction(kind="RUN", payload={"cmd": exit_cmd.format(code=5)}),
+                Instruction(kind="RUN", payload={"cmd": exit_cmd.format(code=0)}),
+            ],
+            policy=ExecutionPolicy(mode="stop_on_exit_codes", stop_on_exit_codes=[5]),
+        )
+        _, events = interpret(state, program, job_id="job", step_id=1)
+        assert [event.type for event in events] == ["RUN", "RUN", "SYSTEM"]
+        assert [event.payload.get("exit_code") for event in events[:2]] == [1, 5]
+
+
+def test_interpret_fail_fast_cancels_running_group_members():
+    # The slow member spawns a grandchild holding the output pipes; killing only the direct child
+    # would leave the step waiting on it.
+    slow_cmd = (
+        "python -c \"import subprocess, sys; "
+        "subprocess.run([sys.executable, '-c', 'import time; time.sleep(20)'])\""
+    )
+    fail_cmd = "python -c \"import sys, time; time.sleep(0.3); sys.exit(1)\""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": slow_cmd, "parallel_group": "g"}),
+                Instruction(kind="RUN", payload={"cmd": fail_cmd, "parallel_group": "g"}),
+                Instruction(kind="RUN", payload={"cmd": "python -c \"print('after')\""}),
+            ],
+            policy=ExecutionPolicy(mode="fail_fast"),
+        )
+        for run in (
+            lambda state: interpret(state, program, job_id="job", step_id=1),
+            lambda state: asyncio.run(interpret_async(state, program, job_id="job", step_id=1)),
+        ):
+            state = State(git_head="head", repo_root=tmpdir)
+            started = time.monotonic()
+            updated_state, events = run(state)
+            assert time.monotonic() - started < 10
+            assert events[0].payload["cancelled"] is True
+            assert events[1].payload["exit_code"] == 1
+            assert "cancelled" not in events[1].payload
+            assert events[2].type == "SYSTEM"
+            assert "exit_code=1" in updated_state.diagnostics.last_error
@@ -1,44 +1,85 @@
 from __future__ import annotations
 
+import asyncio
+import io
+import time
 from pathlib import Path
 
 import pytest
 
-from core.interpret import interpret
+from core.interpret import _run_command_async, _run_command_safe, interpret
 from schemas.core import Instruction, Program, State
 
 
 def test_run_uses_shell_false_and_timeout(monkeypatch, tmp_path):
     captured: dict[str, object] = {}
 
-    def fake_run(cmd, shell, cwd, capture_output, text, check, timeout):  # type: ignore[override]
-        captured.update({
-            "cmd": cmd,
-            "shell": shell,
-            "timeout": timeout,
-            "cwd": cwd,
-            "capture_output": capture_output,
-            "text": text,
-            "check": check,
-        })
+    class FakePopen:
+        def __init__(self, cmd, **kwargs):  # type: ignore[no-untyped-def]
+            captured.update({"cmd": cmd, **kwargs})
+            self.pid = 0
+            self.stdout = io.BytesIO(b"hi\n")
+            self.stderr = io.BytesIO(b"")
 
-        class Result:
-            stdout = ""
-            stderr = ""
-            returncode = 0
+    def fake_wait_for_exit(proc, timeout, cancel=None):  # type: ignore[no-untyped-def]
+        captured["timeout"] = timeout
+        return 0, None, False, False
 
-        return Result()
+    monkeypatch.setattr("core.interpret.subprocess.Popen", FakePopen)
+    monkeypatch.setattr("core.interpret.wait_for_exit", fake_wait_for_exit)
+    monkeypatch.setattr("core.interpret.kill_session", lambda pid: None)
 
-    monkeypatch.patch("core.interpret.subprocess.run", fake_run)
-
-    state = State(git_head="", repo_root=str(tmp_path))
-    program = Program(instructions=[Instruction(kind="RUN", payload={"cmd": "echo hi"})])
-
-    interpret(state, program, job_id="job", step_id=1)
+    result = _run_command_safe("echo hi", str(tmp_path))
 
     assert isinstance(captured.get("cmd"), list)
     assert captured.get("shell") is False
     assert captured.get("timeout") is not None and captured["timeout"] > 0
+    assert result["stdout"] == "hi\n"
+
+
+def test_run_timeout_kills_command(tmp_path):
+    result = _run_command_safe('python -c "import time; time.sleep(10)"', str(tmp_path), timeout=0.5)
+
+    assert result["exit_code"] == -1
+    assert "[timeout expired]" in str(result["stderr"])
+
+
+def test_run_returns_when_command_exits_despite_background_children_holding_pipes(tmp_path):
+    started = time.monotonic()
+    result = _run_command_safe('sh -c "sleep 8 & echo hi"', str(tmp_path), timeout=1)
+
+    assert time.monotonic() - started < 3
+    assert result["exit_code"] == 0 and result["stdout"] == "hi\n"
+    assert result["timed_out"] is False
+
+
+def test_run_timeout_holds_when_a_detached_process_keeps_the_pipes_open(tmp_path):
+    started = time.monotonic()
+    result = _run_command_safe('sh -c "setsid sleep 4 & sleep 0.3; echo hi"', str(tmp_path), timeout=1)
+
+    assert time.monotonic() - started < 3
+    assert result["exit_code"] == -1 and result["timed_out"] is True
+    assert result["stdout"] == "hi\n"
+
+
+def test_async_run_returns_when_command_exits_despite_background_children_holding_pipes(tmp_path):
+    started = time.monotonic()
+    result = asyncio.run(_run_command_async('sh -c "sleep 8 & echo hi"', str(tmp_path), timeout=1))
+
+    assert time.monotonic() - started < 3
+    assert result["exit_code"] == 0 and result["stdout"] == "hi\n"
+    assert result["timed_out"] is False
+
+
+def test_async_run_timeout_holds_when_a_detached_process_keeps_the_pipes_open(tmp_path):
+    started = time.monotonic()
+    result = asyncio.run(
+        _run_command_async('sh -c "setsid sleep 4 & sleep 0.3; echo hi"', str(tmp_path), timeout=1)
+    )
+
+    assert time.monotonic() - started < 3
+    assert result["exit_code"] == -1 and result["timed_out"] is True
+    assert result["stdout"] == "hi\n"
 
 
 def test_edit_rejects_path_traversal(tmp_path):
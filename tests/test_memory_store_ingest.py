@@ -78,3 +78,49 @@ def test_memory_ingest_defaults_and_run_success_failure():
         assert failure_item.kind == "error_pattern"
         assert "exit_code=2" in failure_item.snippet
         assert failure_item.dimensions["exit_code"] == 2
+
+
+def test_memory_ingest_writes_one_batch_and_isolates_bad_items(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = MemoryStore(db_path=f"{tmpdir}/memory.db")
+        ingest = MemoryIngestPipeline(store)
+        batches = []
+        original = store.upsert_items
+
+        def recording_upsert(items):
+            items = list(items)
+            batches.append(len(items))
+            original(items)
+
+        monkeypatch.setattr(store, "upsert_items", recording_upsert)
+        events = [
+            Event(
+                event_id=f"run-{index}",
+                job_id="job",
+                step_id=index,
+                type="RUN",
+                payload={"exit_code": index % 2, "stderr": ""},
+                started_at=0.0,
+                ended_at=0.1,
+            )
+            for index in range(50)
+        ]
+        ingest.ingest(events)
+
+        assert batches == [50]
+        assert store.stats().counts_by_kind == {"run_config": 25, "error_pattern": 25}
+
+        bad = Event(
+            event_id="run-bad",
+            job_id="job",
+            step_id=99,
+            type="RUN",
+            payload={"exit_code": {1, 2}, "stderr": ""},
+            started_at=0.0,
+            ended_at=0.1,
+        )
+        good = events[0].model_copy(update={"event_id": "run-good"})
+        ingest.ingest([bad, good])
+
+        assert store.get_item("run-good") is not None
+        assert store.get_item("run-bad") is None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import tempfile
+import threading
 
 import pytest
 
@@ -54,3 +55,118 @@ def test_upsert_requires_json_serializable_fields() -> None:
 
         with pytest.raises(ValueError):
             store.upsert_item(bad_item)
+
+
+def test_stats_counts_are_maintained_on_upsert_and_backfilled() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "memory.db")
+        store = MemoryStore(db_path=db_path)
+        for item_id, kind in [("a", "run_config"), ("b", "run_config"), ("c", "error_pattern")]:
+            store.upsert_item(
+                MemoryItem(id=item_id, kind=kind, pointer={}, snippet="", dimensions={}, stats={})  # type: ignore[arg-type]
+            )
+        store.upsert_item(
+            MemoryItem(id="a", kind="error_pattern", pointer={}, snippet="", dimensions={}, stats={})  # type: ignore[arg-type]
+        )
+
+        assert store.stats().counts_by_kind == {"run_config": 1, "error_pattern": 2}
+        assert store.stats().recent_activity_score == 3.0
+
+        with store.engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM memorykindcountrow")
+        assert MemoryStore(db_path=db_path).stats().counts_by_kind == {"run_config": 1, "error_pattern": 2}
+
+
+def _item(item_id: str, **dimensions: object) -> MemoryItem:
+    return MemoryItem(id=item_id, kind="run_config", pointer={}, snippet="", dimensions=dimensions, stats={})
+
+
+def test_dimension_filters_run_in_sql_and_see_matches_beyond_limit() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = MemoryStore(db_path=os.path.join(tmpdir, "memory.db"))
+        for index in range(150):
+            store.upsert_item(_item(f"noise-{index}", file_path="src/noise.py", attempt=index))
+        store.upsert_item(_item("hit-1", file_path="src/hit.py", attempt=1, flaky=True))
+        store.upsert_item(_item("hit-2", file_path="src/hit.py", attempt=2))
+
+        assert [item.id for item in store.query_by_dimensions({"file_path": "src/hit.py"}, limit=10)] == ["hit-1", "hit-2"]
+        assert [item.id for item in store.query_by_dimensions({"file_path": "src/hit.py", "attempt": "2"})] == ["hit-2"]
+        assert [item.id for item in store.query_by_dimensions({"file_path": "src/hit.py", "flaky": None})] == ["hit-2"]
+        assert [item.id for item in store.query_by_dimensions({"flaky": True})] == ["hit-1"]
+        assert len(store.query_by_dimensions({}, limit=5)) == 5
+
+        store.upsert_item(_item("hit-1", file_path="src/moved.py"))
+        assert [item.id for item in store.query_by_dimensions({"file_path": "src/hit.py"})] == ["hit-2"]
+        assert [item.id for item in store.query_by_dimensions({"file_path": "src/moved.py"})] == ["hit-1"]
+
+        with store.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT item_id FROM memorydimensionrow WHERE key = 'file_path' AND value = 'x'"
+            ).all()
+        assert "ix_memorydimensionrow_key_value" in " ".join(str(row[-1]) for row in plan)
+
+
+def test_dimension_table_is_backfilled_for_existing_databases() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "memory.db")
+        store = MemoryStore(db_path=db_path)
+        store.upsert_item(_item("a", file_path="src/a.py", layer="L1"))
+        store.upsert_item(_item("b", file_path="src/b.py"))
+        with store.engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE memorydimensionrow")
+
+        reopened = MemoryStore(db_path=db_path)
+
+        assert [item.id for item in reopened.query_by_dimensions({"layer": "L1"})] == ["a"]
+        assert [item.id for item in reopened.query_by_dimensions({"file_path": "src/b.py"})] == ["b"]
+
+
+def test_upsert_items_batches_kinds_and_dimensions_in_one_transaction() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = MemoryStore(db_path=os.path.join(tmpdir, "memory.db"))
+        store.upsert_item(_item("a", file_path="src/old.py"))
+        store.upsert_items(
+            [
+                MemoryItem(id="a", kind="error_pattern", pointer={}, snippet="", dimensions={"file_path": "src/a.py"}, stats={}),
+                _item("b", file_path="src/b.py"),
+                _item("c", file_path="src/c.py"),
+                MemoryItem(id="c", kind="module_history", pointer={}, snippet="v2", dimensions={"layer": "L2"}, stats={}),
+            ]
+        )
+        store.upsert_items([])
+
+        assert store.stats().counts_by_kind == {"error_pattern": 1, "run_config": 1, "module_history": 1}
+        assert store.get_item("c").snippet == "v2"  # type: ignore[union-attr]
+        assert store.query_by_dimensions({"file_path": "src/old.py"}) == []
+        assert store.query_by_dimensions({"file_path": "src/c.py"}) == []
+        assert [item.id for item in store.query_by_dimensions({"layer": "L2"})] == ["c"]
+
+        with pytest.raises(ValueError):
+            store.upsert_items([_item("d"), _item("e", invalid={1})])
+        assert store.get_item("d") is None
+        assert sum(store.stats().counts_by_kind.values()) == 3
+
+
+def test_concurrent_upsert_items_keep_kind_counts_exact() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = MemoryStore(db_path=os.path.join(tmpdir, "memory.db"))
+        kinds = ("run_config", "error_pattern")
+
+        def writer(worker: int) -> None:
+            for round_ in range(20):
+                kind = kinds[(worker + round_) % 2]
+                store.upsert_items(
+                    MemoryItem(id=f"item-{index}", kind=kind, pointer={}, snippet="", dimensions={}, stats={})  # type: ignore[arg-type]
+                    for index in range(50)
+                )
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with store.engine.connect() as connection:
+            actual = dict(connection.exec_driver_sql("SELECT kind, count(*) FROM memoryrow GROUP BY kind").all())
+        assert {kind: count for kind, count in store.stats().counts_by_kind.items() if count} == actual
+        assert sum(actual.values()) == 50
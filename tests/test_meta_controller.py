@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import tempfile
+import threading
 from pathlib import Path
 
 from agent.devagent import DevAgent
 from infra.observer import UnifiedObserver
-from meta.controller import MetaController
+from meta.controller import RECENT_EVENT_WINDOW, MetaController
 from meta.llm_meta_planner import LLMMetaPlanner
 from schemas.core import Event, Instruction, Program, State
 from schemas.views import AgentHints, DevAgentMode, GoalView
@@ -63,6 +65,14 @@ def test_meta_controller_run_step_smoke() -> None:
         assert recent
         assert recent[0].job_id == "job-1"
         assert recent[0].step_id >= 1
+        run_resources = recent[0].outcome_summary["run_resources"]
+        assert run_resources[0]["cmd"] == 'python -c "import sys; sys.exit(1)"'
+        assert run_resources[0]["user_cpu_s"] >= 0
+        timings = recent[0].timings
+        for stage in ("plan", "interpret", "persist", "ingest", "focus", "select", "rerank", "stats", "total"):
+            assert timings[stage] >= 0
+        assert timings["total"] >= timings["interpret"]
+        assert set(trace_ledger.stage_latency_percentiles()["interpret"]) == {"p50", "p95", "p99", "count"}
 
 
 def test_meta_controller_state_summary_uses_event_store() -> None:
@@ -124,3 +134,107 @@ def test_meta_controller_state_summary_uses_event_store() -> None:
         meta_input = planner.captured_meta_input
         assert meta_input is not None
         assert meta_input.state_summary.failing_tests_count >= 1
+
+
+def test_meta_controller_state_summary_ignores_failures_outside_recent_window() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir)
+        event_store = EventStore(db_path=str(base / "events.db"))
+        trace_ledger = TraceLedger(db_path=str(base / "trace.db"))
+        memory_store = MemoryStore(db_path=str(base / "memory.db"))
+        observer = UnifiedObserver(event_store=event_store, trace_ledger=trace_ledger)
+        devagent = DevAgent(
+            mode=DevAgentMode.OPTIMIZED_STRUCTURED,
+            observer=observer,
+            memory_store=memory_store,
+            vector_store=None,
+        )
+        controller = MetaController(
+            devagent=devagent,
+            planner=LLMMetaPlanner(),
+            memory_store=memory_store,
+            trace_ledger=trace_ledger,
+            event_store=event_store,
+        )
+
+        def run_event(step_id: int, exit_code: int) -> Event:
+            return Event(
+                event_id=f"evt-{step_id}",
+                job_id="job-1",
+                step_id=step_id,
+                type="RUN",
+                payload={"cmd": "pytest", "exit_code": exit_code},
+                started_at=0.0,
+                ended_at=0.1,
+            )
+
+        event_store.append([run_event(1, 1)])
+        assert controller._build_state_summary("job-1").failing_tests_count == 1
+
+        event_store.append([run_event(step_id, 0) for step_id in range(2, RECENT_EVENT_WINDOW + 2)])
+        assert controller._build_state_summary("job-1").failing_tests_count == 0
+
+
+class GatedObserver(UnifiedObserver):
+    """Blocks persistence of the ``slow`` job's events until the test opens the gate."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def record_events(self, events: list[Event]) -> None:
+        if events and events[0].job_id == "slow":
+            self.entered.set()
+            assert self.gate.wait(timeout=10)
+        super().record_events(events)
+
+
+def test_concurrent_async_steps_do_not_wait_on_each_others_persistence() -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir)
+        event_store = EventStore(db_path=str(base / "events.db"))
+        trace_ledger = TraceLedger(db_path=str(base / "trace.db"))
+        memory_store = MemoryStore(db_path=str(base / "memory.db"))
+        observer = GatedObserver(event_store=event_store, trace_ledger=trace_ledger)
+        devagent = DevAgent(
+            mode=DevAgentMode.OPTIMIZED_STRUCTURED,
+            observer=observer,
+            memory_store=memory_store,
+            vector_store=None,
+        )
+        controller = MetaController(
+            devagent=devagent,
+            planner=LLMMetaPlanner(),
+            memory_store=memory_store,
+            trace_ledger=trace_ledger,
+            event_store=event_store,
+        )
+        program = Program(instructions=[Instruction(kind="RUN", payload={"cmd": 'python -c "pass"'})])
+        goal_view = GoalView(task_type="fix_failures", natural_language_goal="fix failing tests")
+
+        def step(job_id: str):
+            return controller.run_step_async(
+                job_id=job_id,
+                state=State(git_head="", repo_root=str(base)),
+                program=program,
+                goal_view=goal_view,
+            )
+
+        async def run_both() -> bool:
+            slow = asyncio.create_task(step("slow"))
+            assert await asyncio.to_thread(observer.entered.wait, 10)
+            await asyncio.wait_for(step("fast"), timeout=10)
+            fast_finished_first = not slow.done()
+            observer.gate.set()
+            await slow
+            return fast_finished_first
+
+        try:
+            assert asyncio.run(run_both())
+        finally:
+            observer.gate.set()
+
+        assert len(event_store.recent_for_job("fast")) == 1
+        assert len(event_store.recent_for_job("slow")) == 1
+        assert len(trace_ledger.recent_for_job("slow")) == 1
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from sqlalchemy import text
+
+from memory.store import MemoryStore
+from store.event_store import EventStore
+from store.trace_ledger import TraceLedger
+
+
+def _tables(db_path: Path) -> set[str]:
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+    return {name for (name,) in rows}
+
+
+def test_store_connections_use_wal_and_tuned_pragmas(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"))
+
+    with store.engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA cache_size")).scalar() < 0
+
+
+def test_each_store_creates_only_its_own_tables(tmp_path: Path) -> None:
+    EventStore(db_path=str(tmp_path / "events.db"))
+    TraceLedger(db_path=str(tmp_path / "trace.db"))
+    MemoryStore(db_path=str(tmp_path / "memory.db"))
+
+    assert _tables(tmp_path / "events.db") == {"eventrow", "eventblobrow", "jobaggregaterow"}
+    assert _tables(tmp_path / "trace.db") == {"tracerow"}
+    assert _tables(tmp_path / "memory.db") == {"memoryrow", "memorydimensionrow", "memorykindcountrow", "nodedurationrow"}
+
+
+def test_recent_for_job_uses_composite_index_added_to_existing_db(tmp_path: Path) -> None:
+    db_path = tmp_path / "events.db"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE eventrow (id INTEGER PRIMARY KEY, job_id VARCHAR, step_id INTEGER, event_id VARCHAR, "
+            "type VARCHAR, payload_json VARCHAR, started_at FLOAT, ended_at FLOAT)"
+        )
+
+    store = EventStore(db_path=str(db_path))
+
+    with store.engine.connect() as connection:
+        plan = connection.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM eventrow WHERE job_id = 'job' "
+                "ORDER BY step_id DESC, id DESC LIMIT 200"
+            )
+        ).fetchall()
+    details = " ".join(str(row[-1]) for row in plan)
+    assert "ix_eventrow_job_step_id" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_existing_tables_are_rebuilt_so_deleted_ids_are_not_reused(tmp_path: Path) -> None:
+    db_path = tmp_path / "trace.db"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE tracerow (id INTEGER PRIMARY KEY, decision_id VARCHAR, job_id VARCHAR, "
+            "step_id INTEGER, payload_json VARCHAR)"
+        )
+        connection.execute("CREATE INDEX ix_tracerow_job_step_id ON tracerow (job_id, step_id, id)")
+        connection.executemany(
+            "INSERT INTO tracerow (id, decision_id, job_id, step_id, payload_json) VALUES (?, ?, 'job', ?, '{}')",
+            [(1, "d1", 1), (2, "d2", 2), (3, "d3", 3)],
+        )
+
+    ledger = TraceLedger(db_path=str(db_path))
+    with ledger.engine.begin() as connection:
+        connection.execute(text("DELETE FROM tracerow WHERE id = 3"))
+        connection.execute(
+            text("INSERT INTO tracerow (decision_id, job_id, step_id, payload_json) VALUES ('d4', 'job', 4, '{}')")
+        )
+        rows = connection.execute(text("SELECT id, decision_id, created_at FROM tracerow ORDER BY id")).all()
+
+    assert rows == [(1, "d1", None), (2, "d2", None), (4, "d4", None)]
+    with sqlite3.connect(db_path) as connection:
+        created = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'tracerow'").fetchone()[0]
+        indexes = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "AUTOINCREMENT" in created
+    assert "ix_tracerow_job_step_id" in indexes
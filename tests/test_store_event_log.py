@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from config.settings import Settings
+from schemas.core import Event
+from store.event_log import SegmentedEventStore
+from store.event_store import EventStore, create_event_store
+
+
+def _event(step_id: int, exit_code: int | None = 0, job_id: str = "job", **payload: object) -> Event:
+    body: dict[str, object] = {"cmd": f"cmd-{step_id}", **payload}
+    if exit_code is not None:
+        body["exit_code"] = exit_code
+    return Event(
+        event_id=f"{job_id}-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        type="RUN",
+        payload=body,
+        started_at=1.0,
+        ended_at=2.0,
+    )
+
+
+def _batches() -> list[list[Event]]:
+    return [
+        [_event(1, 1, stderr="first"), _event(2, 0)],
+        [_event(4, 0), _event(3, 2, stderr="E" * 300)],
+        [_event(1, 0, job_id="other")],
+        [_event(5, 0).model_copy(update={"type": "EDIT", "payload": {"file_path": "a.py"}})],
+    ]
+
+
+def test_segmented_store_matches_sqlite_store_reads(tmp_path: Path) -> None:
+    segmented = SegmentedEventStore(str(tmp_path / "segments"), segment_max_bytes=300)
+    sqlite = EventStore(db_path=str(tmp_path / "events.db"))
+    for batch in _batches():
+        segmented.append(batch)
+        sqlite.append(batch)
+
+    assert len(list((tmp_path / "segments").glob("seg-*.log"))) > 1
+    for limit in (1, 3, 200):
+        assert segmented.recent_for_job("job", limit) == sqlite.recent_for_job("job", limit)
+    assert segmented.recent_failures("job", fields=("step_id", "cmd", "exit_code", "stderr")) == (
+        sqlite.recent_failures("job", fields=("step_id", "cmd", "exit_code", "stderr"))
+    )
+    assert segmented.count_failures("job", window=3) == sqlite.count_failures("job", window=3) == 1
+    seg_aggregate, sql_aggregate = segmented.job_aggregate("job"), sqlite.job_aggregate("job")
+    for name in ("events", "runs", "failures", "edits", "last_step_id", "last_status", "last_run_step_id"):
+        assert getattr(seg_aggregate, name) == getattr(sql_aggregate, name)
+
+    page, cursor = segmented.page_job_events("job", limit=2)
+    assert [event.step_id for event in page] == [1, 2]
+    assert [event.step_id for event in segmented.iter_job_events("job", after=cursor, batch_size=2)] == [3, 4, 5]
+    rows = [row for batch in segmented.iter_row_batches(after_id=4, batch_size=2) for row in batch]
+    assert [(row["id"], row["job_id"], row["exit_code"]) for row in rows] == [(5, "other", 0), (6, "job", None)]
+
+
+def test_segmented_store_reopens_and_recovers_a_torn_tail(tmp_path: Path) -> None:
+    directory = tmp_path / "segments"
+    store = SegmentedEventStore(str(directory))
+    store.append([_event(1), _event(2, 1)])
+    store.append([_event(3)])
+    store.close()
+
+    segment = directory / "seg-000001.log"
+    index = directory / "seg-000001.idx"
+    # Simulate a crash: the last record's index line is lost and a partial record follows it.
+    lines = index.read_bytes().splitlines(keepends=True)
+    index.write_bytes(b"".join(lines[:-1]) + lines[-1][:5])
+    with open(segment, "ab") as handle:
+        handle.write(b"\x10\x00\x00\x00partial")
+
+    reopened = SegmentedEventStore(str(directory))
+
+    assert [event.step_id for event in reopened.recent_for_job("job")] == [3, 2, 1]
+    assert reopened.job_aggregate("job").failures == 1
+    reopened.append([_event(4)])
+    assert [event.step_id for event in SegmentedEventStore(str(directory)).recent_for_job("job", 2)] == [4, 3]
+
+
+def test_create_event_store_selects_backend_from_settings(tmp_path: Path) -> None:
+    sqlite = create_event_store(Settings(event_db_path=str(tmp_path / "events.db")))
+    segmented = create_event_store(
+        Settings(event_store_backend="segmented", event_segment_dir=str(tmp_path / "segments"))
+    )
+
+    assert isinstance(sqlite, EventStore)
+    assert isinstance(segmented, SegmentedEventStore)
+    with pytest.raises(ValueError):
+        create_event_store(Settings(event_store_backend="kafka"))
+
+
+def test_segmented_store_round_trips_integers_beyond_64_bits(tmp_path: Path) -> None:
+    directory = str(tmp_path / "segments")
+    store = SegmentedEventStore(directory)
+    store.append([_event(1, big=2**70)])
+    store.close()
+
+    assert SegmentedEventStore(directory).recent_for_job("job")[0].payload["big"] == 2**70
+
+
+def test_segmented_store_keeps_job_index_ordered_for_cursor_reads(tmp_path: Path) -> None:
+    store = SegmentedEventStore(str(tmp_path / "segments"))
+    store.append([_event(step, step % 4) for step in (5, 1, 3)])
+    store.append([_event(2, 0), _event(4, 1), _event(3, 0)])
+
+    assert [event.step_id for event in store.recent_for_job("job", 4)] == [5, 4, 3, 3]
+    assert [event.step_id for event in store.iter_job_events("job", after=(3, 3), batch_size=2)] == [3, 4, 5]
+    assert [row["step_id"] for row in store.recent_failures("job", limit=2)] == [5, 4]
+    assert store.count_failures("job") == store.job_aggregate("job").failures == 4
+    assert store.count_failures("job", window=2) == 2
+
+
+def test_segmented_store_opens_read_only_while_another_writer_holds_the_directory(tmp_path: Path) -> None:
+    directory = str(tmp_path / "segments")
+    writer = SegmentedEventStore(directory)
+    writer.append([_event(1), _event(2, 1)])
+
+    reader = SegmentedEventStore(directory)
+
+    assert not writer.read_only and reader.read_only
+    assert [event.step_id for event in reader.recent_for_job("job")] == [2, 1]
+    with pytest.raises(RuntimeError):
+        reader.append([_event(3)])
+    writer.close()
+    reader.close()
+    assert not SegmentedEventStore(directory).read_only
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from schemas.core import Event
+from store.event_store import EventStore, dump_json_bytes, dump_payload, load_payload
+
+
+def _event(step_id: int, payload: dict) -> Event:
+    return Event(
+        event_id=f"e{step_id}",
+        job_id="job",
+        step_id=step_id,
+        type="RUN",
+        payload=payload,
+        started_at=1.0,
+        ended_at=2.0,
+    )
+
+
+def test_bulk_append_round_trips_payloads_in_step_order(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"))
+    events = [_event(step, {"exit_code": step % 2, "stdout": "ü" * step}) for step in range(1, 501)]
+
+    store.append(events)
+    store.append(iter([_event(501, {"nested": {1: "non-string key", "ok": [1.5, None]}})]))
+    store.append([])
+
+    recent = store.recent_for_job("job", limit=3)
+    assert [event.step_id for event in recent] == [501, 500, 499]
+    assert recent[0].payload == {"nested": {"1": "non-string key", "ok": [1.5, None]}}
+    assert recent[1].payload == {"exit_code": 0, "stdout": "ü" * 500}
+    assert len(store.recent_for_job("job", limit=1000)) == 501
+
+
+def test_large_output_is_stored_once_as_blob_and_loaded_lazily(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"), blob_min_bytes=1024)
+    log = "".join(f"line {index}: FAILED test_{index % 7}\n" for index in range(2000))
+    store.append([_event(1, {"exit_code": 1, "stdout": log, "stderr": "short"})])
+    store.append([_event(2, {"exit_code": 1, "stdout": log, "stderr": ""})])
+
+    with sqlite3.connect(tmp_path / "events.db") as connection:
+        blob_rows = connection.execute("SELECT codec, raw_size, length(data) FROM eventblobrow").fetchall()
+        stored_json = connection.execute("SELECT payload_json FROM eventrow WHERE step_id = 1").fetchone()[0]
+    assert len(blob_rows) == 1
+    codec, raw_size, stored_size = blob_rows[0]
+    assert codec == "zlib" and raw_size == len(log) and stored_size < raw_size // 4
+    assert "FAILED" not in stored_json
+
+    event = store.recent_for_job("job", limit=2)[1]
+    assert event.payload["exit_code"] == 1
+    assert event.payload["stderr"] == "short"
+    assert event.payload.pending() == ["stdout"]
+    assert event.payload.get("stdout") == log
+    assert event.payload.pending() == []
+    assert event.model_dump()["payload"] == {"exit_code": 1, "stdout": log, "stderr": "short"}
+    assert json.loads(event.model_dump_json())["payload"]["stdout"] == log
+
+
+def test_payloads_beyond_orjson_range_round_trip_losslessly(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"))
+    payload = {"n": 2**70, "negative": -(2**65), "nested": {2: [2**64]}}
+
+    store.append([_event(1, payload), _event(2, {"n": 2**63 - 1})])
+
+    assert [event.payload for event in store.recent_for_job("job")] == [
+        {"n": 2**63 - 1},
+        {"n": 2**70, "negative": -(2**65), "nested": {"2": [2**64]}},
+    ]
+    assert load_payload(dump_payload({"n": 2**70})) == {"n": 2**70}
+    assert load_payload(dump_json_bytes({"n": 1})) == {"n": 1}
+
+
+def _run(step_id: int, exit_code: int, **payload: object) -> Event:
+    return _event(step_id, {"cmd": f"cmd-{step_id}", "exit_code": exit_code, **payload})
+
+
+def test_recent_failures_filters_and_projects_in_sql(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"), blob_min_bytes=100)
+    store.append(
+        [
+            _run(1, 1, stderr="old failure"),
+            _run(2, 0),
+            _event(3, {"exit_code": 9}).model_copy(update={"type": "META"}),
+            _run(4, 2, stderr="E" * 500, rusage={"max_rss_kb": 10}),
+            _run(5, 0),
+        ]
+    )
+    store.append([_run(1, 3).model_copy(update={"job_id": "other"})])
+
+    failures = store.recent_failures("job", limit=5, fields=("step_id", "cmd", "exit_code", "stderr", "rusage"))
+    assert failures == [
+        {"step_id": 4, "cmd": "cmd-4", "exit_code": 2, "stderr": "E" * 500, "rusage": {"max_rss_kb": 10}},
+        {"step_id": 1, "cmd": "cmd-1", "exit_code": 1, "stderr": "old failure", "rusage": None},
+    ]
+    assert store.recent_failures("job", limit=1) == [{"step_id": 4, "cmd": "cmd-4", "exit_code": 2}]
+    assert store.count_failures("job") == 2
+    assert store.count_failures("job", window=3) == 1
+    assert [row["step_id"] for row in store.recent_failures("job", window=3)] == [4]
+    with pytest.raises(ValueError):
+        store.recent_failures("job", fields=("payload_json') --",))
+
+
+def test_promoted_columns_are_backfilled_for_existing_databases(tmp_path: Path) -> None:
+    db_path = tmp_path / "events.db"
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE eventrow (id INTEGER PRIMARY KEY, job_id VARCHAR, step_id INTEGER, event_id VARCHAR, "
+            "type VARCHAR, payload_json VARCHAR, started_at FLOAT, ended_at FLOAT)"
+        )
+        connection.executemany(
+            "INSERT INTO eventrow (job_id, step_id, event_id, type, payload_json, started_at, ended_at) "
+            "VALUES ('job', ?, ?, ?, ?, 0, 0)",
+            [
+                (1, "a", "RUN", json.dumps({"cmd": "pytest", "exit_code": 1})),
+                (2, "b", "EDIT", json.dumps({"file_path": "x.py"})),
+            ],
+        )
+
+    store = EventStore(db_path=str(db_path))
+
+    assert store.recent_failures("job") == [{"step_id": 1, "cmd": "pytest", "exit_code": 1}]
+    store.append([_run(step, 0) for step in range(3, 2000)])
+    with store.engine.connect() as connection:
+        plan = connection.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT step_id FROM eventrow WHERE job_id = 'job' AND exit_code != 0 "
+                "ORDER BY step_id DESC, id DESC LIMIT 3"
+            )
+        ).fetchall()
+    assert "ix_eventrow_job_failures" in " ".join(str(row[-1]) for row in plan)
+
+
+def test_job_aggregates_are_maintained_on_append(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"))
+    edit = _event(3, {"file_path": "a.py"}).model_copy(update={"type": "EDIT"})
+
+    store.append([_run(1, 1), _run(2, 0), edit])
+    store.append([_run(5, 3), _run(4, 0)])
+    store.append([_run(2, 0).model_copy(update={"job_id": "other"})])
+
+    aggregate = store.job_aggregate("job")
+    assert (aggregate.events, aggregate.runs, aggregate.failures, aggregate.edits) == (5, 4, 2, 1)
+    assert aggregate.failures == store.count_failures("job")
+    assert (aggregate.last_step_id, aggregate.last_run_step_id, aggregate.last_status) == (5, 5, "failed")
+    assert store.job_aggregate("other").last_status == "ok"
+    assert store.job_aggregate("missing").events == 0
+
+
+def test_job_aggregates_are_backfilled_for_existing_databases(tmp_path: Path) -> None:
+    db_path = tmp_path / "events.db"
+    store = EventStore(db_path=str(db_path))
+    store.append([_run(1, 0), _run(2, 1), _run(3, 0)])
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("DROP TABLE jobaggregaterow")
+
+    aggregate = EventStore(db_path=str(db_path)).job_aggregate("job")
+
+    assert (aggregate.events, aggregate.runs, aggregate.failures) == (3, 3, 1)
+    assert (aggregate.last_step_id, aggregate.last_status) == (3, "ok")
+
+
+def test_iter_job_events_streams_in_step_order_from_a_cursor(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"), blob_min_bytes=10)
+    store.append([_run(step, 0, stdout=f"out {step} " * 5) for step in (3, 1, 2, 5, 4)])
+    store.append([_run(2, 1)])
+    store.append([_run(1, 0).model_copy(update={"job_id": "other"})])
+
+    streamed = list(store.iter_job_events("job", batch_size=2))
+    assert [(event.step_id, event.payload["exit_code"]) for event in streamed] == [
+        (1, 0), (2, 0), (2, 1), (3, 0), (4, 0), (5, 0)
+    ]
+    assert streamed[0].payload["stdout"] == "out 1 " * 5
+
+    page, cursor = store.page_job_events("job", limit=3)
+    assert [event.step_id for event in page] == [1, 2, 2]
+    rest, last = store.page_job_events("job", after=cursor, limit=3)
+    assert [event.step_id for event in rest] == [3, 4, 5]
+    assert store.page_job_events("job", after=last, limit=3) == ([], None)
+    assert [event.step_id for event in store.iter_job_events("job", after=cursor)] == [3, 4, 5]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from schemas.core import Event
+from store.event_store import EventStore
+from store.export import export_history
+from store.trace_ledger import TraceEntry, TraceLedger
+
+
+def _event(step_id: int, type_: str, payload: dict) -> Event:
+    return Event(
+        event_id=f"e{step_id}",
+        job_id="job",
+        step_id=step_id,
+        type=type_,  # type: ignore[arg-type]
+        payload=payload,
+        started_at=10.0,
+        ended_at=12.5,
+    )
+
+
+def _read_ndjson(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def _stores(tmp_path: Path) -> tuple[EventStore, TraceLedger]:
+    event_store = EventStore(db_path=str(tmp_path / "events.db"))
+    trace_ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    event_store.append(
+        [
+            _event(1, "RUN", {"cmd": "pytest", "exit_code": 1, "rusage": {"user_cpu_s": 0.5, "max_rss_kb": 100}}),
+            _event(2, "EDIT", {"file_path": "src/a.py"}),
+        ]
+    )
+    trace_ledger.append(
+        TraceEntry(
+            decision_id="d1",
+            job_id="job",
+            step_id=2,
+            decision_input_summary={},
+            program_summary={"instruction_count": 2},
+            outcome_summary={"event_count": 2},
+        )
+    )
+    return event_store, trace_ledger
+
+
+def test_ndjson_export_flattens_payload_fields_and_advances_watermark(tmp_path: Path) -> None:
+    event_store, trace_ledger = _stores(tmp_path)
+    out_dir = tmp_path / "export"
+
+    report = export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson", batch_size=1)
+
+    assert report.rows == {"events": 2, "traces": 1}
+    events = _read_ndjson(report.files[0])
+    assert events[0]["cmd"] == "pytest" and events[0]["exit_code"] == 1
+    assert events[0]["duration_s"] == 2.5 and events[0]["user_cpu_s"] == 0.5 and events[0]["max_rss_kb"] == 100
+    assert events[1]["file_path"] == "src/a.py" and events[1]["exit_code"] is None
+    assert _read_ndjson(report.files[1])[0]["instruction_count"] == 2
+    assert json.loads((out_dir / "watermark.json").read_text()) == {"events": 2, "traces": 1}
+
+    event_store.append([_event(3, "RUN", {"cmd": "pytest", "exit_code": 0})])
+    second = export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson")
+
+    assert second.rows == {"events": 1, "traces": 0}
+    assert [row["row_id"] for row in _read_ndjson(second.files[0])] == [3]
+    assert sorted(path.name for path in (out_dir / "events").iterdir()) == [
+        "part-000000000001.ndjson.gz",
+        "part-000000000003.ndjson.gz",
+    ]
+
+
+def test_incremental_export_picks_up_rows_added_after_retention_removed_the_newest(tmp_path: Path) -> None:
+    event_store, trace_ledger = _stores(tmp_path)
+    out_dir = tmp_path / "export"
+    export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson")
+    with event_store.engine.begin() as connection:
+        # What archiving an idle job does when its rows are the newest in the table.
+        connection.execute(text("DELETE FROM eventrow WHERE id = 2"))
+
+    event_store.append([_event(3, "RUN", {"cmd": "pytest", "exit_code": 0})])
+    report = export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson")
+
+    assert report.rows["events"] == 1
+    assert [row["row_id"] for row in _read_ndjson(report.files[0])] == [3]
+
+
+def test_full_export_replaces_earlier_parts_instead_of_duplicating_rows(tmp_path: Path) -> None:
+    event_store, trace_ledger = _stores(tmp_path)
+    out_dir = tmp_path / "export"
+    export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson")
+    event_store.append([_event(3, "RUN", {"cmd": "pytest", "exit_code": 0})])
+    export_history(str(out_dir), event_store, trace_ledger, fmt="ndjson")
+
+    report = export_history(str(out_dir), event_store, None, fmt="ndjson", incremental=False)
+
+    assert report.rows == {"events": 3}
+    parts = sorted((out_dir / "events").iterdir())
+    assert [path.name for path in parts] == ["part-000000000001.ndjson.gz"]
+    assert [row["row_id"] for row in _read_ndjson(str(parts[0]))] == [1, 2, 3]
+    # The traces table was not part of the full export and keeps its watermark.
+    assert json.loads((out_dir / "watermark.json").read_text()) == {"events": 3, "traces": 1}
+
+
+def test_parquet_export_uses_typed_columns(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    event_store, trace_ledger = _stores(tmp_path)
+
+    report = export_history(str(tmp_path / "export"), event_store, trace_ledger, fmt="parquet")
+
+    table = pq.read_table(report.files[0])
+    assert str(table.schema.field("exit_code").type) == "int64"
+    assert table.column("cmd").to_pylist() == ["pytest", None]
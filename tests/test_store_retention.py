@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from schemas.core import Event
+from store.event_store import EventStore
+from store.retention import ColdArchive, RetentionCompactor, RetentionPolicy
+from store.trace_ledger import TraceEntry, TraceLedger
+
+
+def _event(job_id: str, step_id: int, ended_at: float, **payload: object) -> Event:
+    return Event(
+        event_id=f"{job_id}-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        type="RUN",
+        payload={"cmd": "pytest", "exit_code": 0, **payload},
+        started_at=ended_at,
+        ended_at=ended_at,
+    )
+
+
+def _trace(job_id: str, step_id: int) -> TraceEntry:
+    return TraceEntry(
+        decision_id=f"{job_id}-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        decision_input_summary={},
+        program_summary={},
+        outcome_summary={},
+    )
+
+
+def test_age_and_per_job_limits_remove_rows_in_batches(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"))
+    store.append([_event("job-a", step, ended_at=float(step)) for step in range(1, 21)])
+    store.append([_event("job-b", step, ended_at=100.0 + step) for step in range(1, 6)])
+    compactor = RetentionCompactor(
+        store,
+        event_policy=RetentionPolicy(max_age_s=85.0, max_per_job=3),
+        batch_size=4,
+    )
+
+    report = compactor.run_once(now=110.0)
+
+    assert report.events_removed == 22
+    assert [event.step_id for event in store.recent_for_job("job-a")] == []
+    assert [event.step_id for event in store.recent_for_job("job-b")] == [5, 4, 3]
+    # Counters follow the rows still stored.
+    assert (store.job_aggregate("job-a").runs, store.job_aggregate("job-a").last_status) == (0, None)
+    assert store.job_aggregate("job-b").runs == 3
+
+
+def test_compaction_keeps_failure_counters_and_blob_refs_in_step(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"), blob_min_bytes=100)
+    log = "FAILED test_x\n" * 200
+    for step in range(1, 31):
+        exit_code = 1 if step % 3 == 0 else 0
+        stdout = log if step in (2, 29) else "ok"
+        store.append([_event("job", step, ended_at=float(step), exit_code=exit_code, stdout=stdout)])
+    store.append([_event("other", 1, ended_at=1.0, exit_code=2, stdout=log)])
+    compactor = RetentionCompactor(store, event_policy=RetentionPolicy(max_per_job=10), batch_size=3)
+
+    report = compactor.run_once(now=100.0)
+
+    aggregate = store.job_aggregate("job")
+    assert report.events_removed == 20
+    assert aggregate.failures == store.count_failures("job") == 4
+    assert (aggregate.events, aggregate.runs, aggregate.last_status) == (10, 10, "failed")
+    assert store.job_aggregate("other").failures == store.count_failures("other") == 1
+    # Step 2's copy was removed, but steps 29 and "other" still reference the shared blob.
+    assert report.blobs_removed == 0
+    assert store.recent_for_job("job", 2)[1].payload["stdout"] == log
+
+    RetentionCompactor(store, event_policy=RetentionPolicy(max_per_job=1), batch_size=3).run_once(now=100.0)
+    with sqlite3.connect(tmp_path / "events.db") as connection:
+        assert connection.execute("SELECT refs FROM eventblobrow").fetchall() == [(1,)]
+
+
+def test_idle_jobs_move_to_queryable_cold_archive(tmp_path: Path) -> None:
+    store = EventStore(db_path=str(tmp_path / "events.db"), blob_min_bytes=100)
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    log = "FAILED test_x\n" * 200
+    store.append([_event("done", 1, ended_at=10.0, stdout=log), _event("done", 2, ended_at=11.0)])
+    store.append([_event("active", 1, ended_at=1000.0, stdout=log)])
+    ledger.append(_trace("done", 2))
+    archive = ColdArchive(str(tmp_path / "archive"))
+    idle = RetentionPolicy(archive_idle_after_s=60.0)
+    compactor = RetentionCompactor(store, ledger, event_policy=idle, trace_policy=idle, archive=archive)
+
+    report = compactor.run_once(now=1000.0)
+
+    assert report.jobs_archived == ["done"]
+    assert (report.events_removed, report.traces_removed, report.blobs_removed) == (2, 1, 0)
+    assert store.recent_for_job("done") == []
+    assert ledger.recent_for_job("done") == []
+    archived = archive.events_for_job("done")
+    assert [event.step_id for event in archived] == [1, 2]
+    assert archived[0].payload["stdout"] == log
+    assert [entry.decision_id for entry in archive.traces_for_job("done")] == ["done-2"]
+    assert archive.jobs() == ["done"]
+    # The shared blob is still referenced by the active job's event.
+    assert store.recent_for_job("active")[0].payload["stdout"] == log
+
+    assert compactor.run_once(now=2000.0).jobs_archived == ["active"]
+    assert compactor.run_once(now=3000.0).jobs_archived == []
+    with sqlite3.connect(tmp_path / "events.db") as connection:
+        assert connection.execute("SELECT count(*) FROM eventblobrow").fetchone()[0] == 0
+
+
+def test_compaction_returns_free_pages_to_the_filesystem(tmp_path: Path) -> None:
+    db_path = tmp_path / "events.db"
+    store = EventStore(db_path=str(db_path))
+    store.append([_event("job", step, ended_at=1.0, note="x" * 2000) for step in range(500)])
+    compactor = RetentionCompactor(store, event_policy=RetentionPolicy(max_age_s=10.0), vacuum_pages=100_000)
+
+    report = compactor.run_once(now=100.0)
+
+    assert report.events_removed == 500
+    assert report.pages_freed > 100
+    with sqlite3.connect(db_path) as connection:
+        assert connection.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert connection.execute("PRAGMA freelist_count").fetchone()[0] == 0
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from store.trace_ledger import TraceEntry, TraceLedger
+
+
+def _entry(job_id: str, step_id: int, decision_id: str | None = None) -> TraceEntry:
+    return TraceEntry(
+        decision_id=decision_id or f"{job_id}-{step_id}",
+        job_id=job_id,
+        step_id=step_id,
+        decision_input_summary={"files": [f"f{step_id}.py"], "mode": "optimized_structured"},
+        program_summary={"instruction_count": step_id},
+        outcome_summary={"event_count": 1, "git_head": "abc"},
+        timings={"interpret": 0.5},
+    )
+
+
+def test_append_many_writes_one_batch_readable_by_all_readers(tmp_path: Path) -> None:
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    ledger.append_many([_entry("job", 1), _entry("job", 2), _entry("other", 1)])
+    ledger.append_many([])
+    ledger.append(_entry("job", 2, decision_id="retry"))
+
+    assert [entry.decision_id for entry in ledger.recent_for_job("job")] == ["retry", "job-2", "job-1"]
+    assert ledger.recent_records("job", limit=1) == [_entry("job", 2, decision_id="retry").model_dump()]
+    assert [entry.decision_id for entry in ledger.entries_for_step("job", 2)] == ["job-2", "retry"]
+    assert ledger.entries_for_step("job", 9) == []
+
+
+def test_record_reads_select_columns_and_entry_fields(tmp_path: Path) -> None:
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    ledger.append_many([_entry("job", step_id) for step_id in range(1, 6)])
+
+    fields = ("step_id", "created_at", "program_summary", "timings", "missing")
+    page, cursor = ledger.page_job_records("job", limit=2, fields=fields)
+    rest, end = ledger.page_job_records("job", after=cursor, limit=10, fields=("decision_id",))
+
+    assert [record["step_id"] for record in page] == [1, 2]
+    assert page[0]["program_summary"] == {"instruction_count": 1}
+    assert page[0]["timings"] == {"interpret": 0.5}
+    assert page[0]["missing"] is None and isinstance(page[0]["created_at"], float)
+    assert cursor is not None and end is None
+    assert rest == [{"decision_id": f"job-{step_id}"} for step_id in (3, 4, 5)]
+    assert [record["step_id"] for record in ledger.recent_records("job", 2, fields=("step_id",))] == [5, 4]
+    with pytest.raises(ValueError):
+        ledger.recent_records("job", fields=("payload_json'); --",))
+
+
+def test_step_lookup_uses_job_step_index(tmp_path: Path) -> None:
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+
+    with ledger.engine.connect() as connection:
+        plan = connection.execute(
+            text("EXPLAIN QUERY PLAN SELECT payload_json FROM tracerow WHERE job_id = 'j' AND step_id = 1 ORDER BY id")
+        ).all()
+
+    assert "ix_tracerow_job_step_id" in " ".join(str(row[-1]) for row in plan)
+
+
+def test_entries_with_integers_beyond_64_bits_round_trip(tmp_path: Path) -> None:
+    ledger = TraceLedger(db_path=str(tmp_path / "trace.db"))
+    entry = _entry("job", 1).model_copy(update={"outcome_summary": {"git_head": "abc", "size": 2**70}})
+    ledger.append(entry)
+
+    assert ledger.recent_for_job("job")[0].outcome_summary["size"] == 2**70
+    assert ledger.recent_records("job")[0]["outcome_summary"]["size"] == 2**70
+    assert ledger.page_job_traces("job")[0][0] == entry
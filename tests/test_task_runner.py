@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
 import tempfile
 
@@ -79,3 +80,49 @@ def test_task_runner_end_to_end():
         _, more_events, _ = runner.run_step(job_id=job_id, program=second_program, hints=AgentHints())
         assert more_events
         assert max(evt.step_id for evt in more_events) >= 2
+
+
+def test_task_runner_run_step_async_advances_step_ids():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = Path(tmpdir)
+        event_store = EventStore(db_path=str(base / "events.db"))
+        trace_ledger = TraceLedger(db_path=str(base / "trace.db"))
+        memory_store = MemoryStore(db_path=str(base / "memory.db"))
+        observer = UnifiedObserver(event_store=event_store, trace_ledger=trace_ledger)
+
+        devagent = DevAgent(
+            mode=DevAgentMode.OPTIMIZED_STRUCTURED,
+            observer=observer,
+            memory_store=memory_store,
+            vector_store=None,
+        )
+        controller = MetaController(
+            devagent=devagent,
+            planner=LLMMetaPlanner(),
+            memory_store=memory_store,
+            trace_ledger=trace_ledger,
+            event_store=event_store,
+        )
+        runner = TaskRunner(controller=controller)
+
+        goal_view = GoalView(task_type="fix_failures", natural_language_goal="Make tests pass")
+        program = Program(
+            instructions=[
+                Instruction(kind="RUN", payload={"cmd": 'python -c "import sys; sys.exit(1)"'}),
+            ]
+        )
+        job_id = runner.create_job(repo_root=str(base), goal_view=goal_view)
+
+        async def run_two_steps():
+            first = await runner.run_step_async(job_id=job_id, program=program)
+            second = await runner.run_step_async(job_id=job_id, program=program)
+            return first, second
+
+        (_, first_events, decision_input), (_, second_events, _) = asyncio.run(run_two_steps())
+
+        assert [evt.step_id for evt in first_events] == [1]
+        assert [evt.step_id for evt in second_events] == [2]
+        assert first_events[0].payload["exit_code"] == 1
+        assert decision_input.goal_view.natural_language_goal == "Make tests pass"
+        assert len(event_store.recent_for_job(job_id)) == 2
+        assert len(trace_ledger.recent_for_job(job_id)) == 2